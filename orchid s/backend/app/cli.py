@@ -0,0 +1,156 @@
+"""
+Deployment helpers for the unified backend.
+
+Usage (from backend/):
+    python -m app.cli growth-cache    # parse the growth spreadsheet into its binary lookup cache
+    python -m app.cli growth-grid     # compile the growth forest into its decision-grid sidecar
+    python -m app.cli export-mmap     # write memory-mappable model artifacts for MODEL_MMAP=true
+    python -m app.cli inference-server [--replicas 2]   # serve the models to workers over INFERENCE_SOCKET
+    python -m app.cli rescore [--plant-id ID] [--out scores.jsonl]   # re-score stored uploads with the current weights
+    python -m app.cli build-similar-index [--lists N]   # partition the similar-case feature index (IVF)
+"""
+import argparse
+import sys
+
+
+def _growth_cache(args) -> int:
+    from app.services import growth
+
+    cache_path, lookup = growth.build_dataset_cache(force=args.force)
+    print(f"growth dataset cache: {cache_path} ({len(lookup or [])} ages)")
+    return 0
+
+
+def _growth_grid(args) -> int:
+    from app.services import growth
+
+    grid = growth.build_grid(save=True)
+    cells = grid.proba.shape[:-1]
+    print(f"growth grid: {' x '.join(str(c) for c in cells)} cells, {grid.proba.nbytes} bytes")
+    return 0
+
+
+def _export_mmap(args) -> int:
+    from app.services import disease, growth
+
+    print(f"growth: packed forest written to {growth.export_packed_forest()}")
+    try:
+        weight_path = disease._resolve_weight_path()
+    except FileNotFoundError as exc:
+        print(f"disease: skipped ({exc})")
+        return 0
+    if disease.mmap_compatible(weight_path):
+        print(f"disease: {weight_path} can be memory-mapped as is")
+    else:
+        print(f"disease: {weight_path} uses the legacy format; re-save it with torch.save to enable mmap")
+        return 1
+    return 0
+
+
+def _inference_server(args) -> int:
+    from app.services import inference_server
+
+    return inference_server.serve(args.socket, args.replicas)
+
+
+def _rescore(args) -> int:
+    import json
+    import os
+    import time
+
+    import torch
+
+    from app.core.config import get_settings
+    from app.services import disease
+
+    if not get_settings().disease_torch_threads:
+        torch.set_num_threads(os.cpu_count() or 1)
+    store = disease.get_tensor_store()
+    if store is None:
+        print("rescore: DISEASE_TENSOR_STORE_DIR is not set", file=sys.stderr)
+        return 1
+    rows = store.rows_for_plant(args.plant_id) if args.plant_id else None
+    out = open(args.out, "w") if args.out else sys.stdout
+    start, count = time.perf_counter(), 0
+    try:
+        for row, record, result in disease.rescore_stored(rows, batch_size=args.batch_size):
+            line = {
+                "row": row,
+                "digest": record["digest"].tobytes().hex(),
+                "plant_id": record["plant_id"].decode() or None,
+                "prediction": result,
+            }
+            out.write(json.dumps(line) + "\n")
+            count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"rescore: {count} images in {elapsed:.1f} s ({count / max(elapsed, 1e-9):.1f} img/s)", file=sys.stderr)
+    return 0
+
+
+def _build_similar_index(args) -> int:
+    import time
+    from pathlib import Path
+
+    from app.core.config import get_settings
+    from app.services.embedding_index import EmbeddingIndex
+
+    root = get_settings().disease_embedding_dir
+    if not root:
+        print("build-similar-index: DISEASE_EMBEDDING_DIR is not set", file=sys.stderr)
+        return 1
+    directories = [Path(root) / args.version] if args.version else sorted(p for p in Path(root).iterdir() if p.is_dir())
+    for directory in directories:
+        index = EmbeddingIndex(directory)
+        if not len(index):
+            print(f"{directory.name}: empty, skipped")
+            continue
+        start = time.perf_counter()
+        partitions = index.build_partitions(lists=args.lists)
+        print(
+            f"{directory.name}: {partitions.count} rows in {len(partitions.centroids)} partitions"
+            f" ({time.perf_counter() - start:.1f} s)"
+        )
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    cache = sub.add_parser("growth-cache", help="Parse the growth spreadsheet into its binary lookup cache")
+    cache.add_argument("--force", action="store_true", help="Rebuild even if the cache is current")
+    cache.set_defaults(func=_growth_cache)
+
+    sub.add_parser("growth-grid", help="Compile the growth RandomForest into a memory-mapped lookup grid").set_defaults(
+        func=_growth_grid
+    )
+
+    sub.add_parser("export-mmap", help="Write memory-mappable model artifacts used with MODEL_MMAP").set_defaults(
+        func=_export_mmap
+    )
+
+    server = sub.add_parser("inference-server", help="Run the growth and disease models for all API workers")
+    server.add_argument("--socket", help="Unix socket path (default: INFERENCE_SOCKET)")
+    server.add_argument("--replicas", type=int, help="Model processes (default: INFERENCE_REPLICAS)")
+    server.set_defaults(func=_inference_server)
+
+    rescore = sub.add_parser("rescore", help="Re-score the stored preprocessed uploads with the current disease weights")
+    rescore.add_argument("--plant-id", help="Only images uploaded for this plant")
+    rescore.add_argument("--batch-size", type=int, default=256)
+    rescore.add_argument("--out", help="JSON lines output file (default: stdout)")
+    rescore.set_defaults(func=_rescore)
+
+    similar = sub.add_parser("build-similar-index", help="Partition the similar-case feature index for fast search")
+    similar.add_argument("--version", help="Model version directory to build (default: all)")
+    similar.add_argument("--lists", type=int, help="Partitions (default: sqrt of the row count)")
+    similar.set_defaults(func=_build_similar_index)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
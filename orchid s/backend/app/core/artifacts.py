@@ -0,0 +1,133 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class Artifact(NamedTuple):
+    value: object
+    version: str
+    sources: Tuple[Path, ...]
+    signature: Tuple[Tuple[int, int], ...]
+    loaded_at: float
+
+
+def file_version(*paths) -> str:
+    """Short content hash of the given files, used as the served model version."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def _signature(paths: Sequence[Path]) -> Tuple[Tuple[int, int], ...]:
+    stats = [os.stat(p) for p in paths]
+    return tuple((st.st_size, st.st_mtime_ns) for st in stats)
+
+
+class ArtifactSlot:
+    """
+    Holds the current version of a loaded model and swaps in new versions atomically.
+
+    `loader()` returns (value, version, source paths). Readers take one `get()` snapshot per
+    request, so a reload never changes the model under an in-flight request; the old value
+    is released once those requests finish.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Tuple[object, str, Sequence]], smoke_test=None):
+        self.name = name
+        self._loader = loader
+        self._smoke_test = smoke_test
+        self._current: Optional[Artifact] = None
+        self._lock = threading.Lock()
+        self.reloading = False
+        self.last_error: Optional[str] = None
+        self._failed_signature = None
+        registry[name] = self
+
+    def _load(self) -> Artifact:
+        value, version, sources = self._loader()
+        if self._smoke_test is not None:
+            self._smoke_test(value)
+        sources = tuple(Path(p) for p in sources)
+        return Artifact(value, version, sources, _signature(sources), time.time())
+
+    def get(self) -> Artifact:
+        current = self._current
+        if current is not None:
+            return current
+        with self._lock:
+            if self._current is None:
+                self._current = self._load()
+            return self._current
+
+    @property
+    def loaded(self) -> bool:
+        return self._current is not None
+
+    def reload(self) -> Artifact:
+        """Load and smoke-test the artifact on disk, then swap it in; the old one keeps serving on failure."""
+        with self._lock:
+            self.reloading = True
+            try:
+                fresh = self._load()
+            except Exception as exc:
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                self._failed_signature = self._disk_signature()
+                raise
+            finally:
+                self.reloading = False
+            self._current = fresh
+            self.last_error = None
+            return fresh
+
+    def _disk_signature(self):
+        current = self._current
+        if current is None:
+            return None
+        try:
+            return _signature(current.sources)
+        except OSError:
+            return None  # mid-copy or removed; check again on the next tick
+
+    def changed_on_disk(self) -> bool:
+        """True when the served files changed since load (and not into a version that already failed)."""
+        current = self._current
+        on_disk = self._disk_signature()
+        return on_disk is not None and on_disk != current.signature and on_disk != self._failed_signature
+
+    def describe(self) -> Dict[str, object]:
+        current = self._current
+        return {
+            "loaded": current is not None,
+            "version": current.version if current else None,
+            "loaded_at": current.loaded_at if current else None,
+            "sources": [str(p) for p in current.sources] if current else [],
+            "reloading": self.reloading,
+            "last_error": self.last_error,
+        }
+
+
+registry: Dict[str, ArtifactSlot] = {}
+
+
+async def watch(slots: Optional[List[ArtifactSlot]] = None, interval: float = 5.0) -> None:
+    """
+    Poll artifact files and hot-reload any slot whose sources changed size or mtime.
+
+    Without `slots`, every registered slot is watched, including ones registered later when
+    a lazily imported service is first used.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        for slot in list(slots if slots is not None else registry.values()):
+            if slot.changed_on_disk() and not slot.reloading:
+                try:
+                    await asyncio.to_thread(slot.reload)
+                except Exception:
+                    pass  # recorded in slot.last_error; the previous version keeps serving
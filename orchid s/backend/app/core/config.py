@@ -12,24 +12,121 @@ class Settings(BaseSettings):
 
     Environment variables:
       - API_PREFIX: base path for all routers (default: /api)
+      - ENABLED_ROUTERS: comma-separated routers to mount (default: health,growth,disease,env,admin)
       - CORS_ORIGINS: comma-separated list of allowed origins (default: *)
       - FIREBASE_DB_URL: Realtime DB root URL (e.g., https://your-db.firebaseio.com)
+      - FIREBASE_MAX_CONNECTIONS: Connection-pool size of the shared Firebase client (default: 20)
+      - FIREBASE_MAX_KEEPALIVE: Idle connections kept open for reuse (default: 10)
+      - FIREBASE_KEEPALIVE_EXPIRY_S: Seconds an idle connection is kept (default: 30)
+      - FIREBASE_HTTP2: Negotiate HTTP/2 with the database; needs `pip install httpx[http2]` (default: false)
+      - FIREBASE_CONNECT_TIMEOUT_S: Seconds to connect, or to wait for a free pooled connection (default: 5)
+      - FIREBASE_READ_TIMEOUT_S: Seconds to wait for response data, or to send a request (default: 10)
+      - FIREBASE_PLANTS_TTL_S: Seconds the parsed plants tree is served from memory before an ETag revalidation (default: 5)
+      - FIREBASE_STREAM: Mirror /plants in memory through the streaming API and serve reads from it (default: false)
+      - FIREBASE_STREAM_STALE_S: Seconds without a stream event (keep-alives included) before the mirror counts as stale and is reconnected (default: 60)
+      - FIREBASE_BULK_MAX_ITEMS: Upper bound on plants per /env/plants:bulk or :bulk-delete call (default: 10000)
+      - FIREBASE_BULK_CHUNK: Plants per multi-path PATCH of a bulk call (default: 500)
+      - FIREBASE_BULK_CONCURRENCY: PATCH requests of one bulk call in flight at once (default: 4)
       - GROWTH_MODEL_PATH: Optional override for the growth RF model (.joblib)
       - GROWTH_METADATA_PATH: Optional override for metadata (.joblib)
       - GROWTH_DATASET_PATH: Optional override for Excel dataset with expected ranges
+      - GROWTH_GRID_ENABLED: Serve growth-model probabilities from a precompiled decision grid (default: false)
+      - GROWTH_GRID_PATH: Optional path prefix for the grid sidecar (default: next to the model file)
+      - GROWTH_CACHE_DIR: Optional directory for the parsed-dataset cache (default: next to the dataset)
+      - GROWTH_BATCH_MAX_ITEMS: Upper bound on measurements per /growth/analyze-batch call (default: 50000)
       - DISEASE_WEIGHTS_PATH: Optional override for plant village weights (.pth)
+      - DISEASE_BACKEND: eager | channels_last | dynamic_int8 | static_int8 | torchscript | compile | onnx (default: eager)
+      - DISEASE_ONNX_DIR: Where DISEASE_BACKEND=onnx writes its export (default: next to the weights; the temp dir if that is read-only)
+      - DISEASE_CALIBRATION_DIR: Images used to calibrate DISEASE_BACKEND=static_int8
+      - DISEASE_CASCADE_WEIGHTS_PATH: mobilenet_v3_small weights; enables the two-stage cascade when set
+      - DISEASE_CASCADE_THRESHOLD: First-stage confidence at or above which the large model is skipped (default: 0.9)
+      - DISEASE_BATCH_MAX_SIZE: Most concurrent leaf images stacked into one forward pass (default: 16)
+      - DISEASE_BATCH_WINDOW_MS: How long the first queued image waits for others to join (default: 5)
+      - DISEASE_WORKERS: Threads in the dedicated decode/inference pool (default: 2)
+      - DISEASE_TORCH_THREADS: torch intra-op threads per forward pass (default: 0, torch's own choice)
+      - DISEASE_MAX_PENDING: Disease requests in progress before new ones get 503 (default: 64)
+      - DISEASE_RETRY_AFTER_S: Retry-After seconds sent with that 503 (default: 1)
+      - DISEASE_FAST_PREPROCESS: Decode JPEGs at reduced resolution before resizing (default: true)
+      - DISEASE_CACHE_ENTRIES: Disease results kept in memory by upload hash + model version; 0 disables (default: 4096)
+      - DISEASE_CACHE_TTL_S: Seconds a cached disease result stays valid (default: 86400)
+      - DISEASE_CACHE_PATH: Optional SQLite file so cached results survive restarts (default: memory only)
+      - DISEASE_TENSOR_STORE_DIR: Directory of the append-only store of preprocessed uploads (unset: not stored)
+      - DISEASE_EMBEDDING_DIR: Directory of the per-model-version float16 feature index behind /disease/similar (unset: off)
+      - DISEASE_SIMILAR_NPROBE: Partitions scanned per /disease/similar query once the IVF index is built (default: 8)
+      - DISEASE_STREAM_BATCH_SIZE: Images per forward pass on /disease/predict-batch (default: 16)
+      - DISEASE_ARCHIVE_MAX_IMAGES: Most images scored from one /disease/predict-batch upload (default: 10000)
+      - DISEASE_MAX_IMAGE_BYTES: Largest single image accepted by /disease/predict-batch (default: 25 MB)
+      - INFERENCE_SOCKET: Unix socket of a local inference server; when set, models run there instead of in each worker
+      - INFERENCE_REPLICAS: Model processes started by `python -m app.cli inference-server` (default: 1)
+      - INFERENCE_TIMEOUT_S: Seconds to wait for an inference server reply (default: 30)
+      - MODEL_MMAP: Memory-map model artifacts so uvicorn workers share read-only pages (default: false)
+      - WARMUP_ON_STARTUP: Load and warm all models in the background at startup (default: true)
+      - READY_ON_DEGRADED: Report ready even if a model failed to warm up (default: false, /ready stays 503)
+      - MODEL_WATCH_INTERVAL: Seconds between checks for changed model files to hot-reload (default: 0, off)
+      - ADMIN_TOKEN: Required X-Admin-Token header for /admin endpoints (unset: admin endpoints disabled)
     """
 
     api_prefix: str = Field("/api", env="API_PREFIX")
+    enabled_routers: str = Field("health,growth,disease,env,admin", env="ENABLED_ROUTERS")
     cors_origins: List[str] = Field(default_factory=lambda: ["*"], env="CORS_ORIGINS")
 
     firebase_db_url: Optional[str] = Field(default=None, env="FIREBASE_DB_URL")
+    firebase_max_connections: int = Field(20, env="FIREBASE_MAX_CONNECTIONS")
+    firebase_max_keepalive: int = Field(10, env="FIREBASE_MAX_KEEPALIVE")
+    firebase_keepalive_expiry_s: float = Field(30.0, env="FIREBASE_KEEPALIVE_EXPIRY_S")
+    firebase_http2: bool = Field(False, env="FIREBASE_HTTP2")
+    firebase_connect_timeout_s: float = Field(5.0, env="FIREBASE_CONNECT_TIMEOUT_S")
+    firebase_read_timeout_s: float = Field(10.0, env="FIREBASE_READ_TIMEOUT_S")
+    firebase_plants_ttl_s: float = Field(5.0, env="FIREBASE_PLANTS_TTL_S")
+    firebase_stream: bool = Field(False, env="FIREBASE_STREAM")
+    firebase_stream_stale_s: float = Field(60.0, env="FIREBASE_STREAM_STALE_S")
+    firebase_bulk_max_items: int = Field(10000, env="FIREBASE_BULK_MAX_ITEMS")
+    firebase_bulk_chunk: int = Field(500, env="FIREBASE_BULK_CHUNK")
+    firebase_bulk_concurrency: int = Field(4, env="FIREBASE_BULK_CONCURRENCY")
 
     growth_model_path: Optional[str] = Field(default=None, env="GROWTH_MODEL_PATH")
     growth_metadata_path: Optional[str] = Field(default=None, env="GROWTH_METADATA_PATH")
     growth_dataset_path: Optional[str] = Field(default=None, env="GROWTH_DATASET_PATH")
+    growth_grid_enabled: bool = Field(False, env="GROWTH_GRID_ENABLED")
+    growth_grid_path: Optional[str] = Field(default=None, env="GROWTH_GRID_PATH")
+    growth_cache_dir: Optional[str] = Field(default=None, env="GROWTH_CACHE_DIR")
+    growth_batch_max_items: int = Field(50000, env="GROWTH_BATCH_MAX_ITEMS")
 
     disease_weights_path: Optional[str] = Field(default=None, env="DISEASE_WEIGHTS_PATH")
+    disease_backend: str = Field("eager", env="DISEASE_BACKEND")
+    disease_onnx_dir: Optional[str] = Field(default=None, env="DISEASE_ONNX_DIR")
+    disease_calibration_dir: Optional[str] = Field(default=None, env="DISEASE_CALIBRATION_DIR")
+    disease_cascade_weights_path: Optional[str] = Field(default=None, env="DISEASE_CASCADE_WEIGHTS_PATH")
+    disease_cascade_threshold: float = Field(0.9, env="DISEASE_CASCADE_THRESHOLD")
+    disease_batch_max_size: int = Field(16, env="DISEASE_BATCH_MAX_SIZE")
+    disease_batch_window_ms: float = Field(5.0, env="DISEASE_BATCH_WINDOW_MS")
+    disease_workers: int = Field(2, env="DISEASE_WORKERS")
+    disease_torch_threads: int = Field(0, env="DISEASE_TORCH_THREADS")
+    disease_max_pending: int = Field(64, env="DISEASE_MAX_PENDING")
+    disease_retry_after_s: float = Field(1.0, env="DISEASE_RETRY_AFTER_S")
+    disease_fast_preprocess: bool = Field(True, env="DISEASE_FAST_PREPROCESS")
+    disease_cache_entries: int = Field(4096, env="DISEASE_CACHE_ENTRIES")
+    disease_cache_ttl_s: float = Field(86400.0, env="DISEASE_CACHE_TTL_S")
+    disease_cache_path: Optional[str] = Field(default=None, env="DISEASE_CACHE_PATH")
+    disease_tensor_store_dir: Optional[str] = Field(default=None, env="DISEASE_TENSOR_STORE_DIR")
+    disease_embedding_dir: Optional[str] = Field(default=None, env="DISEASE_EMBEDDING_DIR")
+    disease_similar_nprobe: int = Field(8, env="DISEASE_SIMILAR_NPROBE")
+    disease_stream_batch_size: int = Field(16, env="DISEASE_STREAM_BATCH_SIZE")
+    disease_archive_max_images: int = Field(10000, env="DISEASE_ARCHIVE_MAX_IMAGES")
+    disease_max_image_bytes: int = Field(25 * 1024 * 1024, env="DISEASE_MAX_IMAGE_BYTES")
+
+    inference_socket: Optional[str] = Field(default=None, env="INFERENCE_SOCKET")
+    inference_replicas: int = Field(1, env="INFERENCE_REPLICAS")
+    inference_timeout_s: float = Field(30.0, env="INFERENCE_TIMEOUT_S")
+
+    model_mmap: bool = Field(False, env="MODEL_MMAP")
+    warmup_on_startup: bool = Field(True, env="WARMUP_ON_STARTUP")
+    ready_on_degraded: bool = Field(False, env="READY_ON_DEGRADED")
+    model_watch_interval: float = Field(0.0, env="MODEL_WATCH_INTERVAL")
+    admin_token: Optional[str] = Field(default=None, env="ADMIN_TOKEN")
+
+    def router_enabled(self, name: str) -> bool:
+        return name in {r.strip() for r in self.enabled_routers.split(",")}
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,109 @@
+import threading
+from typing import Callable, Dict, Sequence
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self):
+        return self.value
+
+
+class Gauge(Counter):
+    def dec(self, amount: int = 1) -> None:
+        self.inc(-amount)
+
+
+class Ratio:
+    """Share of `hits` in `hits + misses`, computed from the counters when read."""
+
+    def __init__(self, hits: Sequence[Counter], misses: Sequence[Counter]):
+        self.hits = tuple(hits)
+        self.misses = tuple(misses)
+
+    def snapshot(self) -> float:
+        hits = sum(c.snapshot() for c in self.hits)
+        total = hits + sum(c.snapshot() for c in self.misses)
+        return hits / total if total else 0.0
+
+
+class Reading:
+    """A value computed by `read` whenever the metrics are read, e.g. the age of some state."""
+
+    def __init__(self, read: Callable[[], object]):
+        self.read = read
+
+    def snapshot(self):
+        return self.read()
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus style) plus count/sum/max."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * len(self.buckets)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += value
+            self.max = max(self.max, value)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._counts[i] += 1
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "count": self.count,
+                "sum": self.total,
+                "mean": self.total / self.count if self.count else 0.0,
+                "max": self.max,
+                "buckets": {str(bound): n for bound, n in zip(self.buckets, self._counts)},
+            }
+
+
+_registry: Dict[str, object] = {}
+_registry_lock = threading.Lock()
+
+
+def counter(name: str) -> Counter:
+    with _registry_lock:
+        return _registry.setdefault(name, Counter())
+
+
+def gauge(name: str) -> Gauge:
+    with _registry_lock:
+        return _registry.setdefault(name, Gauge())
+
+
+def histogram(name: str, buckets: Sequence[float]) -> Histogram:
+    with _registry_lock:
+        return _registry.setdefault(name, Histogram(buckets))
+
+
+def ratio(name: str, hits: Sequence[Counter], misses: Sequence[Counter]) -> Ratio:
+    with _registry_lock:
+        return _registry.setdefault(name, Ratio(hits, misses))
+
+
+def reading(name: str, read: Callable[[], object]) -> Reading:
+    with _registry_lock:
+        return _registry.setdefault(name, Reading(read))
+
+
+def snapshot() -> Dict[str, object]:
+    with _registry_lock:
+        items = list(_registry.items())
+    return {name: metric.snapshot() for name, metric in sorted(items)}
@@ -0,0 +1,69 @@
+import asyncio
+import time
+from typing import Callable, Dict, Optional
+
+from app import services
+from app.core.config import get_settings
+
+
+class WarmupState:
+    """Progress of the startup warm-up, read by the readiness probe."""
+
+    def __init__(self):
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.components: Dict[str, str] = {}
+
+    @property
+    def degraded(self) -> bool:
+        return any(status.startswith("unavailable") for status in self.components.values())
+
+    @property
+    def ready(self) -> bool:
+        """Warm-up finished and every component loaded (READY_ON_DEGRADED=true: whatever loaded)."""
+        if self.finished_at is None:
+            return False
+        return not self.degraded or get_settings().ready_on_degraded
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+
+state = WarmupState()
+
+
+def _warmers() -> Dict[str, Callable[[], None]]:
+    """Warm-up hooks of the model subsystems whose routers are mounted; imports happen in the worker thread."""
+    settings = get_settings()
+    return {
+        name: (lambda name=name: getattr(services, name).warm_up())
+        for name in ("growth", "disease")
+        if settings.router_enabled(name)
+    }
+
+
+async def _warm(name: str, fn: Callable[[], None]) -> None:
+    try:
+        await asyncio.to_thread(fn)
+        state.components[name] = "ok"
+    except Exception as exc:  # the process stays up, but /ready keeps traffic away unless READY_ON_DEGRADED
+        state.components[name] = f"unavailable: {exc}"
+
+
+async def run() -> None:
+    """Load and warm every model in parallel, then flip readiness."""
+    state.started_at = time.monotonic()
+    warmers = _warmers()
+    state.components = {name: "pending" for name in warmers}
+    try:
+        await asyncio.gather(*(_warm(name, fn) for name, fn in warmers.items()))
+    finally:
+        state.finished_at = time.monotonic()
+
+
+def skip() -> None:
+    state.started_at = state.finished_at = time.monotonic()
+    state.components = {}
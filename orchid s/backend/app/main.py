@@ -1,15 +1,49 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app import routers, services
+from app.core import artifacts, warmup
 from app.core.config import get_settings
-from app.routers import disease, env, growth, health
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm models in the background so liveness answers at once while /ready stays 503.
+    warmup_task = asyncio.create_task(warmup.run()) if settings.warmup_on_startup else None
+    if warmup_task is None:
+        warmup.skip()
+    watch_task = None
+    if settings.model_watch_interval > 0:
+        watch_task = asyncio.create_task(artifacts.watch(interval=settings.model_watch_interval))
+    if settings.router_enabled("env"):
+        services.env.open_client()  # one pooled Firebase client for the app's lifetime
+        if settings.firebase_stream:
+            services.env.start_mirror()
+    yield
+    for task in (warmup_task, watch_task):
+        if task is not None and not task.done():
+            task.cancel()
+    # A module warm-up is still importing has no shutdown hook yet; it has nothing to release.
+    shutdown = getattr(services.loaded("disease"), "shutdown", None)
+    close_client = getattr(services.loaded("env"), "close_client", None)
+    try:
+        if shutdown is not None:
+            shutdown()
+    finally:
+        if close_client is not None:
+            await close_client()
+
+
 app = FastAPI(
     title="Orchid Insights Unified Backend",
     version="0.1.0",
     description="Growth classifier, disease detector, and Firebase bridge in one FastAPI service.",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -22,10 +56,9 @@ app.add_middleware(
 
 api_prefix = settings.api_prefix.rstrip("/")
 
-app.include_router(health.router, prefix=api_prefix)
-app.include_router(growth.router, prefix=api_prefix)
-app.include_router(disease.router, prefix=api_prefix)
-app.include_router(env.router, prefix=api_prefix)
+for name in routers.__all__:
+    if settings.router_enabled(name):
+        app.include_router(getattr(routers, name).router, prefix=api_prefix)
 
 
 @app.get("/")
@@ -9,6 +9,9 @@ class GrowthRequest(BaseModel):
     current_height_mm: float = Field(..., description="Measured plant height in millimeters")
     current_date: Optional[str] = Field(None, description="Override current date (YYYY-MM-DD)")
     age_days: Optional[int] = Field(None, description="Optional override for computed age")
+    include_model_probabilities: bool = Field(
+        False, description="Also evaluate the growth model and return its raw class probabilities"
+    )
 
 
 class GrowthResponse(BaseModel):
@@ -18,6 +21,28 @@ class GrowthResponse(BaseModel):
     expected_height_range: Tuple[float, float]
     heuristic_override: Optional[str] = None
     plant_height_mm: Optional[float] = None
+    model_probabilities: Optional[Dict[str, float]] = None
+    model_version: Optional[str] = None
+
+
+class GrowthBatchRequest(BaseModel):
+    items: List[GrowthRequest] = Field(..., description="Measurements to score, answered in the same order")
+    current_date: Optional[str] = Field(None, description="Default current date (YYYY-MM-DD) for items without one")
+    include_model_probabilities: bool = Field(
+        False, description="Evaluate the growth model for every item (one batched call)"
+    )
+
+
+class GrowthBatchItem(BaseModel):
+    index: int
+    result: Optional[GrowthResponse] = None
+    error: Optional[str] = None
+
+
+class GrowthBatchResponse(BaseModel):
+    results: List[GrowthBatchItem]
+    succeeded: int
+    failed: int
 
 
 class HealthResponse(BaseModel):
@@ -28,6 +53,21 @@ class HealthResponse(BaseModel):
     timestamp: datetime
 
 
+class ReadinessResponse(BaseModel):
+    ready: bool
+    components: Dict[str, str]
+    warmup_seconds: Optional[float] = None
+
+
+class ModelStatus(BaseModel):
+    loaded: bool
+    version: Optional[str] = None
+    loaded_at: Optional[float] = None
+    sources: List[str] = Field(default_factory=list)
+    reloading: bool = False
+    last_error: Optional[str] = None
+
+
 class FirebasePlant(BaseModel):
     id: str
     planting_date: Optional[str] = None
@@ -45,9 +85,33 @@ class FirebaseWriteRequest(BaseModel):
     updated_at: Optional[str] = None
 
 
+class FirebaseBulkWriteRequest(BaseModel):
+    items: List[FirebaseWriteRequest] = Field(..., description="Plants to write; each replaces the stored plant like PUT /plants/{id}")
+
+
+class FirebaseBulkDeleteRequest(BaseModel):
+    ids: List[str] = Field(..., description="Plant ids to delete")
+
+
+class FirebaseBulkItem(BaseModel):
+    index: int
+    id: str
+    status: str  # "written", "deleted" or "failed"
+    error: Optional[str] = None
+
+
+class FirebaseBulkResponse(BaseModel):
+    results: List[FirebaseBulkItem]
+    succeeded: int
+    failed: int
+    requests: int = Field(..., description="Multi-path PATCH requests sent to Firebase")
+
+
 class DiseasePrediction(BaseModel):
     status: str
     disease: str
     confidence: float
     confidence_percent: float
     class_index: int
+    model_version: Optional[str] = None
+    stage: Optional[str] = None
@@ -1,3 +1,11 @@
-from app.routers import growth, disease, env, health
+"""Routers load on first attribute access (PEP 562); main.py only imports the ENABLED_ROUTERS."""
+import importlib
+from types import ModuleType
 
-__all__ = ["growth", "disease", "env", "health"]
+__all__ = ["admin", "growth", "disease", "env", "health"]
+
+
+def __getattr__(name: str) -> ModuleType:
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,61 @@
+import asyncio
+import secrets
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from app import services
+from app.core import artifacts
+from app.core.config import get_settings
+from app.models.schemas import ModelStatus
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    expected = get_settings().admin_token
+    if not expected:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled. Set ADMIN_TOKEN.")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+def _import_model_services() -> None:
+    """Model slots register when their service is imported, which is lazy; import the mounted ones."""
+    settings = get_settings()
+    for name in ("growth", "disease"):
+        if settings.router_enabled(name):
+            getattr(services, name)
+
+
+def _slot(name: str) -> artifacts.ArtifactSlot:
+    _import_model_services()
+    slot = artifacts.registry.get(name)
+    if slot is None:
+        raise HTTPException(status_code=404, detail=f"Unknown model '{name}'")
+    return slot
+
+
+@router.get("/models", response_model=Dict[str, ModelStatus])
+async def list_models():
+    _import_model_services()
+    return {name: slot.describe() for name, slot in artifacts.registry.items()}
+
+
+@router.post("/models/{name}/reload", status_code=202, response_model=ModelStatus)
+async def reload_model(name: str):
+    """Load, smoke-test and swap in the model files on disk; requests in flight finish on the old version."""
+    slot = _slot(name)
+    if slot.reloading:
+        raise HTTPException(status_code=409, detail=f"Model '{name}' is already reloading")
+    slot.reloading = True  # visible to the next poll before the worker thread picks the job up
+    asyncio.get_running_loop().run_in_executor(None, _reload_quietly, slot)
+    return slot.describe()
+
+
+def _reload_quietly(slot: artifacts.ArtifactSlot) -> None:
+    try:
+        slot.reload()
+    except Exception:
+        pass  # kept in slot.last_error; the previous version keeps serving
@@ -1,32 +1,146 @@
-from fastapi import APIRouter, File, HTTPException, UploadFile
-from fastapi.responses import JSONResponse
+import json
+from contextlib import aclosing
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from fastapi.responses import JSONResponse, StreamingResponse
 from PIL import UnidentifiedImageError
+from starlette.background import BackgroundTask
 
-from app.services import disease
+from app.core.config import get_settings
+from app import services
+from app.services import uploads
+from app.services.executor import Saturated
 
 router = APIRouter(prefix="/disease", tags=["disease"])
 
+# The disease service (torch, torchvision) is reached through `services.disease` so mounting
+# this router does not import it; the startup warm-up or the first request does.
+
+
+def _prediction_payload(result: Dict[str, object]) -> Dict[str, object]:
+    return {
+        "status": result["health"],
+        "disease": result["label"],
+        "confidence": result["confidence"],
+        "confidence_percent": round(result["confidence"] * 100, 2),
+        "class_index": result["index"],
+        "model_version": result["model_version"],
+        "stage": result.get("stage", "large"),
+    }
+
+
+def _saturated(exc: Saturated) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": str(max(1, round(exc.retry_after)))})
+
 
 @router.post("/predict")
-async def predict_leaf(file: UploadFile = File(...)):
+async def predict_leaf(file: UploadFile = File(...), plant_id: Optional[str] = Form(None, max_length=64)):
     try:
         content = await file.read()
-        result = disease.predict(content)
-        confidence_pct = round(result["confidence"] * 100, 2)
-        return JSONResponse(
-            {
-                "prediction": {
-                    "status": result["health"],
-                    "disease": result["label"],
-                    "confidence": result["confidence"],
-                    "confidence_percent": confidence_pct,
-                    "class_index": result["index"],
-                }
-            }
-        )
-    except FileNotFoundError as exc:
+        result = await services.disease.predict_async(content, plant_id=plant_id)
+        return JSONResponse({"prediction": _prediction_payload(result)})
+    except Saturated as exc:
+        raise _saturated(exc) from exc
+    except (FileNotFoundError, ConnectionError) as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    except UnidentifiedImageError as exc:
+        raise HTTPException(status_code=400, detail="Invalid image file") from exc
+    except Exception as exc:  # pragma: no cover
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+@router.post("/predict-batch")
+async def predict_leaf_batch(files: List[UploadFile] = File(...), plant_id: Optional[str] = Form(None, max_length=64)):
+    """
+    Score several images, or one zip/tar archive of images, streaming one JSON line per image.
+
+    Lines arrive as batches finish, not in upload order; each carries the image's "index" and
+    "name" plus either "prediction" or "error". A bad image fails only its own line.
+    """
+    settings = get_settings()
+    executor = services.disease.get_executor()
+    try:
+        await executor.run(services.disease.probe)
+        executor.acquire()
+    except Saturated as exc:
+        raise _saturated(exc) from exc
+    except (FileNotFoundError, ConnectionError) as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    except Exception as exc:  # pragma: no cover
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+    images = uploads.iter_images(
+        [(f.filename or f"upload-{i}", f.file) for i, f in enumerate(files)],
+        max_images=settings.disease_archive_max_images,
+        max_bytes=settings.disease_max_image_bytes,
+    )
+
+    released = False
+
+    def release():
+        nonlocal released
+        if not released:
+            released = True
+            executor.release()
+
+    async def lines():
+        try:
+            async with aclosing(services.disease.predict_stream(images, settings.disease_stream_batch_size, plant_id)) as items:
+                async for item in items:
+                    if "result" in item:
+                        item = {"index": item["index"], "name": item["name"], "prediction": _prediction_payload(item["result"])}
+                    yield json.dumps(item) + "\n"
+        except Exception as exc:  # unreadable archive part-way through; the status line has already gone out
+            yield json.dumps({"error": f"{type(exc).__name__}: {exc}"}) + "\n"
+        finally:
+            release()
+
+    # The background task covers a client that disconnects before the first line is sent.
+    return StreamingResponse(lines(), media_type="application/x-ndjson", background=BackgroundTask(release))
+
+
+@router.post("/similar")
+async def similar_leaves(
+    file: UploadFile = File(...),
+    k: int = Form(10, ge=1, le=100),
+    plant_id: Optional[str] = Form(None, max_length=64),
+):
+    """
+    Past images whose disease-model features are nearest to the upload (cosine similarity).
+
+    The upload is scored and indexed like a prediction if it has not been seen before, and
+    is never returned as its own match.
+    """
+    try:
+        content = await file.read()
+        found = await services.disease.similar_async(content, k, plant_id=plant_id)
+    except Saturated as exc:
+        raise _saturated(exc) from exc
+    except (FileNotFoundError, ConnectionError) as exc:
         raise HTTPException(status_code=503, detail=str(exc)) from exc
     except UnidentifiedImageError as exc:
         raise HTTPException(status_code=400, detail="Invalid image file") from exc
     except Exception as exc:  # pragma: no cover
         raise HTTPException(status_code=500, detail=str(exc)) from exc
+    return JSONResponse(
+        {
+            "digest": found["digest"],
+            "prediction": _prediction_payload(found["query"]),
+            "matches": [
+                {
+                    "digest": match["digest"],
+                    "plant_id": match["plant_id"],
+                    "status": match["health"],
+                    "disease": match["label"],
+                    "confidence": match["confidence"],
+                    "similarity": match["similarity"],
+                    "stored_at": match["stored_at"],
+                }
+                for match in found["matches"]
+            ],
+            "indexed": found["indexed"],
+            "scanned": found["scanned"],
+            "search_ms": found["search_ms"],
+        }
+    )
@@ -1,20 +1,106 @@
+import base64
+import binascii
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Response
 
-from app.models.schemas import FirebasePlant, FirebaseWriteRequest
+from app.core.config import get_settings
+from app.models.schemas import (
+    FirebaseBulkDeleteRequest,
+    FirebaseBulkResponse,
+    FirebaseBulkWriteRequest,
+    FirebasePlant,
+    FirebaseWriteRequest,
+)
 from app.services import env as env_service
 
 router = APIRouter(prefix="/env", tags=["environment"])
 
 
-@router.get("/plants", response_model=List[FirebasePlant])
-async def list_plants():
+def _encode_cursor(plant_id: str) -> str:
+    # Plant ids may be any unicode; HTTP headers are latin-1, so the cursor travels as base64url.
+    return base64.urlsafe_b64encode(plant_id.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> str:
     try:
-        return await env_service.list_plants()
+        return base64.b64decode(cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True).decode("utf-8")
+    except (binascii.Error, UnicodeDecodeError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+
+@router.get("/plants", response_model=List[FirebasePlant], response_model_exclude_unset=True)
+async def list_plants(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size; the next page's cursor is in X-Next-Cursor"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    cultivar: Optional[str] = None,
+    updated_from: Optional[str] = Query(None, description="Earliest updated_at (ISO 8601), inclusive"),
+    updated_to: Optional[str] = Query(None, description="Latest updated_at (ISO 8601), inclusive"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return besides id, e.g. height_mm,updated_at"),
+):
+    after = _decode_cursor(cursor) if cursor is not None else None
+    try:
+        plants, next_cursor = await env_service.query_plants(
+            limit=limit,
+            cursor=after,
+            cultivar=cultivar,
+            updated_from=updated_from,
+            updated_to=updated_to,
+            fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception as exc:  # pragma: no cover
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = _encode_cursor(next_cursor)
+    return plants
+
+
+def _bulk_response(ids: List[str], errors: List[Optional[str]], requests: int, done: str) -> dict:
+    results = [
+        {"index": i, "id": plant_id, "status": done if error is None else "failed", "error": error}
+        for i, (plant_id, error) in enumerate(zip(ids, errors))
+    ]
+    failed = sum(1 for error in errors if error is not None)
+    return {"results": results, "succeeded": len(results) - failed, "failed": failed, "requests": requests}
+
+
+def _check_bulk_size(count: int) -> None:
+    max_items = get_settings().firebase_bulk_max_items
+    if count > max_items:
+        raise HTTPException(status_code=413, detail=f"Bulk request too large: {count} plants (max {max_items})")
+
+
+@router.put("/plants:bulk", response_model=FirebaseBulkResponse)
+async def upsert_plants(payload: FirebaseBulkWriteRequest):
+    _check_bulk_size(len(payload.items))
+    now = datetime.utcnow().isoformat()
+    items = [item.dict() for item in payload.items]
+    for data in items:
+        if not data.get("updated_at"):
+            data["updated_at"] = now
+    try:
+        errors, requests = await env_service.write_plants(items)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception as exc:  # pragma: no cover
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    return _bulk_response([data["id"] for data in items], errors, requests, "written")
+
+
+@router.post("/plants:bulk-delete", response_model=FirebaseBulkResponse)
+async def delete_plants(payload: FirebaseBulkDeleteRequest):
+    _check_bulk_size(len(payload.ids))
+    try:
+        errors, requests = await env_service.delete_plants(payload.ids)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception as exc:  # pragma: no cover
         raise HTTPException(status_code=500, detail=str(exc)) from exc
+    return _bulk_response(payload.ids, errors, requests, "deleted")
 
 
 @router.put("/plants/{plant_id}", response_model=FirebasePlant)
@@ -2,7 +2,8 @@ from datetime import datetime
 
 from fastapi import APIRouter, HTTPException
 
-from app.models.schemas import GrowthRequest, GrowthResponse
+from app.core.config import get_settings
+from app.models.schemas import GrowthBatchRequest, GrowthBatchResponse, GrowthRequest, GrowthResponse
 from app.services import growth
 
 router = APIRouter(prefix="/growth", tags=["growth"])
@@ -17,9 +18,38 @@ def analyze_growth(payload: GrowthRequest):
             current_date=current_date,
             height_mm=payload.current_height_mm,
             age_days_override=payload.age_days,
+            include_model=payload.include_model_probabilities,
         )
         return result
-    except FileNotFoundError as exc:
+    except (FileNotFoundError, ConnectionError) as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    except Exception as exc:  # pragma: no cover - runtime safety
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+@router.post("/analyze-batch", response_model=GrowthBatchResponse)
+def analyze_growth_batch(payload: GrowthBatchRequest):
+    max_items = get_settings().growth_batch_max_items
+    if len(payload.items) > max_items:
+        raise HTTPException(status_code=413, detail=f"Batch too large: {len(payload.items)} items (max {max_items})")
+    try:
+        default_current_date = payload.current_date or datetime.today().strftime("%Y-%m-%d")
+        results = growth.classify_growth_batch(
+            [
+                {
+                    "planting_date": item.planting_date,
+                    "current_date": item.current_date,
+                    "height_mm": item.current_height_mm,
+                    "age_days_override": item.age_days,
+                    "include_model": item.include_model_probabilities or payload.include_model_probabilities,
+                }
+                for item in payload.items
+            ],
+            default_current_date=default_current_date,
+        )
+        failed = sum(1 for r in results if "error" in r)
+        return {"results": results, "succeeded": len(results) - failed, "failed": failed}
+    except (FileNotFoundError, ConnectionError) as exc:
         raise HTTPException(status_code=503, detail=str(exc)) from exc
     except Exception as exc:  # pragma: no cover - runtime safety
         raise HTTPException(status_code=500, detail=str(exc)) from exc
@@ -1,41 +1,74 @@
+import asyncio
 from datetime import datetime
 
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 
-from app.models.schemas import HealthResponse
-from app.services import disease, env, growth
+from app import services
+from app.core import metrics, warmup
+from app.core.config import get_settings
+from app.models.schemas import HealthResponse, ReadinessResponse
 
 router = APIRouter(tags=["health"])
 
 
 @router.get("/health", response_model=HealthResponse)
 async def healthcheck():
+    # Only subsystems this worker serves are probed, so a growth-only worker never imports torch.
+    settings = get_settings()
     growth_ok = False
     disease_ok = False
     firebase_ok = False
 
-    try:
-        growth.load_model()
-        growth_ok = True
-    except Exception:
-        growth_ok = False
+    # The first probe imports the service and may load its model, and in socket mode it waits on
+    # the inference server; all of that runs off the event loop.
+    if settings.router_enabled("growth"):
+        try:
+            await asyncio.to_thread(lambda: services.growth.probe())
+            growth_ok = True
+        except Exception:
+            growth_ok = False
 
-    try:
-        disease.get_model()
-        disease_ok = True
-    except Exception:
-        disease_ok = False
+    if settings.router_enabled("disease"):
+        try:
+            await asyncio.to_thread(lambda: services.disease.probe())
+            disease_ok = True
+        except Exception:
+            disease_ok = False
 
-    try:
-        plants = await env.list_plants()
-        firebase_ok = plants is not None
-    except Exception:
-        firebase_ok = False
+    if settings.router_enabled("env"):
+        try:
+            plants = await services.env.list_plants()
+            firebase_ok = plants is not None
+        except Exception:
+            firebase_ok = False
 
+    serves_models = settings.router_enabled("growth") or settings.router_enabled("disease")
     return HealthResponse(
-        status="ok" if (growth_ok or disease_ok) else "degraded",
+        status="ok" if (growth_ok or disease_ok or not serves_models) else "degraded",
         model_loaded=growth_ok,
         disease_model_loaded=disease_ok,
         firebase_connected=firebase_ok,
         timestamp=datetime.utcnow(),
     )
+
+
+@router.get("/live")
+async def liveness():
+    return {"status": "alive"}
+
+
+@router.get("/ready", response_model=ReadinessResponse)
+async def readiness():
+    state = warmup.state
+    body = ReadinessResponse(
+        ready=state.ready,
+        components=dict(state.components),
+        warmup_seconds=state.duration,
+    )
+    return JSONResponse(body.model_dump(), status_code=200 if state.ready else 503)
+
+
+@router.get("/metrics")
+async def metrics_snapshot():
+    return metrics.snapshot()
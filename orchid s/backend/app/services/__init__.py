@@ -1,3 +1,22 @@
-from app.services import growth, disease, env
+"""
+Service modules load on first attribute access (PEP 562), so a worker only imports the heavy
+dependencies (torch/torchvision for disease, joblib/scikit-learn/pandas for growth) of the
+subsystems it actually serves.
+"""
+import importlib
+import sys
+from types import ModuleType
+from typing import Optional
 
 __all__ = ["growth", "disease", "env"]
+
+
+def __getattr__(name: str) -> ModuleType:
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def loaded(name: str) -> Optional[ModuleType]:
+    """The service module if something has already imported it, without importing it."""
+    return sys.modules.get(f"{__name__}.{name}")
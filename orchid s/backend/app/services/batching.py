@@ -0,0 +1,89 @@
+import asyncio
+import time
+from typing import Callable, List, Optional, Sequence
+
+from app.core import metrics
+
+_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+_DELAY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent requests into one batched call.
+
+    `submit()` queues an item and waits; a collector task gathers items until `max_batch_size`
+    are waiting or `max_wait_ms` has passed since the first one, runs `run_batch(items)` once
+    (off the event loop) and hands each caller its own result or exception. At most
+    `max_concurrent_batches` run at once; items arriving meanwhile form the next batch.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run_batch: Callable[[Sequence[object]], List[object]],
+        max_batch_size: int,
+        max_wait_ms: float,
+        run_in_executor: Optional[Callable] = None,
+        max_concurrent_batches: int = 1,
+    ):
+        self.name = name
+        self._run_batch = run_batch
+        self._run_in_executor = run_in_executor or asyncio.to_thread
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.max_concurrent_batches = max(1, max_concurrent_batches)
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._loop = None
+        self.batch_sizes = metrics.histogram(f"{name}.batch_size", _SIZE_BUCKETS)
+        self.queue_delay_ms = metrics.histogram(f"{name}.queue_delay_ms", _DELAY_BUCKETS_MS)
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._collector is None or self._collector.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+            self._collector = loop.create_task(self._collect())
+
+    async def submit(self, item):
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> None:
+        while True:
+            await self._slots.acquire()
+            pending = [await self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(pending) < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            task = asyncio.get_running_loop().create_task(self._dispatch(pending))
+            task.add_done_callback(lambda _: self._slots.release())
+
+    async def _dispatch(self, pending) -> None:
+        started = time.perf_counter()
+        self.batch_sizes.observe(len(pending))
+        for _, _, queued_at in pending:
+            self.queue_delay_ms.observe((started - queued_at) * 1000)
+
+        items = [item for item, _, _ in pending]
+        try:
+            results = await self._run_in_executor(self._run_batch, items)
+        except Exception as exc:  # one failed forward pass fails every request in that batch
+            for _, future, _ in pending:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future, _), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
@@ -1,13 +1,22 @@
-from functools import lru_cache
-from io import BytesIO
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Optional, Union
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
+import numpy as np
 import torch
-from PIL import Image
+from PIL import Image, UnidentifiedImageError
 from torchvision import models, transforms
 
+from app.core import artifacts, metrics
 from app.core.config import BASE_DIR, ROOT_DIR, get_settings
+from app.services import disease_backends, inference_client, leaf_image
+from app.services.batching import MicroBatcher
+from app.services.embedding_index import EmbeddingIndex, Entry
+from app.services.executor import BoundedExecutor
+from app.services.result_cache import ResultCache, content_hash
+from app.services.tensor_store import TensorStore
 
 
 PLANT_VILLAGE_LABELS = [
@@ -57,15 +66,32 @@ def _first_existing(paths):
     return next((p for p in paths if p and Path(p).exists()), None)
 
 
-def _build_model(num_classes: int):
-    model = models.mobilenet_v3_large(weights=None)
+def _build_model(num_classes: int, arch: str = "large"):
+    model = (models.mobilenet_v3_small if arch == "small" else models.mobilenet_v3_large)(weights=None)
     in_features = model.classifier[3].in_features
     model.classifier[3] = torch.nn.Linear(in_features, num_classes)
     return model
 
 
-@lru_cache(maxsize=1)
-def get_model():
+def _load_weights(weight_path, device, mmap: bool):
+    """torch.load, memory-mapping the checkpoint when asked so workers share its read-only pages."""
+    if mmap:
+        try:
+            return torch.load(weight_path, map_location=device, mmap=True, weights_only=True)
+        except RuntimeError:
+            pass  # legacy (non-zip) checkpoint format cannot be memory-mapped
+    return torch.load(weight_path, map_location=device)
+
+
+def mmap_compatible(weight_path) -> bool:
+    try:
+        torch.load(weight_path, map_location="cpu", mmap=True, weights_only=True)
+        return True
+    except RuntimeError:
+        return False
+
+
+def _resolve_weight_path():
     settings = get_settings()
     possible_weight_paths = [
         settings.disease_weights_path,
@@ -77,44 +103,596 @@ def get_model():
     weight_path = _first_existing(possible_weight_paths)
     if not weight_path:
         raise FileNotFoundError("PlantVillage weights not found. Set DISEASE_WEIGHTS_PATH.")
+    return weight_path
+
+
+def _calibration_batches(directory: Optional[str], batch_size: int = 16, limit: int = 256) -> Optional[Iterator[torch.Tensor]]:
+    """Preprocessed batches from DISEASE_CALIBRATION_DIR for static int8 quantization."""
+    if not directory or not Path(directory).is_dir():
+        return None
+    paths = sorted(p for p in Path(directory).rglob("*") if p.suffix.lower() in {".jpg", ".jpeg", ".png"})[:limit]
+
+    def batches():
+        tensors = []
+        for path in paths:
+            try:
+                tensors.append(leaf_image.preprocess(path))
+            except (OSError, UnidentifiedImageError):
+                continue
+            if len(tensors) == batch_size:
+                yield torch.stack(tensors)
+                tensors = []
+        if tensors:
+            yield torch.stack(tensors)
 
+    return batches()
+
+
+def _load_classifier(weight_path, arch: str):
+    """MobileNetV3 from `weight_path` as a SplitClassifier whose trunk runs on DISEASE_BACKEND: (model, device, version)."""
+    settings = get_settings()
     device = "cuda" if torch.cuda.is_available() else "cpu"
-    model = _build_model(num_classes=len(PLANT_VILLAGE_LABELS))
-    state = torch.load(weight_path, map_location=device)
+    model = _build_model(num_classes=len(PLANT_VILLAGE_LABELS), arch=arch)
+    state = _load_weights(weight_path, device, mmap=settings.model_mmap)
     state_dict = state.get("model_state_dict", state) if isinstance(state, dict) else state
-    model.load_state_dict(state_dict)
+    # assign=True keeps the (possibly memory-mapped) checkpoint tensors instead of copying into fresh ones.
+    model.load_state_dict(state_dict, assign=settings.model_mmap)
     model.to(device)
     model.eval()
 
-    preprocess = transforms.Compose(
+    version = artifacts.file_version(weight_path)
+    backend = settings.disease_backend
+    trunk, head = disease_backends.split(model)
+    if backend != "eager":
+        trunk = disease_backends.prepare(
+            trunk,
+            backend,
+            device,
+            calibration=_calibration_batches(settings.disease_calibration_dir),
+            onnx_path=Path(settings.disease_onnx_dir or Path(weight_path).parent) / f"{Path(weight_path).name}.{version}.trunk.onnx",
+            threads=settings.disease_torch_threads,
+        )
+        version = f"{version}+{backend}"  # backends are not bit-identical, keep their results apart
+    return disease_backends.SplitClassifier(trunk, head), device, version
+
+
+def _reference_preprocess():
+    return transforms.Compose(
         [
             transforms.Resize((224, 224)),
             transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
+            transforms.Normalize(mean=leaf_image.MEAN, std=leaf_image.STD),
         ]
     )
-    return model, preprocess, device
 
 
-def predict(image: Union[str, Path, Image.Image]) -> Dict[str, object]:
-    model, preprocess, device = get_model()
-    if isinstance(image, (str, Path)):
-        pil_image = Image.open(image)
-    elif isinstance(image, (bytes, bytearray)):
-        pil_image = Image.open(BytesIO(image))
-    else:
-        pil_image = image
-    pil_image = pil_image.convert("RGB")
-    tensor = preprocess(pil_image).unsqueeze(0).to(device)
+def _reference_normalize():
+    return transforms.Compose([transforms.ToTensor(), transforms.Normalize(mean=leaf_image.MEAN, std=leaf_image.STD)])
+
+
+def _load_disease_model():
+    weight_path = _resolve_weight_path()
+    model, device, version = _load_classifier(weight_path, "large")
+    return (model, _reference_preprocess(), device), version, (weight_path,)
+
+
+def _load_cascade_model():
+    weight_path = get_settings().disease_cascade_weights_path
+    if not Path(weight_path).exists():
+        raise FileNotFoundError(f"Cascade first-stage weights not found at {weight_path}. Check DISEASE_CASCADE_WEIGHTS_PATH.")
+    model, device, version = _load_classifier(weight_path, "small")
+    return (model, None, device), version, (weight_path,)
+
+
+def _smoke_test(loaded) -> None:
+    model, _, device = loaded
     with torch.no_grad():
-        outputs = model(tensor)
-        probs = torch.nn.functional.softmax(outputs, dim=1)
-        confidence, index = torch.max(probs, dim=1)
-    label = PLANT_VILLAGE_LABELS[index.item()]
+        outputs = model(torch.zeros(1, 3, 224, 224, device=device))
+    if tuple(outputs.shape) != (1, len(PLANT_VILLAGE_LABELS)):
+        raise ValueError(f"Disease model smoke inference returned shape {tuple(outputs.shape)}")
+
+
+model_slot = artifacts.ArtifactSlot("disease", _load_disease_model, smoke_test=_smoke_test)
+# First stage of the cascade: a small model that answers confident images on its own.
+cascade_slot = (
+    artifacts.ArtifactSlot("disease_cascade", _load_cascade_model, smoke_test=_smoke_test)
+    if get_settings().disease_cascade_weights_path
+    else None
+)
+_cascade_images = metrics.counter("disease.cascade_images")
+_cascade_escalated = metrics.counter("disease.cascade_escalated")
+
+
+def get_model():
+    return model_slot.get().value
+
+
+def probe() -> None:
+    """Raise if predictions cannot be served: loads the model, or asks the inference server whether it has it."""
+    client = inference_client.get_client()
+    if client is not None:
+        inference_client.require_model(client, "disease")
+    else:
+        get_model()
+
+
+def warm_up() -> None:
+    """Load the weights and run one dummy forward pass so the first request is not cold."""
+    client = inference_client.get_client()
+    if client is not None:
+        client.predict_disease(np.zeros((1, 3, 224, 224), dtype=np.float32))
+        return
+    _smoke_test(get_model())
+    if cascade_slot is not None:
+        _smoke_test(cascade_slot.get().value)
+
+
+def load_image(image: Union[str, Path, bytes, Image.Image]) -> Image.Image:
+    return leaf_image.open_image(image).convert("RGB")
+
+
+def preprocess_image(image: Union[str, Path, bytes, Image.Image]) -> torch.Tensor:
+    """Decode and normalize one image into a (3, 224, 224) tensor."""
+    if get_settings().disease_fast_preprocess:
+        return leaf_image.preprocess(image)
+    return _reference_preprocess()(load_image(image))
+
+
+def _resized_pixels(image: Union[str, Path, bytes, Image.Image]) -> np.ndarray:
+    """(224, 224, 3) uint8 pixels: preprocess_image() up to, not including, normalization."""
+    if get_settings().disease_fast_preprocess:
+        return leaf_image.resized_pixels(image)
+    return np.asarray(transforms.Resize((224, 224))(load_image(image)), dtype=np.uint8)
+
+
+def tensors_from_pixels(pixels: np.ndarray) -> torch.Tensor:
+    """(N, 224, 224, 3) uint8 -> the normalized (N, 3, 224, 224) batch preprocess_image() would give."""
+    if get_settings().disease_fast_preprocess:
+        return leaf_image.batch_to_tensor(pixels)
+    normalize = _reference_normalize()
+    return torch.stack([normalize(np.asarray(p)) for p in pixels])
+
+
+def _describe(index: int, confidence: float, version: str, stage: str = "large") -> Dict[str, object]:
+    label = PLANT_VILLAGE_LABELS[index]
     health = "Healthy" if ("healthy" in label.lower() or "background" in label.lower()) else "Diseased"
     return {
         "label": label,
         "health": health,
-        "confidence": confidence.item(),
-        "index": int(index.item()),
+        "confidence": confidence,
+        "index": index,
+        "model_version": version,
+        "stage": stage,
+    }
+
+
+def _classify(model, batch: torch.Tensor, features: bool = False) -> Tuple[List[float], List[int], Optional[torch.Tensor]]:
+    with torch.no_grad():
+        if features:
+            feats, logits = model.with_features(batch)
+        else:
+            feats, logits = None, model(batch)
+        probs = torch.nn.functional.softmax(logits, dim=1)
+        confidence, index = torch.max(probs, dim=1)
+    return confidence.tolist(), index.tolist(), feats
+
+
+def infer_tensors(
+    tensors: Union[Sequence[torch.Tensor], torch.Tensor], features: bool = False, cascade: bool = True
+) -> Tuple[List[Dict[str, object]], Optional[np.ndarray]]:
+    """
+    predict_tensors(), plus (with `features`) the large model's penultimate features as an
+    (N, 1280) float32 array. Rows the cascade's small model answered are zero, since those
+    images never reach the large model; cascade=False sends every image through it.
+    """
+    batch = tensors if isinstance(tensors, torch.Tensor) else torch.stack(list(tensors))
+    client = inference_client.get_client()
+    if client is not None:
+        return client.predict_disease(batch.numpy(), features=features, cascade=cascade)
+    served = model_slot.get()  # one snapshot per batch so a hot reload cannot mix versions
+    model, _, device = served.value
+    batch = batch.to(device)
+    if cascade_slot is None or not cascade:
+        confidence, index, feats = _classify(model, batch, features)
+        results = [_describe(i, c, served.version) for c, i in zip(confidence, index)]
+        return results, None if feats is None else feats.float().cpu().numpy()
+
+    first = cascade_slot.get()
+    threshold = get_settings().disease_cascade_threshold
+    results: List[Optional[Dict[str, object]]] = []
+    escalate = []
+    confidence, index, _ = _classify(first.value[0], batch)
+    for row, (c, i) in enumerate(zip(confidence, index)):
+        results.append(_describe(i, c, first.version, stage="small") if c >= threshold else None)
+        if c < threshold:
+            escalate.append(row)
+    out = np.zeros((len(results), model.head.in_features), np.float32) if features else None
+    if escalate:
+        confidence, index, feats = _classify(model, batch[escalate], features)
+        for row, c, i in zip(escalate, confidence, index):
+            results[row] = _describe(i, c, served.version)
+        if features:
+            out[escalate] = feats.float().cpu().numpy()
+    _cascade_images.inc(len(results))
+    _cascade_escalated.inc(len(escalate))
+    return results, out
+
+
+def predict_tensors(tensors: Union[Sequence[torch.Tensor], torch.Tensor]) -> List[Dict[str, object]]:
+    """
+    Classify preprocessed (3, 224, 224) tensors (or one stacked batch); results in input order.
+
+    With a cascade configured, the small model scores the whole batch first and only images
+    below DISEASE_CASCADE_THRESHOLD go through the large model; "stage" says which answered.
+    With INFERENCE_SOCKET set, the batch is handed to the inference server through shared memory.
+    """
+    return infer_tensors(tensors)[0]
+
+
+def _predict_with_features(tensors: Sequence[torch.Tensor]) -> List[Tuple[Dict[str, object], Optional[np.ndarray]]]:
+    """Batcher entry point: each result paired with its features when the similar-case index wants them."""
+    results, features = infer_tensors(tensors, features=bool(get_settings().disease_embedding_dir))
+    if features is None:
+        return [(result, None) for result in results]
+    return [(result, row if result["stage"] == "large" else None) for result, row in zip(results, features)]
+
+
+def predict(image: Union[str, Path, Image.Image]) -> Dict[str, object]:
+    return predict_tensors([preprocess_image(image)])[0]
+
+
+_executor: Optional[BoundedExecutor] = None
+_batcher: Optional[MicroBatcher] = None
+_result_cache: Optional[ResultCache] = None
+_tensor_store: Optional[TensorStore] = None
+_store_errors = metrics.counter("disease.tensor_store_errors")
+_embedding_indexes: Dict[str, EmbeddingIndex] = {}
+_index_errors = metrics.counter("disease.embedding_index_errors")
+
+
+def get_executor() -> BoundedExecutor:
+    """Dedicated pool for image decoding and forward passes, sized by DISEASE_WORKERS."""
+    global _executor
+    if _executor is None:
+        settings = get_settings()
+        if settings.disease_torch_threads > 0:
+            torch.set_num_threads(settings.disease_torch_threads)
+        _executor = BoundedExecutor(
+            "disease",
+            workers=settings.disease_workers,
+            max_pending=settings.disease_max_pending,
+            retry_after=settings.disease_retry_after_s,
+        )
+    return _executor
+
+
+def get_batcher() -> MicroBatcher:
+    global _batcher
+    if _batcher is None:
+        settings = get_settings()
+        executor = get_executor()
+        _batcher = MicroBatcher(
+            "disease",
+            _predict_with_features,
+            max_batch_size=settings.disease_batch_max_size,
+            max_wait_ms=settings.disease_batch_window_ms,
+            run_in_executor=executor.run,
+            max_concurrent_batches=settings.disease_workers,
+        )
+    return _batcher
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Cache of results by upload hash + model version; None when DISEASE_CACHE_ENTRIES is 0."""
+    global _result_cache
+    settings = get_settings()
+    if _result_cache is None and settings.disease_cache_entries > 0:
+        _result_cache = ResultCache(
+            "disease",
+            max_entries=settings.disease_cache_entries,
+            ttl_s=settings.disease_cache_ttl_s,
+            path=settings.disease_cache_path,
+        )
+    return _result_cache
+
+
+def get_tensor_store() -> Optional[TensorStore]:
+    """Store of preprocessed uploads for re-scoring; None unless DISEASE_TENSOR_STORE_DIR is set."""
+    global _tensor_store
+    directory = get_settings().disease_tensor_store_dir
+    if _tensor_store is None and directory:
+        _tensor_store = TensorStore(directory)
+    return _tensor_store
+
+
+def get_embedding_index(version: str) -> Optional[EmbeddingIndex]:
+    """Similar-case index of one large-model version; None unless DISEASE_EMBEDDING_DIR is set."""
+    root = get_settings().disease_embedding_dir
+    if not root:
+        return None
+    index = _embedding_indexes.get(version)
+    if index is None:
+        index = _embedding_indexes[version] = EmbeddingIndex(Path(root) / version)
+    return index
+
+
+def _index_features(entries: Sequence[Tuple[Optional[str], Optional[str], Dict[str, object], Optional[np.ndarray]]]) -> None:
+    """Add (digest, plant_id, result, features) to the index of the result's model version, best effort."""
+    by_version: Dict[str, List[Entry]] = {}
+    for digest, plant_id, result, features in entries:
+        if digest is not None and features is not None:
+            entry = Entry(digest, plant_id, result["index"], result["confidence"], features)
+            by_version.setdefault(result["model_version"], []).append(entry)
+    for version, batch in by_version.items():
+        try:
+            get_embedding_index(version).append_many(batch)
+        except (OSError, ValueError):
+            _index_errors.inc()
+
+
+def _keeps_uploads(image) -> bool:
+    """Whether uploads are archived by hash (tensor store or similar-case index)."""
+    settings = get_settings()
+    return isinstance(image, (bytes, bytearray)) and bool(settings.disease_tensor_store_dir or settings.disease_embedding_dir)
+
+
+def _prepare(image, digest: Optional[str] = None, plant_id: Optional[str] = None) -> torch.Tensor:
+    """preprocess_image(), also keeping the resized pixels of uploaded bytes in the tensor store."""
+    store = get_tensor_store()
+    if store is None or not isinstance(image, (bytes, bytearray)):
+        return preprocess_image(image)
+    pixels = _resized_pixels(image)
+    try:
+        store.append(pixels, digest or content_hash(image), plant_id)
+    except (OSError, ValueError):
+        _store_errors.inc()  # archiving is best effort; the prediction still goes ahead
+    return tensors_from_pixels(pixels[None])[0]
+
+
+def rescore_stored(rows: Optional[np.ndarray] = None, batch_size: int = 256) -> Iterator[Tuple[int, np.void, Dict[str, object]]]:
+    """
+    Re-run the served model over stored images: yields (row, record, result) in row order.
+
+    Pixels are read straight from the memory-mapped store and normalized one batch ahead of
+    the model on a helper thread, so the forward passes keep every torch thread busy. With
+    DISEASE_EMBEDDING_DIR set, the features are indexed under the served model's version.
+    """
+    store = get_tensor_store()
+    if store is None:
+        raise FileNotFoundError("No tensor store configured. Set DISEASE_TENSOR_STORE_DIR.")
+    records = store.records()
+    with ThreadPoolExecutor(max_workers=1) as prefetch:
+        batches = store.iter_batches(rows, batch_size)
+        pending = None
+        for chunk, pixels in batches:
+            upcoming = (chunk, prefetch.submit(tensors_from_pixels, pixels))
+            if pending is not None:
+                yield from _score_chunk(*pending, records)
+            pending = upcoming
+        if pending is not None:
+            yield from _score_chunk(*pending, records)
+
+
+def _score_chunk(chunk: np.ndarray, tensors, records) -> Iterator[Tuple[int, np.void, Dict[str, object]]]:
+    pairs = _predict_with_features(tensors.result())
+    entries = []
+    for row, (result, features) in zip(chunk, pairs):
+        record = records[row]
+        entries.append((record["digest"].tobytes().hex(), record["plant_id"].decode() or None, result, features))
+    _index_features(entries)  # re-scoring with new weights also fills their similar-case index
+    for row, (_, _, result, _) in zip(chunk, entries):
+        yield int(row), records[row], result
+
+
+def _pipeline_version() -> str:
+    """Identity of everything that shapes a result: large model, plus cascade model and threshold."""
+    client = inference_client.get_client()
+    if client is not None:
+        return client.call({"op": "disease_version"})["version"]
+    version = model_slot.get().version
+    if cascade_slot is not None:
+        version += f"|{cascade_slot.get().version}@{get_settings().disease_cascade_threshold}"
+    return version
+
+
+def _cached_result(data) -> Tuple[Optional[str], Optional[Dict[str, object]]]:
+    """(cache key, cached result for the served models) for raw upload bytes."""
+    cache = get_result_cache()
+    if cache is None or not isinstance(data, (bytes, bytearray)):
+        return None, None
+    key = ResultCache.key(content_hash(data), _pipeline_version())
+    return key, cache.get(key)
+
+
+def _cache_results(entries: Sequence[Tuple[Optional[str], Dict[str, object]]]) -> None:
+    cache = get_result_cache()
+    for key, result in entries:
+        if key is not None:
+            cache.put(key, result)
+
+
+def _digest(key: Optional[str]) -> Optional[str]:
+    return key.partition(":")[0] if key else None
+
+
+def _embedding_version() -> str:
+    """Version of the large model, whose features the similar-case index holds."""
+    return _pipeline_version().partition("|")[0]
+
+
+async def predict_async(image: Union[bytes, Image.Image], plant_id: Optional[str] = None) -> Dict[str, object]:
+    """
+    Like predict(), but off the event loop: decoding runs on the disease pool and concurrent
+    callers share one batched forward pass. Raises Saturated when DISEASE_MAX_PENDING
+    requests are already in progress. Repeated uploads are answered from the result cache
+    without being decoded or admitted. With a tensor store or similar-case index configured,
+    the upload's pixels and features are kept under its hash and `plant_id`.
+    """
+    use_cache = get_result_cache() is not None
+    key = None
+    if use_cache:
+        key, cached = await asyncio.to_thread(_cached_result, image)  # hashing MBs of JPEG stays off the loop
+        if cached is not None:
+            return cached
+    digest = _digest(key)
+    if digest is None and _keeps_uploads(image):
+        digest = await asyncio.to_thread(content_hash, image)
+    executor = get_executor()
+    with executor.admit():
+        tensor = await executor.run(_prepare, image, digest, plant_id)
+        result, features = await get_batcher().submit(tensor)
+    if key is not None:
+        await asyncio.to_thread(_cache_results, [(key, result)])
+    if features is not None:
+        await asyncio.to_thread(_index_features, [(digest, plant_id, result, features)])
+    return result
+
+
+async def _preprocess_item(
+    index: int, name: str, data, plant_id: Optional[str]
+) -> Tuple[int, str, Optional[str], Optional[str], object]:
+    """(index, name, cache key, digest, tensor | cached result | exception) for one streamed image."""
+    if isinstance(data, Exception):
+        return index, name, None, None, data
+    key = digest = None
+    try:
+        if get_result_cache() is not None:
+            key, cached = await asyncio.to_thread(_cached_result, data)
+            if cached is not None:
+                return index, name, key, None, cached
+        digest = _digest(key)
+        if digest is None and _keeps_uploads(data):
+            digest = await asyncio.to_thread(content_hash, data)
+        return index, name, key, digest, await get_executor().run(_prepare, data, digest, plant_id)
+    except UnidentifiedImageError:
+        return index, name, key, digest, ValueError("Invalid image file")
+    except Exception as exc:  # reported for this image only
+        return index, name, key, digest, exc
+
+
+async def predict_stream(
+    images: Iterator[Tuple[str, object]], batch_size: int, plant_id: Optional[str] = None
+) -> AsyncIterator[Dict[str, object]]:
+    """
+    Score a stream of (name, bytes) in fixed-size batches, yielding results as batches finish.
+
+    At most two batches of images are read/decoded ahead of the model, so memory stays bounded
+    however many images the stream holds. Each yielded item has "index" and "name" plus either
+    "result" (see predict) or "error". Callers hold an executor admission for the duration
+    and should close the generator when they stop early, so pending decodes are cancelled.
+    """
+    executor = get_executor()
+    window = max(1, batch_size) * 2
+    decoding = set()
+    ready: List[Tuple[int, str, Optional[str], Optional[str], torch.Tensor]] = []
+    index = 0
+    exhausted = False
+    inference: Optional[asyncio.Future] = None
+
+    try:
+        while True:
+            while not exhausted and len(decoding) + len(ready) < window:
+                item = await executor.run(next, images, None)  # archive reads block, keep them off the loop
+                if item is None:
+                    exhausted = True
+                    break
+                decoding.add(asyncio.ensure_future(_preprocess_item(index, *item, plant_id)))
+                index += 1
+
+            if decoding and len(ready) < batch_size:
+                done, decoding = await asyncio.wait(decoding, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    i, name, key, digest, value = task.result()
+                    if isinstance(value, Exception):
+                        yield {"index": i, "name": name, "error": str(value) or type(value).__name__}
+                    elif isinstance(value, dict):
+                        yield {"index": i, "name": name, "result": value}
+                    else:
+                        ready.append((i, name, key, digest, value))
+                if len(ready) < batch_size and not (exhausted and not decoding):
+                    continue
+
+            if not ready:
+                if exhausted and not decoding:
+                    return
+                continue
+            batch, ready = ready[:batch_size], ready[batch_size:]
+            inference = asyncio.ensure_future(executor.run(_predict_with_features, [tensor for *_, tensor in batch]))
+            pairs = await inference
+            results = [result for result, _ in pairs]
+            if get_result_cache() is not None:
+                await asyncio.to_thread(_cache_results, [(key, result) for (_, _, key, _, _), result in zip(batch, results)])
+            if any(features is not None for _, features in pairs):
+                entries = [(digest, plant_id, result, features) for (_, _, _, digest, _), (result, features) in zip(batch, pairs)]
+                await asyncio.to_thread(_index_features, entries)
+            for (i, name, *_), result in zip(batch, results):
+                yield {"index": i, "name": name, "result": result}
+    finally:
+        # A client that disconnects closes or cancels the stream; drop the work scheduled for it.
+        for task in [*decoding, inference]:
+            if task is not None and not task.done():
+                task.cancel()
+
+
+def _match(record: np.void, similarity: float, version: str) -> Dict[str, object]:
+    described = _describe(int(record["class_index"]), float(record["confidence"]), version)
+    return {
+        "digest": record["digest"].tobytes().hex(),
+        "plant_id": record["plant_id"].decode() or None,
+        "label": described["label"],
+        "health": described["health"],
+        "confidence": described["confidence"],
+        "similarity": similarity,
+        "stored_at": float(record["stored_at"]),
+    }
+
+
+async def similar_async(image: bytes, k: int, plant_id: Optional[str] = None) -> Dict[str, object]:
+    """
+    The `k` past images nearest to an upload in the served model's similar-case index.
+
+    An upload that is already indexed is answered from its stored features. Any other is
+    scored by the large model (skipping the cascade: the small model's features live in a
+    different space), indexed like a prediction, and then used as the query.
+    """
+    settings = get_settings()
+    if not settings.disease_embedding_dir:
+        raise FileNotFoundError("Similar-case search is off. Set DISEASE_EMBEDDING_DIR.")
+    executor = get_executor()
+    digest = await asyncio.to_thread(content_hash, image)
+    with executor.admit():
+        version = await executor.run(_embedding_version)
+        index = get_embedding_index(version)
+        row = await asyncio.to_thread(index.row_for, digest)
+        if row is None:
+            tensor = await executor.run(_prepare, image, digest, plant_id)
+            results, features = await executor.run(infer_tensors, [tensor], True, False)
+            query, vector = results[0], features[0]
+            await asyncio.to_thread(_index_features, [(digest, plant_id, query, vector)])
+            version = query["model_version"]  # a reload may have landed in between
+            index = get_embedding_index(version)
+            row = await asyncio.to_thread(index.row_for, digest)
+        else:
+            record = index.records()[row]
+            query = _describe(int(record["class_index"]), float(record["confidence"]), version)
+            vector = index.vector(row)
+        started = time.perf_counter()
+        rows, scores, scanned = await executor.run(index.search, vector, k, settings.disease_similar_nprobe, row)
+        took_ms = (time.perf_counter() - started) * 1000
+    records = index.records()
+    return {
+        "digest": digest,
+        "query": query,
+        "matches": [_match(records[r], float(score), version) for r, score in zip(rows, scores)],
+        "indexed": len(records),
+        "scanned": scanned,
+        "search_ms": round(took_ms, 2),
     }
+
+
+def shutdown() -> None:
+    if _executor is not None:
+        _executor.shutdown()
+    if _result_cache is not None:
+        _result_cache.close()
+    inference_client.shutdown()
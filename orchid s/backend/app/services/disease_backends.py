@@ -0,0 +1,158 @@
+"""
+CPU inference backends for the disease model, chosen with DISEASE_BACKEND.
+
+Every backend takes a float32 eager module and returns a callable mapping a (N, 3, 224, 224)
+float tensor to that module's outputs, so batching, hot reload and the smoke test work the
+same for all of them. The served model is a SplitClassifier: the backend runs the MobileNetV3
+up to its penultimate layer and the final Linear stays in float, which keeps the 1280-d
+features of every forward pass available to the similar-case index. Accuracy against the
+float model is checked with scripts/bench_disease_backends.py.
+"""
+import copy
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Tuple
+
+import torch
+
+BACKENDS = ("eager", "channels_last", "dynamic_int8", "static_int8", "torchscript", "compile", "onnx")
+
+InferenceFn = Callable[[torch.Tensor], torch.Tensor]
+
+
+class _ChannelsLast:
+    def __init__(self, model: torch.nn.Module):
+        self.model = model.to(memory_format=torch.channels_last)
+
+    def __call__(self, batch: torch.Tensor) -> torch.Tensor:
+        return self.model(batch.contiguous(memory_format=torch.channels_last))
+
+
+class _OnnxRuntime:
+    def __init__(self, path: Path, threads: int):
+        try:
+            import onnxruntime
+        except ImportError as exc:
+            raise RuntimeError("DISEASE_BACKEND=onnx needs the onnxruntime package (pip install onnx onnxruntime)") from exc
+        options = onnxruntime.SessionOptions()
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, batch: torch.Tensor) -> torch.Tensor:
+        (outputs,) = self.session.run(None, {self.input_name: batch.detach().cpu().numpy()})
+        return torch.from_numpy(outputs)
+
+
+class SplitClassifier:
+    """Backbone to the penultimate features (as run by a backend) followed by the float final Linear."""
+
+    def __init__(self, trunk: InferenceFn, head: torch.nn.Linear):
+        self.trunk = trunk
+        self.head = head
+
+    def __call__(self, batch: torch.Tensor) -> torch.Tensor:
+        return self.head(self.trunk(batch))
+
+    def with_features(self, batch: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        """(penultimate features, logits) from one forward pass."""
+        features = self.trunk(batch)
+        return features, self.head(features)
+
+
+def split(model: torch.nn.Module) -> Tuple[torch.nn.Module, torch.nn.Linear]:
+    """MobileNetV3 -> (everything up to the penultimate activations, final Linear); shares weights."""
+    trunk = torch.nn.Sequential(model.features, model.avgpool, torch.nn.Flatten(1), *model.classifier[:-1])
+    return trunk.eval(), model.classifier[-1]
+
+
+def _example(batch_size: int = 1) -> torch.Tensor:
+    return torch.zeros(batch_size, 3, 224, 224)
+
+
+def _static_int8(model: torch.nn.Module, calibration: Optional[Iterable[torch.Tensor]]) -> torch.nn.Module:
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    if calibration is None:
+        raise FileNotFoundError("DISEASE_BACKEND=static_int8 needs calibration images. Set DISEASE_CALIBRATION_DIR.")
+    engine = "x86" if "x86" in torch.backends.quantized.supported_engines else "qnnpack"
+    torch.backends.quantized.engine = engine
+    prepared = prepare_fx(copy.deepcopy(model), get_default_qconfig_mapping(engine), (_example(),))
+    seen = 0
+    with torch.no_grad():
+        for batch in calibration:
+            prepared(batch)
+            seen += batch.shape[0]
+    if not seen:
+        raise FileNotFoundError("DISEASE_CALIBRATION_DIR holds no readable images")
+    return convert_fx(prepared)
+
+
+def export_onnx(model: torch.nn.Module, path: Path) -> Path:
+    try:
+        import onnx  # noqa: F401  torch.onnx.export needs it, and fails from deep inside without it
+    except ImportError as exc:
+        raise RuntimeError("DISEASE_BACKEND=onnx needs the onnx package to export the model (pip install onnx onnxruntime)") from exc
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    torch.onnx.export(
+        model,
+        (_example(),),
+        str(tmp),
+        input_names=["images"],
+        output_names=["outputs"],
+        dynamic_axes={"images": {0: "batch"}, "outputs": {0: "batch"}},
+        opset_version=17,
+        dynamo=False,
+    )
+    tmp.replace(path)
+    return path
+
+
+def _onnx_file(model: torch.nn.Module, path: Path) -> Path:
+    """The export at `path`, made on first use; under the temp dir when `path`'s directory is read-only."""
+    fallback = Path(tempfile.gettempdir()) / "orchid-onnx" / path.name
+    for candidate in (path, fallback):
+        if candidate.exists():
+            return candidate
+    if os.access(path.parent, os.W_OK):
+        try:
+            return export_onnx(model, path)
+        except OSError:
+            pass
+    fallback.parent.mkdir(parents=True, exist_ok=True)
+    return export_onnx(model, fallback)
+
+
+def prepare(
+    model: torch.nn.Module,
+    backend: str,
+    device: str,
+    calibration: Optional[Iterable[torch.Tensor]] = None,
+    onnx_path: Optional[Path] = None,
+    threads: int = 0,
+) -> InferenceFn:
+    """Wrap the float eval-mode model for `backend`; int8, TorchScript and ONNX run on CPU only."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown DISEASE_BACKEND {backend!r}; expected one of {', '.join(BACKENDS)}")
+    if backend == "eager":
+        return model
+    if backend == "channels_last":
+        return _ChannelsLast(model)
+    if backend == "compile":
+        return torch.compile(model)
+    if device != "cpu":
+        raise ValueError(f"DISEASE_BACKEND={backend} is a CPU backend")
+    if backend == "dynamic_int8":
+        # Only the classifier's Linear layers have dynamic int8 kernels; convolutions stay float.
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if backend == "static_int8":
+        return _static_int8(model, calibration)
+    if backend == "torchscript":
+        with torch.no_grad():
+            traced = torch.jit.trace(model, _example())
+        return torch.jit.optimize_for_inference(torch.jit.freeze(traced))
+    return _OnnxRuntime(_onnx_file(model, onnx_path), threads)
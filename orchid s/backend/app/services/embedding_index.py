@@ -0,0 +1,260 @@
+"""
+Float16 index of the disease model's penultimate features, for similar-case retrieval.
+
+There is one directory per model version, since features from different weights are not
+comparable. Rows are L2-normalized vectors in `vectors.f16`, so a dot product is the cosine
+similarity (1280-d: 2.5 KiB per image). A parallel `records.bin` holds each image's SHA-256,
+plant id, predicted class, confidence and time. Appends work like tensor_store.py: they are
+serialized with flock and the record is written last.
+
+Search is a chunked float16 scan of the memory-mapped matrix until
+`python -m app.cli build-similar-index` writes `ivf.npz` (k-means centroids and each
+partition's rows). After that a query scores only the `nprobe` partitions closest to it, plus
+any rows appended since the build, which are scanned in full.
+"""
+import fcntl
+import os
+import threading
+import time
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+
+from app.services.tensor_store import PLANT_ID_BYTES
+
+RECORD = np.dtype(
+    [
+        ("digest", "u1", (32,)),
+        ("plant_id", f"S{PLANT_ID_BYTES}"),
+        ("class_index", "<i2"),
+        ("confidence", "<f4"),
+        ("stored_at", "<f8"),
+    ]
+)
+_SCAN_ROWS = 65536
+
+
+class Entry(NamedTuple):
+    digest: str
+    plant_id: Optional[str]
+    class_index: int
+    confidence: float
+    vector: np.ndarray
+
+
+class _Partitions(NamedTuple):
+    centroids: torch.Tensor  # (lists, dim) float32, unit length
+    rows: np.ndarray  # row numbers grouped by partition
+    offsets: np.ndarray  # partition p holds rows[offsets[p]:offsets[p + 1]]
+    count: int  # rows covered; later appends are scanned in full
+    mtime: float
+
+
+def _prefixes(digests: np.ndarray) -> np.ndarray:
+    """First 8 digest bytes of each (N, 32) uint8 row as uint64: the lookup key."""
+    return np.ascontiguousarray(digests[:, :8]).view("<u8").ravel()
+
+
+def _normalized(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class EmbeddingIndex:
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.directory / "vectors.f16"
+        self.records_path = self.directory / "records.bin"
+        self.lock_path = self.directory / "index.lock"
+        self.ivf_path = self.directory / "ivf.npz"
+        self.dim_path = self.directory / "dim"
+        for path in (self.vectors_path, self.records_path):
+            path.touch(exist_ok=True)
+        self._maps: Tuple[int, Optional[np.ndarray], Optional[np.ndarray]] = (0, None, None)
+        # Sorted digest prefixes and their rows, extended incrementally as the index grows.
+        self._sorted = np.empty(0, np.uint64)
+        self._sorted_rows = np.empty(0, np.int64)
+        self._indexed = 0
+        self._partitions: Optional[_Partitions] = None
+        self._dim: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return os.path.getsize(self.records_path) // RECORD.itemsize
+
+    @property
+    def dim(self) -> Optional[int]:
+        """Feature size, fixed by the first append (file sizes alone would be off by a torn tail)."""
+        if self._dim is None and self.dim_path.exists():
+            self._dim = int(self.dim_path.read_text())
+        return self._dim
+
+    def _mapped(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(vectors, records) memmaps covering every committed row; remapped when the index grows."""
+        n = len(self)
+        count, vectors, records = self._maps
+        if vectors is None or count != n:
+            if n:
+                # Copy-on-write: torch accepts the array without a read-only warning and nothing is ever written.
+                vectors = np.memmap(self.vectors_path, dtype=np.float16, mode="c", shape=(n, self.dim))
+                records = np.memmap(self.records_path, dtype=RECORD, mode="r", shape=(n,))
+            else:
+                vectors, records = np.empty((0, 0), np.float16), np.empty(0, RECORD)
+            self._maps = (n, vectors, records)
+        return self._maps[1], self._maps[2]
+
+    def _refresh_lookup(self) -> None:
+        _, records = self._mapped()
+        if self._indexed == len(records):
+            return
+        fresh = _prefixes(records["digest"][self._indexed :])
+        order = np.argsort(fresh, kind="stable")
+        fresh, rows = fresh[order], order.astype(np.int64) + self._indexed
+        at = np.searchsorted(self._sorted, fresh, side="right")
+        self._sorted = np.insert(self._sorted, at, fresh)
+        self._sorted_rows = np.insert(self._sorted_rows, at, rows)
+        self._indexed = len(records)
+
+    def _find(self, digest: bytes) -> Optional[int]:
+        prefix = np.frombuffer(digest[:8], dtype="<u8")[0]
+        lo = np.searchsorted(self._sorted, prefix, side="left")
+        hi = np.searchsorted(self._sorted, prefix, side="right")
+        records = self._mapped()[1]
+        for row in self._sorted_rows[lo:hi]:
+            if records[row]["digest"].tobytes() == digest:
+                return int(row)
+        return None
+
+    def row_for(self, digest: str) -> Optional[int]:
+        with self._lock:
+            self._refresh_lookup()
+            return self._find(bytes.fromhex(digest))
+
+    def append_many(self, entries: Sequence[Entry]) -> int:
+        """Add the entries whose image is not indexed yet; returns how many were added."""
+        if not entries:
+            return 0
+        with self._lock, open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self._refresh_lookup()
+            fresh, seen = [], set()
+            for entry in entries:
+                key = bytes.fromhex(entry.digest)
+                if key not in seen and self._find(key) is None:
+                    seen.add(key)
+                    fresh.append((key, entry))
+            if not fresh:
+                return 0
+            vectors = _normalized(np.stack([entry.vector for _, entry in fresh]))
+            dim = self.dim
+            if dim is None:
+                dim = vectors.shape[1]
+                self.dim_path.write_text(str(dim))
+            elif vectors.shape[1] != dim:
+                raise ValueError(f"Feature size {vectors.shape[1]} does not match the index ({dim})")
+            now = time.time()
+            records = np.array(
+                [
+                    (np.frombuffer(key, np.uint8), (entry.plant_id or "").encode()[:PLANT_ID_BYTES], entry.class_index, entry.confidence, now)
+                    for key, entry in fresh
+                ],
+                dtype=RECORD,
+            )
+            n = len(self)
+            with open(self.vectors_path, "r+b") as fh:
+                fh.truncate(n * dim * 2)  # drop a torn tail from a writer that died mid-append
+                fh.seek(0, os.SEEK_END)
+                fh.write(vectors.astype(np.float16).tobytes())
+            with open(self.records_path, "ab") as fh:
+                fh.write(records.tobytes())
+            return len(fresh)
+
+    def vector(self, row: int) -> np.ndarray:
+        return np.asarray(self._mapped()[0][row], dtype=np.float32)
+
+    def records(self) -> np.ndarray:
+        return self._mapped()[1]
+
+    def _load_partitions(self) -> Optional[_Partitions]:
+        try:
+            mtime = self.ivf_path.stat().st_mtime
+        except FileNotFoundError:
+            self._partitions = None
+            return None
+        if self._partitions is None or self._partitions.mtime != mtime:
+            with np.load(self.ivf_path) as data:
+                self._partitions = _Partitions(
+                    torch.from_numpy(data["centroids"]), data["rows"], data["offsets"], int(data["count"]), mtime
+                )
+        return self._partitions
+
+    def search(self, query: np.ndarray, k: int, nprobe: int = 8, exclude: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, int]:
+        """(rows, cosine similarities, rows scanned) of the `k` nearest rows to `query`, best first."""
+        vectors, _ = self._mapped()
+        n = len(vectors)
+        if not n:
+            return np.empty(0, np.int64), np.empty(0, np.float32), 0
+        q = torch.from_numpy(_normalized(np.asarray(query)[None])[0]).half()
+        partitions = self._load_partitions() if nprobe > 0 else None
+
+        rows: List[np.ndarray] = []
+        scores: List[torch.Tensor] = []
+        scanned = 0
+        if partitions is not None and partitions.count <= n:
+            nearest = torch.topk(partitions.centroids @ q.float(), min(nprobe, len(partitions.centroids))).indices.tolist()
+            candidates = [partitions.rows[partitions.offsets[p] : partitions.offsets[p + 1]] for p in nearest]
+            candidates = np.sort(np.concatenate(candidates))  # ascending rows read the map front to back
+            rows.append(candidates)
+            scores.append(torch.from_numpy(vectors[candidates]) @ q)
+            scanned, start = len(candidates), partitions.count
+        else:
+            start = 0
+        for lo in range(start, n, _SCAN_ROWS):
+            hi = min(lo + _SCAN_ROWS, n)
+            chunk = torch.from_numpy(vectors[lo:hi]) @ q
+            best = torch.topk(chunk, min(k + 1, hi - lo))  # only a chunk's best can make the overall top k
+            rows.append(best.indices.numpy() + lo)
+            scores.append(best.values)
+
+        scanned += n - start
+        rows_all = np.concatenate(rows)
+        scores_all = torch.cat(scores).float()
+        if exclude is not None:
+            scores_all[torch.from_numpy(rows_all == exclude)] = -float("inf")
+        top = torch.topk(scores_all, min(k, len(rows_all)))
+        keep = torch.isfinite(top.values)
+        return rows_all[top.indices[keep].numpy()], top.values[keep].numpy(), scanned
+
+    def build_partitions(self, lists: Optional[int] = None, sample: int = 65536, iterations: int = 10, seed: int = 0) -> _Partitions:
+        """Spherical k-means over (a sample of) the rows, then write every row's partition to ivf.npz."""
+        vectors, _ = self._mapped()
+        n = len(vectors)
+        if not n:
+            raise ValueError("The index is empty")
+        lists = max(1, min(lists or int(np.sqrt(n)), n))
+        rng = np.random.default_rng(seed)
+        training = torch.from_numpy(vectors[np.sort(rng.choice(n, min(n, max(sample, lists)), replace=False))]).float()
+        centroids = training[torch.from_numpy(rng.choice(len(training), lists, replace=False))].clone()
+        for _ in range(iterations):
+            assignment = (training @ centroids.T).argmax(dim=1)
+            sums = torch.zeros_like(centroids).index_add_(0, assignment, training)
+            counts = torch.bincount(assignment, minlength=lists)
+            empty = counts == 0
+            if empty.any():  # reseed empty partitions with random training rows
+                sums[empty] = training[torch.from_numpy(rng.choice(len(training), int(empty.sum())))]
+            centroids = torch.nn.functional.normalize(sums, dim=1)
+
+        assignment = np.empty(n, np.int64)
+        for lo in range(0, n, _SCAN_ROWS):
+            chunk = torch.from_numpy(vectors[lo : lo + _SCAN_ROWS]).float()
+            assignment[lo : lo + len(chunk)] = (chunk @ centroids.T).argmax(dim=1).numpy()
+        rows = np.argsort(assignment, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=lists))])
+        tmp = self.ivf_path.with_name("ivf.tmp.npz")
+        np.savez(tmp, centroids=centroids.numpy(), rows=rows, offsets=offsets, count=n)
+        tmp.replace(self.ivf_path)
+        return self._load_partitions()
@@ -1,58 +1,479 @@
-from typing import Dict, List, Optional
+import asyncio
+import bisect
+import json
+import logging
+import time
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
 
 import httpx
 
+from app.core import metrics
 from app.core.config import get_settings
 from app.models.schemas import FirebasePlant
 
+logger = logging.getLogger(__name__)
+
+# Stored child names of each plant field, in precedence order: the first truthy one is used.
+_ALIASES = {
+    "planting_date": ("planting_date", "plantingDate"),
+    "height_mm": ("height_mm", "height", "current_height"),
+    "updated_at": ("updated_at", "timestamp", "recorded_at"),
+    "cultivar": ("cultivar", "variety"),
+}
+_KNOWN_FIELDS = frozenset(name for names in _ALIASES.values() for name in names)
+
+_cache_hits = metrics.counter("env.plants_cache_hits")
+_cache_revalidated = metrics.counter("env.plants_cache_revalidated")
+_cache_misses = metrics.counter("env.plants_cache_misses")
+_mirror_reads = metrics.counter("env.plants_mirror_reads")
+metrics.ratio("env.plants_cache_hit_ratio", hits=(_cache_hits, _cache_revalidated, _mirror_reads), misses=(_cache_misses,))
+_mirror_events = metrics.counter("env.mirror_events")
+_mirror_resyncs = metrics.counter("env.mirror_resyncs")
+_mirror_reconnects = metrics.counter("env.mirror_reconnects")
+_bulk_patches = metrics.counter("env.bulk_patch_requests")
+_query_fallbacks = metrics.counter("env.plants_query_fallbacks")
+
+PLANT_FIELDS = tuple(FirebasePlant.model_fields)
+
 
 def _get_db_url() -> Optional[str]:
     settings = get_settings()
     return settings.firebase_db_url.rstrip("/") if settings.firebase_db_url else None
 
 
-def _client():
-    return httpx.AsyncClient(timeout=10)
+class _PlantsCache:
+    """The parsed plants tree and the ETag Firebase sent with it."""
+
+    def __init__(self):
+        self.plants: Optional[Dict[str, FirebasePlant]] = None
+        self.etag: Optional[str] = None
+        self.checked_at = 0.0  # monotonic time of the last download or revalidation
+        self.lock = asyncio.Lock()
+
+    def fresh(self, ttl: float) -> bool:
+        return self.plants is not None and time.monotonic() - self.checked_at < ttl
+
+
+class _Mirror:
+    """The plants tree as the streaming API last described it, kept by a background task."""
+
+    def __init__(self):
+        self.raw: Dict[str, object] = {}
+        self.plants: Dict[str, FirebasePlant] = {}
+        self.synced = False  # a full snapshot arrived on the current connection
+        self.last_event: Optional[float] = None  # monotonic time of the last event, keep-alives included
+        self.task: Optional[asyncio.Task] = None
+        self._order: Optional[Tuple[list, List[str]]] = None  # ($key order, ids), until a plant is added or removed
+
+    def age(self) -> Optional[float]:
+        """Seconds since Firebase last said anything on the stream; None before the first event."""
+        return None if self.last_event is None else time.monotonic() - self.last_event
+
+    def live(self, stale_after: float) -> bool:
+        return self.synced and self.age() < stale_after
+
+    def apply(self, event: str, path: str, data) -> None:
+        parts = [p for p in path.split("/") if p]
+        if event == "put" and not parts:
+            self.raw = data if isinstance(data, dict) else {}
+            self.plants = {key: _parse_plant(key, value) for key, value in self.raw.items() if isinstance(value, dict)}
+            self._order = None
+            self.synced = True
+            _mirror_resyncs.inc()
+            return
+        if event == "put":
+            updates = [(parts, data)]
+        else:  # patch: each key of data is a path under `path`
+            updates = [(parts + [p for p in key.split("/") if p], value) for key, value in (data or {}).items()]
+        touched = set()
+        for target, value in updates:
+            if target:
+                _set_path(self.raw, target, value)
+                touched.add(target[0])
+        for plant_id in touched:
+            node = self.raw.get(plant_id)
+            if isinstance(node, dict):
+                if plant_id not in self.plants:
+                    self._order = None
+                self.plants[plant_id] = _parse_plant(plant_id, node)
+            elif self.plants.pop(plant_id, None) is not None:
+                self._order = None
+
+    def page(
+        self, limit: Optional[int], cursor: Optional[str], cultivar: Optional[str], updated_from: Optional[str], updated_to: Optional[str]
+    ) -> Tuple[List[FirebasePlant], Optional[str]]:
+        """Like _page over the filtered tree, but walks the kept id order from the cursor on."""
+        if self._order is None:
+            ids = sorted(self.plants, key=_key_order)
+            self._order = ([_key_order(plant_id) for plant_id in ids], ids)
+        order, ids = self._order
+        start = bisect.bisect_right(order, _key_order(cursor)) if cursor is not None else 0
+        page = []
+        for i in range(start, len(ids)):
+            plant = self.plants[ids[i]]
+            if _matches(plant, cultivar, updated_from, updated_to):
+                page.append(plant)
+                if limit is not None and len(page) > limit:
+                    return page[:limit], page[limit - 1].id
+        return page, None
+
+
+_http: Optional[httpx.AsyncClient] = None
+_plants = _PlantsCache()
+_mirror = _Mirror()
+metrics.reading("env.mirror_age_s", lambda: _mirror.age())
+metrics.reading("env.mirror_live", lambda: int(_mirror.live(get_settings().firebase_stream_stale_s)))
+
+
+def open_client() -> httpx.AsyncClient:
+    """
+    The application-wide Firebase client: pooled keep-alive connections (optionally HTTP/2),
+    so requests after the first skip DNS, TCP and TLS setup. Opened by the app lifespan.
+    """
+    global _http, _plants
+    if _http is None:
+        settings = get_settings()
+        if settings.firebase_http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError as exc:
+                raise RuntimeError("FIREBASE_HTTP2=true needs the h2 package (pip install 'httpx[http2]')") from exc
+        _http = httpx.AsyncClient(
+            http2=settings.firebase_http2,
+            limits=httpx.Limits(
+                max_connections=settings.firebase_max_connections,
+                max_keepalive_connections=settings.firebase_max_keepalive,
+                keepalive_expiry=settings.firebase_keepalive_expiry_s,
+            ),
+            timeout=httpx.Timeout(
+                connect=settings.firebase_connect_timeout_s,
+                read=settings.firebase_read_timeout_s,
+                write=settings.firebase_read_timeout_s,
+                pool=settings.firebase_connect_timeout_s,
+            ),
+        )
+        _plants = _PlantsCache()  # lives as long as the client, on the same event loop
+    return _http
+
+
+async def close_client() -> None:
+    global _http
+    await stop_mirror()
+    if _http is not None:
+        client, _http = _http, None
+        await client.aclose()
+
+
+def _client() -> httpx.AsyncClient:
+    return _http if _http is not None else open_client()
+
+
+def _set_path(tree: Dict[str, object], parts: List[str], value) -> None:
+    """Set (None: delete) the node at `parts`; like Firebase, emptied parents disappear."""
+    if value is None:
+        parents, node = [], tree
+        for part in parts[:-1]:
+            if not isinstance(node.get(part), dict):
+                return
+            parents.append((node, part))
+            node = node[part]
+        node.pop(parts[-1], None)
+        for parent, part in reversed(parents):
+            if parent[part]:
+                break
+            del parent[part]
+        return
+    node = tree
+    for part in parts[:-1]:
+        if not isinstance(node.get(part), dict):
+            node[part] = {}
+        node = node[part]
+    node[parts[-1]] = value
+
+
+async def _events(resp: httpx.Response) -> AsyncIterator[Tuple[str, str]]:
+    """(event, data) pairs of a text/event-stream response."""
+    event, data = None, []
+    async for line in resp.aiter_lines():
+        if not line:
+            if event is not None:
+                yield event, "\n".join(data)
+            event, data = None, []
+        elif line.startswith("event:"):
+            event = line[len("event:") :].strip()
+        elif line.startswith("data:"):
+            value = line[len("data:") :]
+            data.append(value[1:] if value.startswith(" ") else value)
+
+
+async def _follow(db_url: str) -> None:
+    """
+    Keep `_mirror` in step with /plants through the REST streaming API.
+
+    Every connection starts with a `put` of the whole tree at "/", so reconnecting is also the
+    resync. Firebase sends a keep-alive event every 30 s or so; a stream silent for
+    FIREBASE_STREAM_STALE_S hits the read timeout and is reopened. Any error ends only the
+    current connection; retries back off to 30 s.
+    """
+    settings = get_settings()
+    timeout = httpx.Timeout(settings.firebase_connect_timeout_s, read=settings.firebase_stream_stale_s)
+    delay = 0.5
+    while True:
+        try:
+            async with _client().stream(
+                "GET", f"{db_url}/plants.json", headers={"Accept": "text/event-stream"}, timeout=timeout, follow_redirects=True
+            ) as resp:
+                resp.raise_for_status()
+                async for event, data in _events(resp):
+                    _mirror.last_event = time.monotonic()
+                    _mirror_events.inc()
+                    if event in ("put", "patch"):
+                        message = json.loads(data)
+                        _mirror.apply(event, message["path"], message["data"])
+                        delay = 0.5
+                    elif event in ("cancel", "auth_revoked"):
+                        break
+        except (httpx.HTTPError, ValueError, KeyError, TypeError):
+            pass
+        except Exception:  # anything else must not end the mirror; CancelledError still stops it
+            logger.exception("plants mirror stream failed; reconnecting in %.1f s", delay)
+        _mirror.synced = False  # reads fall back to REST until the next snapshot
+        _mirror_reconnects.inc()
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 30.0)
+
+
+def start_mirror() -> Optional[asyncio.Task]:
+    """
+    Start following /plants in the background (FIREBASE_STREAM=true; the app lifespan calls
+    this). While the mirror is synced and not stale, list_plants and query_plants read it.
+    """
+    global _mirror
+    db_url = _get_db_url()
+    if not db_url:
+        return None
+    if _mirror.task is None or _mirror.task.done():
+        _client()
+        _mirror = _Mirror()
+        _mirror.task = asyncio.create_task(_follow(db_url))
+    return _mirror.task
+
+
+async def stop_mirror() -> None:
+    task, _mirror.task = _mirror.task, None
+    _mirror.synced = False
+    if task is not None and not task.done():
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+def _mirrored() -> Optional[List[FirebasePlant]]:
+    if not _mirror.live(get_settings().firebase_stream_stale_s):
+        return None
+    _mirror_reads.inc()
+    return list(_mirror.plants.values())
+
+
+def _parse_plant(key: str, data: Optional[Dict[str, object]]) -> FirebasePlant:
+    base = data or {}
+    fields = {field: next((base[n] for n in names if base.get(n)), None) for field, names in _ALIASES.items()}
+    return FirebasePlant(id=key, **fields, extra={k: v for k, v in base.items() if k not in _KNOWN_FIELDS})
 
 
 async def list_plants() -> List[FirebasePlant]:
+    """
+    All plants: from the streaming mirror while it is live, otherwise from memory for
+    FIREBASE_PLANTS_TTL_S after each check against Firebase.
+
+    A stale cache is revalidated with the tree's ETag (If-None-Match). When Firebase answers
+    304, or 200 with the same ETag, the tree is not parsed again. Concurrent callers share
+    one revalidation.
+    """
     db_url = _get_db_url()
     if not db_url:
         return []
-    async with _client() as client:
-        resp = await client.get(f"{db_url}/plants.json")
-        resp.raise_for_status()
-        raw = resp.json() or {}
-    plants: List[FirebasePlant] = []
-    for key, data in raw.items():
-        base = data or {}
-        plants.append(
-            FirebasePlant(
-                id=key,
-                planting_date=base.get("planting_date") or base.get("plantingDate"),
-                height_mm=base.get("height_mm") or base.get("height") or base.get("current_height"),
-                updated_at=base.get("updated_at") or base.get("timestamp") or base.get("recorded_at"),
-                cultivar=base.get("cultivar") or base.get("variety"),
-                extra={k: v for k, v in base.items() if k not in {"planting_date", "plantingDate", "height_mm", "height", "current_height", "updated_at", "timestamp", "recorded_at", "cultivar", "variety"}},
-            )
+    mirrored = _mirrored()
+    if mirrored is not None:
+        return mirrored
+    client = _client()
+    cache, ttl = _plants, get_settings().firebase_plants_ttl_s
+    if cache.fresh(ttl):
+        _cache_hits.inc()
+        return list(cache.plants.values())
+    async with cache.lock:
+        if cache.fresh(ttl):  # another caller revalidated while this one waited
+            _cache_hits.inc()
+            return list(cache.plants.values())
+        headers = {"X-Firebase-ETag": "true"}
+        if cache.plants is not None and cache.etag:
+            headers["If-None-Match"] = cache.etag
+        resp = await client.get(f"{db_url}/plants.json", headers=headers)
+        unchanged = resp.status_code == 304 or (
+            cache.plants is not None and cache.etag is not None and resp.headers.get("ETag") == cache.etag
         )
-    return plants
+        if unchanged:
+            _cache_revalidated.inc()
+        else:
+            resp.raise_for_status()
+            raw = resp.json() or {}
+            cache.plants = {key: _parse_plant(key, data) for key, data in raw.items()}
+            cache.etag = resp.headers.get("ETag")
+            _cache_misses.inc()
+        cache.checked_at = time.monotonic()
+        return list(cache.plants.values())
 
 
-async def write_plant(data: Dict[str, object]) -> FirebasePlant:
-    db_url = _get_db_url()
-    if not db_url:
-        raise ValueError("FIREBASE_DB_URL not configured")
-    plant_id = data["id"]
-    payload = {
+def _matches(plant: FirebasePlant, cultivar: Optional[str], updated_from: Optional[str], updated_to: Optional[str]) -> bool:
+    if cultivar is not None and plant.cultivar != cultivar:
+        return False
+    if updated_from is not None and (plant.updated_at is None or plant.updated_at < updated_from):
+        return False
+    if updated_to is not None and (plant.updated_at is None or plant.updated_at > updated_to):
+        return False
+    return True
+
+
+def _key_order(key: str) -> Tuple[int, int, str]:
+    """Firebase's `$key` order: keys that parse as 32-bit integers first, numerically, then the rest as strings."""
+    try:
+        number = int(key)
+    except ValueError:
+        return (1, 0, key)
+    if str(number) == key and -(2**31) <= number < 2**31:
+        return (0, number, "")
+    return (1, 0, key)
+
+
+def _page(plants: List[FirebasePlant], limit: Optional[int], cursor: Optional[str]) -> Tuple[List[FirebasePlant], Optional[str]]:
+    """Key-ordered page after `cursor`, and the cursor of the next page (None on the last one)."""
+    after = _key_order(cursor) if cursor is not None else None
+    plants = sorted((p for p in plants if after is None or _key_order(p.id) > after), key=lambda p: _key_order(p.id))
+    if limit is None or len(plants) <= limit:
+        return plants, None
+    return plants[:limit], plants[limit - 1].id
+
+
+def _project(plants: List[FirebasePlant], fields: Optional[Sequence[str]]) -> List[FirebasePlant]:
+    if not fields:
+        return plants
+    keep = {"id", *fields}
+    return [FirebasePlant(**{f: getattr(p, f) for f in PLANT_FIELDS if f in keep}) for p in plants]
+
+
+def _params(**query) -> Dict[str, str]:
+    """Firebase REST query parameters are JSON values (strings quoted)."""
+    return {name: json.dumps(value) for name, value in query.items() if value is not None}
+
+
+async def _fetch_plants(params: Dict[str, str]) -> Optional[List[FirebasePlant]]:
+    """One filtered read of /plants; None when Firebase has no index for the filter."""
+    resp = await _client().get(f"{_get_db_url()}/plants.json", params=params)
+    if resp.status_code == 400 and "Index not defined" in resp.text:
+        return None
+    resp.raise_for_status()
+    return [_parse_plant(key, data) for key, data in (resp.json() or {}).items()]
+
+
+async def _fetch_by_field(field: str, **query) -> Optional[List[FirebasePlant]]:
+    """
+    Plants whose `field` may match: one query per stored name of the field (see _ALIASES), so
+    legacy records are found too. None when any of those names has no index.
+    """
+    found = await asyncio.gather(*(_fetch_plants(_params(orderBy=name, **query)) for name in _ALIASES[field]))
+    if any(plants is None for plants in found):
+        return None
+    return list({p.id: p for plants in found for p in plants}.values())
+
+
+async def query_plants(
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    cultivar: Optional[str] = None,
+    updated_from: Optional[str] = None,
+    updated_to: Optional[str] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> Tuple[List[FirebasePlant], Optional[str]]:
+    """
+    A page of plants ordered by id, and the cursor (last id) of the next page or None.
+
+    While the mirror is live or the cached tree is fresh, the page is cut from memory. Otherwise the query is pushed
+    down to Firebase: plain pages as `orderBy="$key"` + `startAt` + `limitToFirst`, an
+    id-only listing as `shallow=true`, and the cultivar (or else updated_at) filter as
+    `orderBy` with `equalTo` / `startAt` / `endAt` on each child name the field may be stored
+    under (`variety`, `timestamp`, ... see _ALIASES), merged. Firebase applies one `orderBy`
+    per query, so a filtered page and any second filter are finished here. A filter on a
+    child without a Firebase `.indexOn` rule falls back to filtering the cached tree.
+    """
+    unknown = set(fields or ()) - set(PLANT_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown plant fields: {', '.join(sorted(unknown))}")
+    if not _get_db_url():
+        return [], None
+    filtered = cultivar is not None or updated_from is not None or updated_to is not None
+    if not (filtered or limit or cursor or fields):
+        return await list_plants(), None
+
+    if _mirror.live(get_settings().firebase_stream_stale_s):
+        _mirror_reads.inc()
+        page, next_cursor = _mirror.page(limit, cursor, cultivar, updated_from, updated_to)
+        return _project(page, fields), next_cursor
+    if _plants.fresh(get_settings().firebase_plants_ttl_s):
+        plants = await list_plants()
+    elif not filtered and fields is not None and set(fields) == {"id"} and limit is None:
+        resp = await _client().get(f"{_get_db_url()}/plants.json", params={"shallow": "true"})
+        resp.raise_for_status()
+        plants = [FirebasePlant(id=key) for key in (resp.json() or {})]
+    elif not filtered:
+        # startAt is inclusive: ask for one more row and drop the cursor itself in _page.
+        extra = 1 + (cursor is not None)
+        plants = await _fetch_plants(_params(orderBy="$key", startAt=cursor, limitToFirst=limit + extra if limit else None))
+    elif cultivar is not None:
+        plants = await _fetch_by_field("cultivar", equalTo=cultivar)
+    else:
+        plants = await _fetch_by_field("updated_at", startAt=updated_from, endAt=updated_to)
+    if plants is None:
+        _query_fallbacks.inc()
+        plants = await list_plants()
+    plants = [p for p in plants if _matches(p, cultivar, updated_from, updated_to)]
+    page, next_cursor = _page(plants, limit, cursor)
+    return _project(page, fields), next_cursor
+
+
+def _cache_write(plant_id: str, data: Optional[Dict[str, object]]) -> None:
+    """Apply a successful local write (None: delete) to the cached tree and the mirror."""
+    if _mirror.synced:  # the stream echoes the write later; reads see it now
+        _mirror.apply("put", plant_id, None if data is None else {k: v for k, v in data.items() if v is not None})
+    cache = _plants
+    if cache.plants is None:
+        return
+    if data is None:
+        cache.plants.pop(plant_id, None)
+    else:
+        cache.plants[plant_id] = _parse_plant(plant_id, {k: v for k, v in data.items() if v is not None})
+    cache.etag = None  # the tree's ETag changed with it: the next revalidation downloads
+
+
+def _payload(data: Dict[str, object]) -> Dict[str, object]:
+    return {
         "planting_date": data.get("planting_date"),
         "height_mm": data.get("height_mm"),
         "cultivar": data.get("cultivar"),
         "updated_at": data.get("updated_at"),
     }
-    async with _client() as client:
-        resp = await client.put(f"{db_url}/plants/{plant_id}.json", json=payload)
-        resp.raise_for_status()
+
+
+async def write_plant(data: Dict[str, object]) -> FirebasePlant:
+    db_url = _get_db_url()
+    if not db_url:
+        raise ValueError("FIREBASE_DB_URL not configured")
+    plant_id = data["id"]
+    payload = _payload(data)
+    resp = await _client().put(f"{db_url}/plants/{plant_id}.json", json=payload)
+    resp.raise_for_status()
+    _cache_write(plant_id, payload)
     return FirebasePlant(id=plant_id, **payload)
 
 
@@ -60,6 +481,73 @@ async def delete_plant(plant_id: str):
     db_url = _get_db_url()
     if not db_url:
         raise ValueError("FIREBASE_DB_URL not configured")
-    async with _client() as client:
-        resp = await client.delete(f"{db_url}/plants/{plant_id}.json")
-        resp.raise_for_status()
+    resp = await _client().delete(f"{db_url}/plants/{plant_id}.json")
+    resp.raise_for_status()
+    _cache_write(plant_id, None)
+
+
+def _key_error(plant_id: str) -> Optional[str]:
+    """Why Firebase would reject `plant_id` as a key, or None."""
+    if not plant_id:
+        return "Empty plant id"
+    if len(plant_id.encode()) > 768:
+        return "Plant id longer than 768 bytes"
+    if any(c in ".$#[]/" or ord(c) < 32 or ord(c) == 127 for c in plant_id):
+        return "Plant id contains one of . $ # [ ] / or a control character"
+    return None
+
+
+async def _bulk(updates: List[Tuple[str, Optional[Dict[str, object]]]]) -> Tuple[List[Optional[str]], int]:
+    """
+    Apply (plant id, payload or None to delete) pairs as multi-path PATCHes of the database
+    root, FIREBASE_BULK_CHUNK plants per request and FIREBASE_BULK_CONCURRENCY requests at
+    once. Each PATCH is atomic, so a failed request fails every plant in it. Returns each
+    item's error (None: applied) and the number of requests sent.
+    """
+    db_url = _get_db_url()
+    if not db_url:
+        raise ValueError("FIREBASE_DB_URL not configured")
+    settings = get_settings()
+    errors = [_key_error(plant_id) for plant_id, _ in updates]
+    seen = set()
+    for i, (plant_id, _) in enumerate(updates):
+        if errors[i] is None:
+            if plant_id in seen:  # one PATCH cannot set a path twice
+                errors[i] = "Duplicate plant id in this request"
+            seen.add(plant_id)
+    pending = [i for i, error in enumerate(errors) if error is None]
+    size = max(1, settings.firebase_bulk_chunk)
+    chunks = [pending[lo : lo + size] for lo in range(0, len(pending), size)]
+    gate = asyncio.Semaphore(max(1, settings.firebase_bulk_concurrency))
+
+    async def send(rows: List[int]) -> None:
+        body = {f"plants/{updates[i][0]}": updates[i][1] for i in rows}
+        async with gate:
+            try:
+                resp = await _client().patch(f"{db_url}/.json", json=body)
+                resp.raise_for_status()
+            except httpx.HTTPStatusError as exc:
+                error = f"Firebase answered {exc.response.status_code}: {exc.response.text[:200]}"
+            except httpx.HTTPError as exc:
+                error = f"{type(exc).__name__}: {exc}"
+            else:
+                error = None
+        _bulk_patches.inc()
+        for i in rows:
+            if error is None:
+                _cache_write(*updates[i])
+            else:
+                errors[i] = error
+
+    await asyncio.gather(*(send(rows) for rows in chunks))
+    return errors, len(chunks)
+
+
+async def write_plants(items: Sequence[Dict[str, object]]) -> Tuple[List[Optional[str]], int]:
+    """write_plant for many plants in few requests; see _bulk."""
+    return await _bulk([(item["id"], _payload(item)) for item in items])
+
+
+async def delete_plants(plant_ids: Sequence[str]) -> Tuple[List[Optional[str]], int]:
+    """delete_plant for many plants in few requests; see _bulk."""
+    return await _bulk([(plant_id, None) for plant_id in plant_ids])
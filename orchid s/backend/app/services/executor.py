@@ -0,0 +1,59 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from app.core import metrics
+
+
+class Saturated(Exception):
+    """Raised when a bounded executor already holds its maximum number of requests."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} inference is saturated; retry in {retry_after:g}s")
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """
+    Dedicated thread pool for CPU-bound inference with admission control.
+
+    `admit()` reserves one of `max_pending` request slots (decode + forward pass) or raises
+    Saturated immediately, so overload turns into fast 503s instead of an unbounded queue
+    and a stalled event loop.
+    """
+
+    def __init__(self, name: str, workers: int, max_pending: int, retry_after: float, initializer: Optional[Callable] = None):
+        self.name = name
+        self.max_pending = max(1, max_pending)
+        self.retry_after = retry_after
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix=name, initializer=initializer)
+        self._pending = 0
+        self.in_flight = metrics.gauge(f"{name}.in_flight")
+        self.rejected = metrics.counter(f"{name}.rejected")
+
+    def acquire(self) -> None:
+        # Only touched from the event loop thread, so the check-and-increment needs no lock.
+        if self._pending >= self.max_pending:
+            self.rejected.inc()
+            raise Saturated(self.name, self.retry_after)
+        self._pending += 1
+        self.in_flight.inc()
+
+    def release(self) -> None:
+        self._pending -= 1
+        self.in_flight.dec()
+
+    @contextmanager
+    def admit(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def run(self, fn: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -1,22 +1,29 @@
+import hashlib
+import logging
+import os
 from collections import Counter
 from datetime import datetime
 from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
 
-import joblib
 import numpy as np
-import pandas as pd
 
+from app.core import artifacts
 from app.core.config import BASE_DIR, ROOT_DIR, get_settings
+from app.services import growth_grid, inference_client, packed_forest
+
+logger = logging.getLogger(__name__)
+
+# Range verdicts, in the order of the classifier's classes_.
+GROWTH_LABELS = ("above_expected", "below_expected", "within_expected")
 
 
 def _first_existing(paths):
     return next((p for p in paths if p and Path(p).exists()), None)
 
 
-@lru_cache(maxsize=1)
-def load_model():
+def _resolve_model_paths():
     settings = get_settings()
     possible_model_paths = [
         settings.growth_model_path,
@@ -37,10 +44,132 @@ def load_model():
     meta_path = _first_existing(possible_meta_paths)
     if not model_path or not meta_path:
         raise FileNotFoundError("Growth model or metadata file missing. Configure GROWTH_MODEL_PATH/GROWTH_METADATA_PATH.")
+    return model_path, meta_path
+
+
+class GrowthModel(NamedTuple):
+    model: object
+    metadata: Dict[str, object]
+    grid: Optional[growth_grid.DecisionGrid]
+
+
+def _grid_prefix(model_path) -> Path:
+    settings = get_settings()
+    if settings.growth_grid_path:
+        return Path(settings.growth_grid_path)
+    return Path(model_path).with_suffix("")
+
+
+def _compile_grid(model, metadata, model_path, save: bool) -> growth_grid.DecisionGrid:
+    grid = growth_grid.compile_grid(model, n_features=len(metadata["feature_cols"]))
+    if save:
+        growth_grid.save_grid(grid, _grid_prefix(model_path), growth_grid.source_signature(model_path))
+    return grid
+
+
+def _load_grid(model, metadata, model_path) -> Optional[growth_grid.DecisionGrid]:
+    """Decision grid for this model when GROWTH_GRID_ENABLED is set, compiling it if stale."""
+    if not get_settings().growth_grid_enabled:
+        return None
+    grid = growth_grid.load_grid(_grid_prefix(model_path), growth_grid.source_signature(model_path))
+    if grid is not None:
+        return grid
+    try:
+        return _compile_grid(model, metadata, model_path, save=True)
+    except OSError:
+        return _compile_grid(model, metadata, model_path, save=False)  # read-only deployment: keep it in memory
+
+
+def _packed_dir(model_path) -> Path:
+    return Path(model_path).with_suffix(".packed")
+
+
+def _unpickle_forest(model_path, metadata):
+    import joblib  # pulls in scikit-learn on unpickle; only growth workers that load the forest pay for it
 
     model = joblib.load(model_path)
+    fitted_names = getattr(model, "feature_names_in_", None)
+    if fitted_names is not None:
+        if list(fitted_names) != list(metadata["feature_cols"]):
+            raise ValueError(f"Growth model features {list(fitted_names)} do not match metadata {metadata['feature_cols']}")
+        # Inference feeds plain arrays in feature_cols order; drop the names so scikit-learn does not warn.
+        del model.feature_names_in_
+    return model
+
+
+def export_packed_forest(model_path=None, meta_path=None) -> Path:
+    """Write the memory-mappable flat copy of the forest next to the .joblib file."""
+    if model_path is None or meta_path is None:
+        model_path, meta_path = _resolve_model_paths()
+    import joblib
+
+    model = _unpickle_forest(model_path, joblib.load(meta_path))
+    return packed_forest.save_packed(
+        packed_forest.pack_forest(model), _packed_dir(model_path), growth_grid.source_signature(model_path)
+    )
+
+
+def _load_forest(model_path, meta_path, metadata):
+    """With MODEL_MMAP the forest is served from shared read-only pages instead of a private unpickled copy."""
+    if not get_settings().model_mmap:
+        return _unpickle_forest(model_path, metadata)
+    signature = growth_grid.source_signature(model_path)
+    packed = packed_forest.load_packed(_packed_dir(model_path), signature)
+    if packed is not None:
+        return packed
+    try:
+        export_packed_forest(model_path, meta_path)
+    except OSError:
+        return _unpickle_forest(model_path, metadata)  # read-only deployment without a prebuilt export
+    packed = packed_forest.load_packed(_packed_dir(model_path), signature)
+    return packed if packed is not None else _unpickle_forest(model_path, metadata)
+
+
+def _load_growth_model():
+    import joblib
+
+    model_path, meta_path = _resolve_model_paths()
     metadata = joblib.load(meta_path)
-    return model, metadata
+    model = _load_forest(model_path, meta_path, metadata)
+    grid = _load_grid(model, metadata, model_path)
+    version = artifacts.file_version(model_path, meta_path)
+    return GrowthModel(model, metadata, grid), version, (model_path, meta_path)
+
+
+def _smoke_test(loaded: GrowthModel) -> None:
+    if set(loaded.model.classes_) != set(GROWTH_LABELS):
+        raise ValueError(f"Growth model classes {list(loaded.model.classes_)} are not {list(GROWTH_LABELS)}")
+    probs = loaded.model.predict_proba(_feature_matrix([30], [5.0], loaded.metadata))
+    if probs.shape != (1, len(GROWTH_LABELS)):
+        raise ValueError(f"Growth model smoke inference returned shape {probs.shape}")
+
+
+model_slot = artifacts.ArtifactSlot("growth", _load_growth_model, smoke_test=_smoke_test)
+
+
+def load_model():
+    loaded = model_slot.get().value
+    return loaded.model, loaded.metadata
+
+
+def probe() -> None:
+    """Raise if model probabilities cannot be served: loads the forest, or asks the inference server whether it has it."""
+    client = inference_client.get_client()
+    if client is not None:
+        inference_client.require_model(client, "growth")
+    else:
+        load_model()
+
+
+def load_grid() -> Optional[growth_grid.DecisionGrid]:
+    return model_slot.get().value.grid
+
+
+def build_grid(save: bool = True) -> growth_grid.DecisionGrid:
+    """Compile the served forest into a decision grid and (optionally) write the memory-mappable sidecar."""
+    loaded = model_slot.get().value
+    model_path, _ = _resolve_model_paths()
+    return _compile_grid(loaded.model, loaded.metadata, model_path, save=save)
 
 
 def _parse_range_to_min_max(s: str) -> Tuple[Optional[float], Optional[float]]:
@@ -53,8 +182,7 @@ def _parse_range_to_min_max(s: str) -> Tuple[Optional[float], Optional[float]]:
     return None, None
 
 
-@lru_cache(maxsize=1)
-def build_age_lookup_from_dataset():
+def _resolve_dataset_path():
     settings = get_settings()
     possible_dataset_paths = [
         settings.growth_dataset_path,
@@ -63,9 +191,11 @@ def build_age_lookup_from_dataset():
         ROOT_DIR.parent / "Growth tracker Backend" / "Orchid Growth Tracker" / "orchid_growth_agar_biweekly_weekly_2025-10-21.xlsx",
         ROOT_DIR.parent / "orchid_growth_agar_biweekly_weekly_2025-10-21.xlsx",
     ]
-    dataset_path = _first_existing(possible_dataset_paths)
-    if not dataset_path:
-        return None
+    return _first_existing(possible_dataset_paths)
+
+
+def _parse_dataset(dataset_path):
+    import pandas as pd  # only needed to ingest the spreadsheet
 
     df = pd.read_excel(dataset_path)
     if "expected_height_range" not in df.columns or "age_days" not in df.columns:
@@ -82,24 +212,156 @@ def build_age_lookup_from_dataset():
     return age_lookup
 
 
-def expected_range_from_lookup(age_days: int):
+_CACHE_MISS = object()
+
+
+def _dataset_cache_path(dataset_path) -> Path:
+    """Sidecar next to the spreadsheet, or in GROWTH_CACHE_DIR keyed by the spreadsheet's path."""
+    dataset_path = Path(dataset_path).resolve()
+    cache_dir = get_settings().growth_cache_dir
+    if not cache_dir:
+        return dataset_path.with_name(dataset_path.name + ".lookup.npz")
+    digest = hashlib.sha1(str(dataset_path).encode("utf-8")).hexdigest()[:12]
+    return Path(cache_dir) / f"{dataset_path.stem}-{digest}.lookup.npz"
+
+
+def _dataset_key(dataset_path) -> Tuple[str, np.ndarray]:
+    stat = os.stat(dataset_path)
+    return str(Path(dataset_path).resolve()), np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+def _load_lookup_cache(cache_path: Path, dataset_path):
+    """Cached lookup for this exact spreadsheet (path, size, mtime), else _CACHE_MISS."""
+    try:
+        with np.load(cache_path) as cache:
+            source_path, source_stat = _dataset_key(dataset_path)
+            if str(cache["source_path"]) != source_path or not np.array_equal(cache["source_stat"], source_stat):
+                return _CACHE_MISS
+            if not bool(cache["has_lookup"]):
+                return None
+            ages, h_min, h_max = cache["ages"], cache["h_min"], cache["h_max"]
+    except (OSError, KeyError, ValueError):
+        return _CACHE_MISS
+    return [(int(a), (float(lo), float(hi))) for a, lo, hi in zip(ages, h_min, h_max)]
+
+
+def _save_lookup_cache(cache_path: Path, dataset_path, lookup) -> None:
+    source_path, source_stat = _dataset_key(dataset_path)
+    rows = lookup or []
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(cache_path.name + f".{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as fh:
+        np.savez(
+            fh,
+            source_path=np.array(source_path),
+            source_stat=source_stat,
+            has_lookup=np.array(lookup is not None),
+            ages=np.array([a for a, _ in rows], dtype=np.int64),
+            h_min=np.array([r[0] for _, r in rows], dtype=np.float64),
+            h_max=np.array([r[1] for _, r in rows], dtype=np.float64),
+        )
+    os.replace(tmp_path, cache_path)
+
+
+def build_dataset_cache(force: bool = False):
+    """Parse the spreadsheet (unless the sidecar is current) and write the binary lookup cache."""
+    dataset_path = _resolve_dataset_path()
+    if not dataset_path:
+        raise FileNotFoundError("Growth dataset not found. Configure GROWTH_DATASET_PATH.")
+    cache_path = _dataset_cache_path(dataset_path)
+    if not force:
+        cached = _load_lookup_cache(cache_path, dataset_path)
+        if cached is not _CACHE_MISS:
+            return cache_path, cached
+    lookup = _parse_dataset(dataset_path)
+    _save_lookup_cache(cache_path, dataset_path, lookup)
+    return cache_path, lookup
+
+
+@lru_cache(maxsize=1)
+def build_age_lookup_from_dataset():
+    """
+    Sorted [(age_days, (h_min, h_max))] from the reference spreadsheet, or None without one.
+
+    The parsed result is persisted to a .npz sidecar keyed by the spreadsheet's path, size
+    and mtime, so workers only pay for pandas/openpyxl when the spreadsheet changes.
+    """
+    dataset_path = _resolve_dataset_path()
+    if not dataset_path:
+        return None
+
+    cached = _load_lookup_cache(_dataset_cache_path(dataset_path), dataset_path)
+    if cached is not _CACHE_MISS:
+        return cached
+
+    lookup = _parse_dataset(dataset_path)
+    try:
+        _save_lookup_cache(_dataset_cache_path(dataset_path), dataset_path, lookup)
+    except OSError:
+        pass  # read-only location: serve the parsed lookup without persisting it
+    return lookup
+
+
+class AgeRangeIndex(NamedTuple):
+    """Dense per-day table of expected height ranges, clamped to the first/last age at both ends."""
+
+    first_age: int
+    slots: np.ndarray  # one slot into `ranges` per day from first_age to the last age
+    ranges: Tuple[Tuple[float, float], ...]
+    lows: np.ndarray
+    highs: np.ndarray
+
+    def lookup(self, age_days: int):
+        pos = min(max(int(age_days) - self.first_age, 0), len(self.slots) - 1)
+        return self.ranges[self.slots[pos]]
+
+    def lookup_many(self, age_days) -> np.ndarray:
+        """Vectorized lookup; returns the slot per age, index `lows`/`highs`/`ranges` with it."""
+        pos = np.clip(np.asarray(age_days, dtype=np.int64) - self.first_age, 0, len(self.slots) - 1)
+        return self.slots[pos]
+
+
+def _compile_age_index(first_age: int, day_slots, ranges) -> AgeRangeIndex:
+    ranges = tuple(ranges)
+    slots = np.asarray(day_slots).astype(np.min_scalar_type(max(len(ranges) - 1, 0)))
+    return AgeRangeIndex(
+        first_age=int(first_age),
+        slots=slots,
+        ranges=ranges,
+        lows=np.array([r[0] for r in ranges], dtype=float),
+        highs=np.array([r[1] for r in ranges], dtype=float),
+    )
+
+
+@lru_cache(maxsize=1)
+def age_range_index() -> AgeRangeIndex:
+    """
+    Compile the age lookup once into an O(1) dense index.
+
+    Dataset rule: an age maps to the range of the nearest sampled age, ties going to the
+    lower one (age <= midpoint). Without a dataset the legacy buckets are compiled instead.
+    """
     lookup = build_age_lookup_from_dataset()
     if not lookup:
-        return get_expected_height_range(age_days)
-
-    ages = [a for a, _ in lookup]
-    ranges = [r for _, r in lookup]
+        days = range(40, 122)  # legacy buckets are constant below 40 and above 120
+        ranges: List[Tuple[float, float]] = []
+        day_slots = []
+        for day in days:
+            bucket = get_expected_height_range(day)
+            if bucket not in ranges:
+                ranges.append(bucket)
+            day_slots.append(ranges.index(bucket))
+        return _compile_age_index(days[0], day_slots, ranges)
+
+    ages = np.array([a for a, _ in lookup], dtype=np.int64)
+    midpoints = (ages[:-1] + ages[1:]) / 2
+    days = np.arange(ages[0], ages[-1] + 1)
+    day_slots = np.searchsorted(midpoints, days, side="left")
+    return _compile_age_index(ages[0], day_slots, [r for _, r in lookup])
 
-    if age_days <= ages[0]:
-        return ranges[0]
-    if age_days >= ages[-1]:
-        return ranges[-1]
 
-    for i in range(len(ages) - 1):
-        midpoint = (ages[i] + ages[i + 1]) / 2
-        if age_days <= midpoint:
-            return ranges[i]
-    return ranges[-1]
+def expected_range_from_lookup(age_days: int):
+    return age_range_index().lookup(age_days)
 
 
 def get_expected_height_range(age_days: int):
@@ -124,32 +386,69 @@ def compute_age_days(planting_date_str: str, current_date_str: str, date_format:
     return (current_date - planting_date).days
 
 
-def classify_growth(planting_date: str, current_date: str, height_mm: float, age_days_override: Optional[int] = None):
-    model, metadata = load_model()
+def _parse_dates(values: Sequence[str], date_format: str = "%Y-%m-%d") -> Tuple[np.ndarray, List[Optional[str]]]:
+    """
+    Parse date strings into day numbers in one NumPy cast.
+
+    Falls back to per-item strptime only when the vectorized cast rejects the array,
+    so a single malformed date is reported for that item instead of failing the batch.
+    """
+    days = np.zeros(len(values), dtype=np.int64)
+    errors: List[Optional[str]] = [None] * len(values)
+    if not len(values):
+        return days, errors
+
+    strings = np.asarray(values, dtype=str)
+    if date_format == "%Y-%m-%d" and bool((np.char.str_len(strings) == 10).all()):
+        try:
+            return strings.astype("datetime64[D]").astype(np.int64), errors
+        except ValueError:
+            pass
+
+    for i, value in enumerate(values):
+        try:
+            parsed = datetime.strptime(value, date_format)
+        except (TypeError, ValueError) as exc:
+            errors[i] = f"Invalid date {value!r}: {exc}"
+            continue
+        days[i] = np.datetime64(parsed.date(), "D").astype(np.int64)
+    return days, errors
+
+
+def _feature_matrix(age_days, heights, metadata) -> np.ndarray:
+    """Model input rows with columns in metadata["feature_cols"] order."""
+    columns = {
+        "age_days": np.asarray(age_days, dtype=float),
+        "plant_height_mm": np.asarray(heights, dtype=float),
+    }
+    return np.column_stack([columns[col] for col in metadata["feature_cols"]])
 
-    age_days = age_days_override if age_days_override is not None else compute_age_days(planting_date, current_date)
 
-    X_new = pd.DataFrame(
-        [{"age_days": age_days, "plant_height_mm": float(height_mm)}],
-        columns=metadata["feature_cols"],
-    )
+def _predict_proba(loaded: GrowthModel, X: np.ndarray) -> np.ndarray:
+    """Forest probabilities, answered from the decision grid when one is enabled."""
+    if loaded.grid is None:
+        return loaded.model.predict_proba(X)
+    return loaded.grid.predict_proba(X, fallback=loaded.model.predict_proba)
 
-    _ = model.predict(X_new)[0]  # original label not used after deterministic override
-    probs_arr = model.predict_proba(X_new)[0]
-    probs = {cls: float(p) for cls, p in zip(model.classes_, probs_arr)}
 
-    expected_range = expected_range_from_lookup(age_days)
-    min_expected, max_expected = expected_range
+def _range_label(height_mm: float, min_expected: float, max_expected: float) -> str:
     if height_mm < min_expected:
-        final_label = "below_expected"
-    elif height_mm > max_expected:
-        final_label = "above_expected"
-    else:
-        final_label = "within_expected"
-
-    final_probs = {cls: 0.0 for cls in model.classes_}
+        return "below_expected"
+    if height_mm > max_expected:
+        return "above_expected"
+    return "within_expected"
+
+
+def _growth_result(
+    final_label: str,
+    age_days: int,
+    expected_range,
+    height_mm: float,
+    model_probabilities=None,
+    model_version: Optional[str] = None,
+) -> Dict[str, object]:
+    final_probs = {cls: 0.0 for cls in GROWTH_LABELS}
     final_probs[final_label] = 1.0
-
     return {
         "predicted_label": final_label,
         "probabilities": final_probs,
@@ -157,4 +456,132 @@ def classify_growth(planting_date: str, current_date: str, height_mm: float, age
         "expected_height_range": expected_range,
         "heuristic_override": None,
         "plant_height_mm": float(height_mm),
+        "model_probabilities": model_probabilities,
+        "model_version": model_version,
     }
+
+
+def _model_probabilities(age_days, heights) -> Tuple[List[Dict[str, float]], str]:
+    """Raw forest probabilities per row and the model version that produced them."""
+    client = inference_client.get_client()
+    if client is not None:
+        response = client.call(
+            {"op": "growth", "ages": [int(a) for a in age_days], "heights": [float(h) for h in heights]}
+        )
+        return response["rows"], response["version"]
+    served = model_slot.get()  # one snapshot per call so a hot reload cannot mix versions
+    loaded = served.value
+    X_new = _feature_matrix(age_days, heights, loaded.metadata)
+    probs_arr = _predict_proba(loaded, X_new)
+    return [{cls: float(p) for cls, p in zip(loaded.model.classes_, row)} for row in probs_arr], served.version
+
+
+def classify_growth(
+    planting_date: str,
+    current_date: str,
+    height_mm: float,
+    age_days_override: Optional[int] = None,
+    include_model: bool = False,
+):
+    """
+    Range verdict for one measurement.
+
+    The label and probabilities come from the expected-range check alone, so the forest is
+    only loaded and evaluated when `include_model` asks for its raw probabilities.
+    """
+    age_days = age_days_override if age_days_override is not None else compute_age_days(planting_date, current_date)
+
+    expected_range = expected_range_from_lookup(age_days)
+    min_expected, max_expected = expected_range
+    final_label = _range_label(height_mm, min_expected, max_expected)
+
+    model_probabilities, model_version = None, None
+    if include_model:
+        rows, model_version = _model_probabilities([age_days], [height_mm])
+        model_probabilities = rows[0]
+    return _growth_result(final_label, age_days, expected_range, height_mm, model_probabilities, model_version)
+
+
+def classify_growth_batch(items: Sequence[Dict[str, object]], default_current_date: str) -> List[Dict[str, object]]:
+    """
+    Score many measurements with one vectorized range check.
+
+    Each item carries the keys of `classify_growth` (planting_date, current_date, height_mm,
+    age_days_override, include_model); items asking for model probabilities share a single
+    model call. Results come back in input order as {"index", "result"} or
+    {"index", "error"} so one bad row does not fail the rest of the batch.
+    """
+    n = len(items)
+    errors: List[Optional[str]] = [None] * n
+    ages = np.zeros(n, dtype=np.int64)
+    heights = np.array([float(item["height_mm"]) for item in items], dtype=float)
+
+    to_compute = [i for i, item in enumerate(items) if item.get("age_days_override") is None]
+    for i, item in enumerate(items):
+        if item.get("age_days_override") is not None:
+            ages[i] = int(item["age_days_override"])
+
+    if to_compute:
+        planting_days, planting_errors = _parse_dates([items[i]["planting_date"] for i in to_compute])
+        current_days, current_errors = _parse_dates([items[i].get("current_date") or default_current_date for i in to_compute])
+        ages[to_compute] = current_days - planting_days
+        for pos, i in enumerate(to_compute):
+            errors[i] = planting_errors[pos] or current_errors[pos]
+
+    valid = np.array([err is None for err in errors], dtype=bool)
+    labels = np.full(n, "", dtype=object)
+    ranges: List[Optional[Tuple[float, float]]] = [None] * n
+    model_probabilities: List[Optional[Dict[str, float]]] = [None] * n
+    model_version: Optional[str] = None
+
+    if valid.any():
+        wants_model = valid & np.array([bool(item.get("include_model")) for item in items], dtype=bool)
+        if wants_model.any():
+            rows, model_version = _model_probabilities(ages[wants_model], heights[wants_model])
+            for i, probs in zip(np.flatnonzero(wants_model), rows):
+                model_probabilities[i] = probs
+
+        index = age_range_index()
+        slots = index.lookup_many(ages[valid])
+        valid_heights = heights[valid]
+        labels[valid] = np.where(
+            valid_heights < index.lows[slots],
+            "below_expected",
+            np.where(valid_heights > index.highs[slots], "above_expected", "within_expected"),
+        )
+        for i, slot in zip(np.flatnonzero(valid), slots):
+            ranges[i] = index.ranges[slot]
+
+    results: List[Dict[str, object]] = []
+    for i in range(n):
+        if errors[i] is not None:
+            results.append({"index": i, "error": errors[i]})
+            continue
+        results.append(
+            {
+                "index": i,
+                "result": _growth_result(
+                    labels[i],
+                    int(ages[i]),
+                    ranges[i],
+                    heights[i],
+                    model_probabilities[i],
+                    model_version if model_probabilities[i] is not None else None,
+                ),
+            }
+        )
+    return results
+
+
+def warm_up() -> None:
+    """
+    Load the dataset lookup and range index, then try the forest (and grid) with one model evaluation.
+
+    Range verdicts need only the dataset, so a missing or broken forest is logged rather than
+    raised: /ready does not wait on a model that only `include_model` requests use.
+    """
+    age_range_index()
+    try:
+        _model_probabilities([30], [5.0])
+    except Exception:
+        logger.warning("growth model unavailable; model probabilities will fail until it loads", exc_info=True)
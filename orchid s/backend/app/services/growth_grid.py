@@ -0,0 +1,135 @@
+"""
+Exact lookup-grid compilation of the two-feature growth RandomForest.
+
+Every tree splits on `x <= threshold` after scikit-learn casts inputs to float32, so the
+forest's predict_proba is constant on each cell between consecutive thresholds of each
+feature. Evaluating the forest once per cell gives a small table that answers any finite
+input with one searchsorted per feature instead of walking all trees.
+"""
+import os
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class DecisionGrid:
+    def __init__(self, edges: List[np.ndarray], proba: np.ndarray, classes: np.ndarray):
+        self.edges = edges
+        self.proba = proba  # shape: (cells of feature 0, cells of feature 1, ..., n_classes)
+        self.classes_ = classes
+
+    def predict_proba(self, X, fallback=None) -> np.ndarray:
+        """
+        Look up class probabilities for rows of X (columns in model feature order).
+
+        Non-finite rows cannot be placed on the grid and go to `fallback(X_subset)`,
+        normally the live forest's predict_proba.
+        """
+        X32 = np.asarray(X, dtype=np.float32)
+        finite = np.isfinite(X32).all(axis=1)
+        out = np.empty((X32.shape[0], len(self.classes_)), dtype=self.proba.dtype)
+        if finite.any():
+            cells = tuple(
+                np.searchsorted(edges, X32[finite, f].astype(np.float64), side="left")
+                for f, edges in enumerate(self.edges)
+            )
+            out[finite] = self.proba[cells]
+        if not finite.all():
+            if fallback is None:
+                raise ValueError("Input outside the decision grid and no fallback model given")
+            out[~finite] = fallback(np.asarray(X)[~finite])
+        return out
+
+
+def _internal_splits(model) -> Tuple[np.ndarray, np.ndarray]:
+    """(feature, threshold) of every internal node, from a fitted forest or a PackedForest."""
+    if not hasattr(model, "estimators_"):
+        internal = model.feature >= 0
+        return model.feature[internal], model.threshold[internal]
+    features, thresholds = [], []
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        internal = tree.children_left != tree.children_right
+        features.append(tree.feature[internal])
+        thresholds.append(tree.threshold[internal])
+    return np.concatenate(features), np.concatenate(thresholds)
+
+
+def _split_thresholds(model, n_features: int) -> List[np.ndarray]:
+    features, thresholds = _internal_splits(model)
+    return [np.unique(thresholds[features == f]) for f in range(n_features)]
+
+
+def _cell_representatives(edges: np.ndarray) -> np.ndarray:
+    """One float32 value inside each cell (edges[k-1], edges[k]], plus one above the last edge."""
+    if not len(edges):
+        return np.zeros(1, dtype=np.float32)
+    reps = edges.astype(np.float32)
+    too_high = reps.astype(np.float64) > edges
+    reps[too_high] = np.nextafter(reps[too_high], np.float32(-np.inf))
+    above = np.float32(edges[-1])
+    if float(above) <= edges[-1]:
+        above = np.nextafter(above, np.float32(np.inf))
+    return np.append(reps, above)
+
+
+def compile_grid(model, predict_proba=None, n_features: int = 2) -> DecisionGrid:
+    """Evaluate `predict_proba` (default: the model's) once per grid cell."""
+    if not (hasattr(model, "estimators_") or hasattr(model, "threshold")):
+        raise ValueError("Decision grid needs a fitted tree ensemble")
+    predict_proba = predict_proba or model.predict_proba
+    edges = _split_thresholds(model, n_features)
+    reps = [_cell_representatives(e) for e in edges]
+    mesh = np.stack([axis.ravel() for axis in np.meshgrid(*reps, indexing="ij")], axis=1)
+    proba = np.asarray(predict_proba(mesh), dtype=np.float64)
+    shape = tuple(len(r) for r in reps) + (proba.shape[1],)
+    return DecisionGrid(edges, proba.reshape(shape), np.asarray(model.classes_))
+
+
+def _grid_paths(prefix: Path) -> Tuple[Path, Path]:
+    prefix = Path(prefix)
+    return prefix.with_name(prefix.name + ".grid.npy"), prefix.with_name(prefix.name + ".grid-index.npz")
+
+
+def source_signature(path) -> np.ndarray:
+    stat = os.stat(path)
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+def save_grid(grid: DecisionGrid, prefix: Path, signature: np.ndarray) -> Path:
+    proba_path, index_path = _grid_paths(prefix)
+    # Per-process temp names: workers warming up together must not write into each other's files.
+    tmp_proba = proba_path.with_name(f"{proba_path.name}.{os.getpid()}.tmp")
+    tmp_index = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_proba, "wb") as fh:
+            np.save(fh, np.ascontiguousarray(grid.proba))
+        with open(tmp_index, "wb") as fh:
+            np.savez(
+                fh,
+                signature=signature,
+                classes=grid.classes_.astype(str),
+                **{f"edges_{i}": e for i, e in enumerate(grid.edges)},
+            )
+        os.replace(tmp_proba, proba_path)
+        os.replace(tmp_index, index_path)
+    finally:
+        for tmp in (tmp_proba, tmp_index):
+            tmp.unlink(missing_ok=True)
+    return proba_path
+
+
+def load_grid(prefix: Path, signature: Optional[np.ndarray] = None) -> Optional[DecisionGrid]:
+    """Memory-map a saved grid; returns None when it is missing or built from another model file."""
+    proba_path, index_path = _grid_paths(prefix)
+    if not proba_path.exists() or not index_path.exists():
+        return None
+    with np.load(index_path) as index:
+        if signature is not None and not np.array_equal(index["signature"], signature):
+            return None
+        n_features = sum(1 for k in index.files if k.startswith("edges_"))
+        edges = [index[f"edges_{i}"] for i in range(n_features)]
+        classes = index["classes"].astype(object)
+    proba = np.load(proba_path, mmap_mode="r")
+    return DecisionGrid(edges, proba, classes)
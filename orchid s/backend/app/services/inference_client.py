@@ -0,0 +1,168 @@
+"""
+Client side of the local inference server (see inference_server.py).
+
+Messages are length-prefixed JSON over a Unix socket. Image batches do not go through the
+socket: each calling thread owns a shared-memory segment, writes the preprocessed float32
+batch into it and sends only the segment name and shape; the server reads the tensor in place
+and, when asked, writes the penultimate features back into the same segment.
+"""
+import json
+import socket
+import struct
+import threading
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import get_settings
+
+_HEADER = struct.Struct("!I")
+_SEGMENT_ALIGN = 1 << 20
+
+
+class InferenceUnavailable(ConnectionError):
+    pass
+
+
+def send(sock: socket.socket, message: Dict[str, object]) -> None:
+    payload = json.dumps(message).encode()
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise EOFError("inference socket closed")
+        buf += chunk
+    return bytes(buf)
+
+
+def recv(sock: socket.socket) -> Dict[str, object]:
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return json.loads(_recv_exact(sock, size))
+
+
+def _remote_error(response: Dict[str, object]) -> Exception:
+    kind, message = response.get("type"), response.get("error", "")
+    if kind == "FileNotFoundError":
+        return FileNotFoundError(message)  # model missing on the server: 503 like a local miss
+    if kind == "ValueError":
+        return ValueError(message)
+    return RuntimeError(f"inference server: {kind}: {message}")
+
+
+class InferenceClient:
+    """One connection and one shared-memory segment per calling thread."""
+
+    def __init__(self, path: str, timeout: float):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._segments: List[shared_memory.SharedMemory] = []
+        self._lock = threading.Lock()
+
+    def _connect(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except OSError as exc:
+                sock.close()
+                raise InferenceUnavailable(f"Inference server not reachable at {self.path}: {exc}") from exc
+            self._local.sock = sock
+        return sock
+
+    def _disconnect(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def call(self, request: Dict[str, object]) -> Dict[str, object]:
+        # A reused connection may have been closed by a server restart: retry once on a fresh one.
+        for attempt in range(2):
+            sock = self._connect()
+            try:
+                send(sock, request)
+                response = recv(sock)
+                break
+            except (ConnectionError, EOFError) as exc:
+                self._disconnect()
+                if attempt:
+                    raise InferenceUnavailable(f"Inference server at {self.path} dropped the connection") from exc
+            except OSError:  # timeout: the reply may still arrive, so this connection is unusable
+                self._disconnect()
+                raise
+        if not response.get("ok"):
+            raise _remote_error(response)
+        return response
+
+    def _segment(self, nbytes: int) -> shared_memory.SharedMemory:
+        segment = getattr(self._local, "segment", None)
+        if segment is None or segment.size < nbytes:
+            size = -(-nbytes // _SEGMENT_ALIGN) * _SEGMENT_ALIGN
+            fresh = shared_memory.SharedMemory(create=True, size=size)
+            with self._lock:
+                self._segments.append(fresh)
+                if segment is not None:
+                    self._segments.remove(segment)
+            if segment is not None:
+                segment.close()
+                segment.unlink()
+            self._local.segment = segment = fresh
+        return segment
+
+    def predict_disease(
+        self, batch: np.ndarray, features: bool = False, cascade: bool = True
+    ) -> Tuple[List[Dict[str, object]], Optional[np.ndarray]]:
+        """Classify a (N, 3, 224, 224) float32 batch: (results, features) as disease.infer_tensors returns them."""
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        segment = self._segment(batch.nbytes)
+        np.ndarray(batch.shape, dtype=np.float32, buffer=segment.buf)[...] = batch
+        request = {"op": "disease", "shm": segment.name, "shape": list(batch.shape), "features": features, "cascade": cascade}
+        response = self.call(request)
+        # The server writes the features back over the consumed input in the same segment.
+        shape = response.get("features")
+        feats = None if shape is None else np.array(np.ndarray(tuple(shape), dtype=np.float32, buffer=segment.buf))
+        return response["results"], feats
+
+    def close(self) -> None:
+        self._disconnect()
+        with self._lock:
+            segments, self._segments = self._segments, []
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+
+
+_client: Optional[InferenceClient] = None
+_client_lock = threading.Lock()
+
+
+def require_model(client: InferenceClient, name: str) -> None:
+    """Raise unless the inference server reports `name` loaded (its ping answers per model)."""
+    status = client.call({"op": "ping"}).get("models", {}).get(name, "unknown model")
+    if status != "ok":
+        raise RuntimeError(f"Inference server: {name} {status}")
+
+
+def get_client() -> Optional[InferenceClient]:
+    """The shared client when INFERENCE_SOCKET is set, else None (models run in this process)."""
+    global _client
+    settings = get_settings()
+    if not settings.inference_socket:
+        return None
+    with _client_lock:
+        if _client is None:
+            _client = InferenceClient(settings.inference_socket, settings.inference_timeout_s)
+        return _client
+
+
+def shutdown() -> None:
+    if _client is not None:
+        _client.close()
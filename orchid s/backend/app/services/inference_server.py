@@ -0,0 +1,142 @@
+"""
+Local inference server: the growth and disease models loaded once, shared by all API workers.
+
+`python -m app.cli inference-server` binds INFERENCE_SOCKET and forks INFERENCE_REPLICAS
+processes that each load the models and accept connections on the shared listening socket,
+so model replicas are sized independently of uvicorn workers. API workers started with the
+same INFERENCE_SOCKET send requests here instead of loading models (see inference_client.py).
+"""
+import os
+import signal
+import socketserver
+import sys
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.services import inference_client
+
+_MODELS = ("growth", "disease")
+_warm_up_errors: Dict[str, str] = {}  # why a model of this replica failed to warm up
+
+
+def _attach(segments: Dict[str, shared_memory.SharedMemory], name: str) -> shared_memory.SharedMemory:
+    segment = segments.get(name)
+    if segment is None:
+        segment = shared_memory.SharedMemory(name=name)
+        # The client owns the segment; without this the tracker would unlink it when this process exits.
+        resource_tracker.unregister(segment._name, "shared_memory")
+        segments[name] = segment
+    return segment
+
+
+def _dispatch(request: Dict[str, object], segments: Dict[str, shared_memory.SharedMemory]) -> Dict[str, object]:
+    from app import services
+
+    op = request.get("op")
+    if op == "ping":
+        # Load status per model, so a probe tells a server without weights from a healthy one.
+        models = {
+            name: "ok" if getattr(services, name).model_slot.loaded else f"unavailable: {_warm_up_errors.get(name, 'not loaded')}"
+            for name in _MODELS
+        }
+        return {"pid": os.getpid(), "models": models}
+    if op == "disease":
+        import torch
+
+        segment = _attach(segments, request["shm"])
+        batch = torch.from_numpy(np.ndarray(tuple(request["shape"]), dtype=np.float32, buffer=segment.buf))
+        results, features = services.disease.infer_tensors(batch, request.get("features", False), request.get("cascade", True))
+        del batch  # the view must be gone before the segment can be closed
+        if features is None:
+            return {"results": results}
+        np.ndarray(features.shape, dtype=np.float32, buffer=segment.buf)[...] = features  # smaller than the input
+        return {"results": results, "features": list(features.shape)}
+    if op == "disease_version":
+        return {"version": services.disease._pipeline_version()}
+    if op == "growth":
+        rows, version = services.growth._model_probabilities(request["ages"], request["heights"])
+        return {"rows": rows, "version": version}
+    raise ValueError(f"Unknown inference op {op!r}")
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        segments: Dict[str, shared_memory.SharedMemory] = {}
+        try:
+            while True:
+                try:
+                    request = inference_client.recv(self.request)
+                except (EOFError, ConnectionError):
+                    return
+                try:
+                    response = {"ok": True, **_dispatch(request, segments)}
+                except Exception as exc:  # reported to the caller, the connection stays usable
+                    response = {"ok": False, "type": type(exc).__name__, "error": str(exc)}
+                inference_client.send(self.request, response)
+        finally:
+            for segment in segments.values():
+                segment.close()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _replica(server: _Server) -> None:
+    from app import services
+
+    for name in _MODELS:
+        try:
+            getattr(services, name).warm_up()
+        except Exception as exc:  # a missing model fails its own requests, not the server
+            _warm_up_errors[name] = str(exc)
+            print(f"[inference {os.getpid()}] {name} unavailable: {exc}", file=sys.stderr)
+    print(f"[inference {os.getpid()}] serving on {server.server_address}", file=sys.stderr)
+    server.serve_forever(poll_interval=0.5)
+
+
+def serve(socket_path: str = None, replicas: int = None) -> int:
+    settings = get_settings()
+    path = Path(socket_path or settings.inference_socket or "/tmp/orchid-inference.sock")
+    replicas = replicas or settings.inference_replicas
+    # This process runs the models itself: make every service see local mode.
+    os.environ["INFERENCE_SOCKET"] = ""
+    get_settings.cache_clear()
+
+    if path.exists():
+        path.unlink()
+    server = _Server(str(path), _Handler)
+    server.socket.setblocking(False)  # replicas race for each connection; losers get EAGAIN and go back to polling
+
+    children: List[int] = []
+    for _ in range(max(1, replicas)):
+        pid = os.fork()  # before torch is imported, so every replica starts its own thread pools
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                _replica(server)
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    def stop(signum, frame):
+        for child in children:
+            try:
+                os.kill(child, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        for child in children:
+            os.waitpid(child, 0)
+    finally:
+        server.server_close()
+        if path.exists():
+            path.unlink()
+    return 0
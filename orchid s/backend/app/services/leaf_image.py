@@ -0,0 +1,67 @@
+"""
+Fast decode + normalize path for leaf images.
+
+Phone photos are often 12 MP, but the model only sees 224x224. JPEGs are decoded with
+`Image.draft`, which lets libjpeg scale by 1/2, 1/4 or 1/8 in the DCT domain (and emit RGB
+directly), so most discarded pixels are never decoded. The result stays at least the target
+size on both sides before the same bilinear resize torchvision's `Resize` uses, so outputs
+differ from the full decode only by resampling noise (see scripts/bench_leaf_preprocess.py).
+"""
+from io import BytesIO
+from pathlib import Path
+from typing import Tuple, Union
+
+import numpy as np
+import torch
+from PIL import Image
+
+IMAGE_SIZE = (224, 224)
+MEAN = (0.485, 0.456, 0.406)
+STD = (0.229, 0.224, 0.225)
+
+# Normalize((x / 255 - mean) / std) folded into one subtract and one divide on the uint8 values.
+_SHIFT = torch.tensor(MEAN).mul(255).view(3, 1, 1)
+_SCALE = torch.tensor(STD).mul(255).view(3, 1, 1)
+_REDUCING_GAP = 3.0  # non-JPEG inputs: integer box-reduce first when more than ~6x the target
+
+
+def open_image(image: Union[str, Path, bytes, Image.Image]) -> Image.Image:
+    if isinstance(image, (str, Path)):
+        return Image.open(image)
+    if isinstance(image, (bytes, bytearray)):
+        return Image.open(BytesIO(image))
+    return image
+
+
+def decode_reduced(image: Union[str, Path, bytes, Image.Image], size: Tuple[int, int] = IMAGE_SIZE) -> Image.Image:
+    """Open an image as RGB, decoding JPEGs at the smallest DCT scale that still covers `size`."""
+    pil_image = open_image(image)
+    if pil_image.format == "JPEG":
+        pil_image.draft("RGB", size)  # no-op once pixels are loaded
+    if pil_image.mode != "RGB":
+        pil_image = pil_image.convert("RGB")
+    return pil_image
+
+
+def to_tensor(pixels: Union[Image.Image, np.ndarray]) -> torch.Tensor:
+    """RGB image or (H, W, 3) uint8 array -> normalized float32 (3, H, W), in one pass over a uint8 copy."""
+    pixels = torch.from_numpy(np.array(pixels, dtype=np.uint8))
+    return pixels.permute(2, 0, 1).contiguous().float().sub_(_SHIFT).div_(_SCALE)
+
+
+def batch_to_tensor(pixels: np.ndarray) -> torch.Tensor:
+    """(N, H, W, 3) uint8 -> normalized float32 (N, 3, H, W); row for row the same values as to_tensor."""
+    batch = torch.from_numpy(np.ascontiguousarray(pixels, dtype=np.uint8))
+    return batch.permute(0, 3, 1, 2).contiguous().float().sub_(_SHIFT).div_(_SCALE)
+
+
+def resized_pixels(image: Union[str, Path, bytes, Image.Image], size: Tuple[int, int] = IMAGE_SIZE) -> np.ndarray:
+    """Decoded and resized (H, W, 3) uint8 pixels: everything preprocess() does before normalizing."""
+    pil_image = decode_reduced(image, size)
+    if pil_image.size != size:
+        pil_image = pil_image.resize(size, Image.BILINEAR, reducing_gap=_REDUCING_GAP)
+    return np.asarray(pil_image, dtype=np.uint8)
+
+
+def preprocess(image: Union[str, Path, bytes, Image.Image], size: Tuple[int, int] = IMAGE_SIZE) -> torch.Tensor:
+    return to_tensor(resized_pixels(image, size))
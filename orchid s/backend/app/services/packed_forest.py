@@ -0,0 +1,141 @@
+"""
+Flat, memory-mappable copy of a fitted scikit-learn RandomForestClassifier.
+
+scikit-learn copies every tree's node arrays into private buffers on unpickle (even with
+joblib's mmap_mode), so each worker holds its own forest. Here all trees are concatenated
+into a handful of .npy files opened with mmap_mode="r"; the OS page cache then backs every
+worker with the same read-only pages.
+
+An export lives in a versioned subdirectory named by the `CURRENT` pointer file. A new export
+is written beside it and published by replacing the pointer, so another worker never sees a
+half-written or vanished forest. Arrays already mapped stay valid after their files are
+unlinked.
+"""
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+_BLOCK_ROWS = 128  # rows traversed together; keeps the (rows x trees) working set in cache
+
+_ARRAYS = ("roots", "left", "right", "feature", "threshold", "missing_left", "proba", "classes")
+
+
+class PackedForest:
+    def __init__(self, arrays):
+        for name in _ARRAYS:
+            # Plain ndarray views over the mapping: same shared pages, without np.memmap indexing overhead.
+            setattr(self, name, np.asarray(arrays[name]))
+        self.classes_ = np.asarray(self.classes, dtype=object)
+        self.n_estimators = len(self.roots)
+
+    def apply(self, X) -> np.ndarray:
+        """Leaf node of every (row, tree) pair, shape (rows, trees)."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.shape[0] > _BLOCK_ROWS:
+            return np.concatenate([self.apply(X[i : i + _BLOCK_ROWS]) for i in range(0, X.shape[0], _BLOCK_ROWS)])
+        n_rows = X.shape[0]
+        nodes = np.tile(self.roots, n_rows)
+        row_of = np.repeat(np.arange(n_rows), self.n_estimators)
+        active = np.arange(nodes.size)
+        while active.size:
+            current = nodes[active]
+            feature = self.feature[current]
+            internal = feature >= 0
+            active, current, feature = active[internal], current[internal], feature[internal]
+            if not active.size:
+                break
+            values = X[row_of[active], feature].astype(np.float64)
+            go_left = np.where(np.isnan(values), self.missing_left[current], values <= self.threshold[current])
+            nodes[active] = np.where(go_left, self.left[current], self.right[current])
+        return nodes.reshape(n_rows, self.n_estimators)
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Same arithmetic as RandomForestClassifier.predict_proba: leaf values summed in tree order, then averaged."""
+        leaves = self.apply(X)
+        leaf_proba = self.proba[leaves.T]  # (trees, rows, classes)
+        out = np.zeros(leaf_proba.shape[1:], dtype=np.float64)
+        for tree_proba in leaf_proba:
+            out += tree_proba
+        out /= self.n_estimators
+        return out
+
+
+def pack_forest(model) -> dict:
+    roots, left, right, feature, threshold, missing_left, proba = [], [], [], [], [], [], []
+    offset = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        is_leaf = tree.children_left == -1
+        roots.append(offset)
+        left.append(np.where(is_leaf, -1, tree.children_left + offset))
+        right.append(np.where(is_leaf, -1, tree.children_right + offset))
+        feature.append(np.where(is_leaf, -1, tree.feature))
+        threshold.append(tree.threshold)
+        missing_left.append(np.asarray(tree.missing_go_to_left, dtype=bool))
+        proba.append(tree.value[:, 0, : estimator.n_classes_])  # class fractions, as DecisionTreeClassifier returns
+        offset += tree.node_count
+    return {
+        "roots": np.asarray(roots, dtype=np.int64),
+        "left": np.concatenate(left).astype(np.int64),
+        "right": np.concatenate(right).astype(np.int64),
+        "feature": np.concatenate(feature).astype(np.int64),
+        "threshold": np.concatenate(threshold).astype(np.float64),
+        "missing_left": np.concatenate(missing_left),
+        "proba": np.concatenate(proba).astype(np.float64),
+        "classes": np.asarray(model.classes_).astype(str),
+    }
+
+
+def save_packed(arrays: dict, directory: Path, signature: np.ndarray) -> Path:
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    version = f"v{time.time_ns()}-{os.getpid()}"
+    tmp = directory / f"{version}.tmp"
+    tmp.mkdir()
+    for name in _ARRAYS:
+        np.save(tmp / f"{name}.npy", np.ascontiguousarray(arrays[name]))
+    (tmp / "source.json").write_text(json.dumps({"signature": [int(v) for v in signature]}))
+    os.replace(tmp, directory / version)
+    previous = _current(directory)
+    pointer = directory / f"CURRENT.{os.getpid()}.tmp"
+    pointer.write_text(version)
+    os.replace(pointer, directory / "CURRENT")
+    # Keep the version just replaced for workers that read the old pointer a moment ago.
+    for child in directory.iterdir():
+        if child.name not in (version, previous, "CURRENT") and not child.name.endswith(".tmp"):
+            if child.is_dir():
+                shutil.rmtree(child, ignore_errors=True)
+            else:
+                child.unlink(missing_ok=True)  # files of the unversioned layout
+    return directory / version
+
+
+def _current(directory: Path) -> Optional[str]:
+    try:
+        return (directory / "CURRENT").read_text().strip() or None
+    except OSError:
+        return None
+
+
+def load_packed(directory: Path, signature: Optional[np.ndarray] = None) -> Optional[PackedForest]:
+    """Memory-map a packed forest; None when missing, unreadable or exported from a different model file."""
+    directory = Path(directory)
+    version = _current(directory)
+    for _ in range(3):
+        path = directory / version if version is not None else directory
+        try:
+            source = json.loads((path / "source.json").read_text())
+            if signature is not None and source.get("signature") != [int(v) for v in signature]:
+                return None
+            return PackedForest({name: np.load(path / f"{name}.npy", mmap_mode="r") for name in _ARRAYS})
+        except (OSError, ValueError):
+            latest = _current(directory)
+            if latest == version:
+                return None  # the caller re-exports
+            version = latest  # pruned by a newer export between reading the pointer and the files
+    return None
@@ -0,0 +1,122 @@
+"""
+Content-addressed cache of prediction results.
+
+Keys are the SHA-256 of the raw upload bytes plus the model version that produced the
+result, so a hot reload never serves a stale prediction: the new version simply misses.
+Entries live in an in-process LRU bounded by entry count and TTL, optionally backed by a
+SQLite file so they survive restarts and are shared by workers on the same host. The disk
+tier is best effort: a SQLite error (locked database, full disk, unwritable path) is counted
+in `<name>.cache_disk_errors` and the cache carries on in memory.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.core import metrics
+
+_PRUNE_EVERY = 256  # disk-tier puts between eviction sweeps
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, name: str, max_entries: int, ttl_s: float, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = metrics.counter(f"{name}.cache_hits")
+        self.misses = metrics.counter(f"{name}.cache_misses")
+        self.disk_hits = metrics.counter(f"{name}.cache_disk_hits")
+        self.size = metrics.gauge(f"{name}.cache_entries")
+        self.disk_errors = metrics.counter(f"{name}.cache_disk_errors")
+        self._db: Optional[sqlite3.Connection] = None
+        self._puts = 0
+        if path:
+            try:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)")
+            except (sqlite3.Error, OSError):
+                self.disk_errors.inc()
+                self.close()  # memory tier only
+
+    @staticmethod
+    def key(digest: str, version: str) -> str:
+        return f"{digest}:{version}"
+
+    def get(self, key: str) -> Optional[Dict[str, object]]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if now - stored_at <= self.ttl_s:
+                    self._entries.move_to_end(key)
+                    self.hits.inc()
+                    return dict(value)
+                del self._entries[key]
+                self.size.dec()
+            value = self._disk_get(key, now)
+            if value is None:
+                self.misses.inc()
+                return None
+            self.hits.inc()
+            self.disk_hits.inc()
+            self._remember(key, value, now)
+            return dict(value)
+
+    def put(self, key: str, value: Dict[str, object]) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, dict(value), now)
+            if self._db is not None:
+                try:
+                    self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?)", (key, json.dumps(value), now))
+                    self._puts += 1
+                    if self._puts % _PRUNE_EVERY == 0:
+                        self._disk_prune(now)
+                except sqlite3.Error:
+                    self.disk_errors.inc()
+
+    def _remember(self, key: str, value: Dict[str, object], now: float) -> None:
+        if key not in self._entries:
+            self.size.inc()
+        self._entries[key] = (now, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.size.dec()
+
+    def _disk_get(self, key: str, now: float) -> Optional[Dict[str, object]]:
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute("SELECT value, stored_at FROM results WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error:
+            self.disk_errors.inc()
+            return None
+        if row is None or now - row[1] > self.ttl_s:
+            return None
+        return json.loads(row[0])
+
+    def _disk_prune(self, now: float) -> None:
+        # The disk tier keeps up to 10x the in-memory entries; it is a restart warm-up, not a store.
+        self._db.execute("DELETE FROM results WHERE stored_at < ?", (now - self.ttl_s,))
+        self._db.execute(
+            "DELETE FROM results WHERE key NOT IN (SELECT key FROM results ORDER BY stored_at DESC LIMIT ?)",
+            (self.max_entries * 10,),
+        )
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
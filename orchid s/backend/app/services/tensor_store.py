@@ -0,0 +1,112 @@
+"""
+Append-only, memory-mapped store of preprocessed leaf images for re-scoring.
+
+Each row keeps the 224x224 RGB uint8 pixels the model input is normalized from, which is
+lossless for both preprocessing paths at a quarter of the float32 tensor size (147 KiB per
+image). Rows live in `pixels.u8`; a parallel `records.bin` holds the image's SHA-256, plant
+id and timestamp. A row counts once its record is written, so a crash mid-append leaves at
+most a torn pixel tail that the next writer truncates. Appends from several worker
+processes are serialized with flock; readers map the files without locking.
+"""
+import fcntl
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+ROW_SHAPE = (224, 224, 3)
+ROW_BYTES = int(np.prod(ROW_SHAPE))
+PLANT_ID_BYTES = 64
+# Digest as raw bytes: an "S32" field would drop trailing NUL bytes of the hash.
+RECORD = np.dtype([("digest", "u1", (32,)), ("plant_id", f"S{PLANT_ID_BYTES}"), ("stored_at", "<f8")])
+
+
+class TensorStore:
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.pixels_path = self.directory / "pixels.u8"
+        self.records_path = self.directory / "records.bin"
+        self.lock_path = self.directory / "store.lock"
+        for path in (self.pixels_path, self.records_path):
+            path.touch(exist_ok=True)
+        self._index: Dict[bytes, int] = {}
+        self._indexed = 0
+        self._maps: Tuple[int, Optional[np.ndarray], Optional[np.ndarray]] = (0, None, None)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return os.path.getsize(self.records_path) // RECORD.itemsize
+
+    def _mapped(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(pixels, records) memmaps covering every committed row; remapped when the store grows."""
+        n = len(self)
+        count, pixels, records = self._maps
+        if pixels is None or count != n:
+            if n:
+                pixels = np.memmap(self.pixels_path, dtype=np.uint8, mode="r", shape=(n,) + ROW_SHAPE)
+                records = np.memmap(self.records_path, dtype=RECORD, mode="r", shape=(n,))
+            else:
+                pixels, records = np.empty((0,) + ROW_SHAPE, np.uint8), np.empty(0, RECORD)
+            self._maps = (n, pixels, records)
+        return self._maps[1], self._maps[2]
+
+    def _refresh_index(self) -> None:
+        _, records = self._mapped()
+        raw = np.ascontiguousarray(records["digest"][self._indexed :]).tobytes()
+        for offset, row in enumerate(range(self._indexed, len(records))):
+            self._index.setdefault(raw[offset * 32 : offset * 32 + 32], row)
+        self._indexed = len(records)
+
+    def row_for(self, digest: str) -> Optional[int]:
+        with self._lock:
+            self._refresh_index()
+            return self._index.get(bytes.fromhex(digest))
+
+    def append(self, pixels: np.ndarray, digest: str, plant_id: Optional[str] = None) -> int:
+        """Store one image's pixels unless the same image is already stored; returns its row."""
+        if pixels.shape != ROW_SHAPE or pixels.dtype != np.uint8:
+            raise ValueError(f"Expected uint8 pixels of shape {ROW_SHAPE}, got {pixels.dtype} {pixels.shape}")
+        plant = (plant_id or "").encode()
+        if len(plant) > PLANT_ID_BYTES:
+            raise ValueError(f"plant_id longer than {PLANT_ID_BYTES} bytes")
+        key = bytes.fromhex(digest)
+        with self._lock, open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self._refresh_index()
+            if key in self._index:
+                return self._index[key]
+            row = len(self)
+            with open(self.pixels_path, "r+b") as fh:
+                fh.truncate(row * ROW_BYTES)  # drop a torn tail from a writer that died mid-append
+                fh.seek(row * ROW_BYTES)
+                fh.write(np.ascontiguousarray(pixels).tobytes())
+            record = np.array([(np.frombuffer(key, dtype=np.uint8), plant, time.time())], dtype=RECORD)
+            with open(self.records_path, "ab") as fh:
+                fh.write(record.tobytes())
+            self._index[key] = row
+            return row
+
+    def records(self) -> np.ndarray:
+        return self._mapped()[1]
+
+    def rows_for_plant(self, plant_id: str) -> np.ndarray:
+        return np.flatnonzero(self.records()["plant_id"] == plant_id.encode())
+
+    def pixels(self, rows) -> np.ndarray:
+        """Pixels of the given rows (index array or slice); slices are zero-copy views of the map."""
+        return self._mapped()[0][rows]
+
+    def iter_batches(self, rows: Optional[np.ndarray], batch_size: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """(row numbers, pixels) in batches over `rows`, or over every row when None."""
+        total = len(self.records()) if rows is None else len(rows)
+        for start in range(0, total, batch_size):
+            if rows is None:
+                chunk = np.arange(start, min(start + batch_size, total))
+                yield chunk, self.pixels(slice(start, start + len(chunk)))
+            else:
+                chunk = rows[start : start + batch_size]
+                yield chunk, self.pixels(chunk)
@@ -0,0 +1,91 @@
+import tarfile
+import zipfile
+from pathlib import PurePosixPath
+from typing import BinaryIO, Iterator, Sequence, Tuple
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tif", ".tiff", ".webp"}
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+def _is_image_name(name: str) -> bool:
+    path = PurePosixPath(name)
+    return path.suffix.lower() in IMAGE_SUFFIXES and not any(part.startswith(".") or part == "__MACOSX" for part in path.parts)
+
+
+def _read_limited(fh: BinaryIO, name: str, max_bytes: int) -> bytes:
+    data = fh.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise UploadTooLarge(f"{name} is larger than {max_bytes} bytes")
+    return data
+
+
+def _zip_members(fh: BinaryIO, max_bytes: int) -> Iterator[Tuple[str, object]]:
+    with zipfile.ZipFile(fh) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or not _is_image_name(info.filename):
+                continue
+            if info.file_size > max_bytes:
+                yield info.filename, UploadTooLarge(f"{info.filename} is larger than {max_bytes} bytes")
+                continue
+            with archive.open(info) as member:
+                try:
+                    data = _read_limited(member, info.filename, max_bytes)
+                except UploadTooLarge as exc:  # header understated the size
+                    data = exc
+            yield info.filename, data
+
+
+def _tar_members(fh: BinaryIO, max_bytes: int) -> Iterator[Tuple[str, object]]:
+    with tarfile.open(fileobj=fh, mode="r|*") as archive:  # stream mode: members are read in order, once
+        for member in archive:
+            if not member.isfile() or not _is_image_name(member.name):
+                continue
+            if member.size > max_bytes:
+                yield member.name, UploadTooLarge(f"{member.name} is larger than {max_bytes} bytes")
+                continue
+            yield member.name, _read_limited(archive.extractfile(member), member.name, max_bytes)
+
+
+def _archive_kind(fh: BinaryIO) -> str:
+    kind = ""
+    if zipfile.is_zipfile(fh):
+        kind = "zip"
+    else:
+        fh.seek(0)
+        if tarfile.is_tarfile(fh):
+            kind = "tar"
+    fh.seek(0)
+    return kind
+
+
+def iter_images(uploads: Sequence[Tuple[str, BinaryIO]], max_images: int, max_bytes: int) -> Iterator[Tuple[str, object]]:
+    """
+    Yield (name, bytes or exception) for every image in the uploads, one at a time.
+
+    A single zip/tar upload is expanded member by member, so only the image being read is
+    held in memory however large the archive is. Oversized or excess entries are yielded
+    as exceptions to be reported per item.
+    """
+    if len(uploads) == 1:
+        filename, fh = uploads[0]
+        kind = _archive_kind(fh)
+        if kind:
+            members = _zip_members(fh, max_bytes) if kind == "zip" else _tar_members(fh, max_bytes)
+            for count, (name, data) in enumerate(members):
+                if count >= max_images:
+                    yield name, UploadTooLarge(f"Archive has more than {max_images} images")
+                    return
+                yield name, data
+            return
+
+    for count, (filename, fh) in enumerate(uploads):
+        if count >= max_images:
+            yield filename, UploadTooLarge(f"More than {max_images} images uploaded")
+            return
+        try:
+            yield filename, _read_limited(fh, filename, max_bytes)
+        except UploadTooLarge as exc:
+            yield filename, exc
@@ -0,0 +1,136 @@
+"""
+Accuracy parity and speed of each DISEASE_BACKEND against the float32 eager model.
+
+Parity runs every backend over a held-out image set and reports top-1 agreement and the
+largest softmax difference versus eager; speed reports batch-1 latency (p50/p99) and
+batched images/sec. Backends whose dependencies are missing (e.g. onnxruntime) are skipped.
+
+Usage (from backend/):
+    python scripts/bench_disease_backends.py --images HELDOUT_DIR [--calibration CALIB_DIR]
+        [--backends eager,dynamic_int8,...] [--batch 16] [--iterations 50]
+
+static_int8 is calibrated on --calibration, or on the first quarter of --images (which is
+then left out of the parity set). Without --images, synthetic images are used, which only
+checks the numerics, not real accuracy. Exits non-zero when any backend's top-1 agreement
+is below --min-agreement.
+"""
+import argparse
+import copy
+import io
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import torch
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import disease, disease_backends, leaf_image  # noqa: E402
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png"}
+
+
+def _load_images(directory: Path, limit: int):
+    paths = sorted(p for p in directory.rglob("*") if p.suffix.lower() in IMAGE_SUFFIXES)[:limit]
+    return torch.stack([leaf_image.preprocess(p) for p in paths])
+
+
+def _synthetic_images(count: int, rng: np.random.Generator):
+    tensors = []
+    for _ in range(count):
+        base = rng.uniform(0, 1, size=(14, 14, 3)) * [120, 200, 90] + [20, 40, 10]
+        img = Image.fromarray(base.astype(np.uint8)).resize((640, 480), Image.BICUBIC)
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=90)
+        tensors.append(leaf_image.preprocess(buf.getvalue()))
+    return torch.stack(tensors)
+
+
+def _batches(images: torch.Tensor, size: int):
+    return [images[i : i + size] for i in range(0, len(images), size)]
+
+
+def _predict(fn, images: torch.Tensor, batch: int) -> torch.Tensor:
+    with torch.no_grad():
+        return torch.cat([torch.softmax(fn(chunk), dim=1) for chunk in _batches(images, batch)])
+
+
+def _speed(fn, images: torch.Tensor, batch: int, iterations: int):
+    one = images[:1]
+    many = images[:batch] if len(images) >= batch else images.repeat((batch + len(images) - 1) // len(images), 1, 1, 1)[:batch]
+    with torch.no_grad():
+        for _ in range(3):
+            fn(one)
+            fn(many)
+        latencies = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            fn(one)
+            latencies.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        for _ in range(max(iterations // 5, 1)):
+            fn(many)
+        ips = max(iterations // 5, 1) * len(many) / (time.perf_counter() - start)
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    return p50, p99, ips
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--images", type=Path, help="held-out image directory")
+    parser.add_argument("--calibration", type=Path, help="calibration image directory for static_int8")
+    parser.add_argument("--limit", type=int, default=512)
+    parser.add_argument("--backends", default=",".join(disease_backends.BACKENDS))
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--min-agreement", type=float, default=0.99)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    if args.images:
+        images = _load_images(args.images, args.limit)
+    else:
+        print("no --images: synthetic inputs, parity checks numerics only")
+        images = _synthetic_images(64, np.random.default_rng(0))
+    if args.calibration:
+        calibration = _load_images(args.calibration, args.limit)
+    else:
+        split = max(len(images) // 4, 1)
+        calibration, images = images[:split], images[split:]
+
+    model, version = disease._load_disease_model()[:2]
+    model = model[0]
+    reference = _predict(model, images, args.batch)
+    print(f"model {version}, {len(images)} held-out images, {len(calibration)} calibration images, torch threads {torch.get_num_threads()}")
+    print(f"{'backend':<14} {'top-1 agree':>11} {'max |dp|':>9} {'p50 ms':>8} {'p99 ms':>8} {'img/s':>8}")
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in args.backends.split(","):
+            try:
+                trunk = disease_backends.prepare(
+                    copy.deepcopy(model.trunk),
+                    backend,
+                    "cpu",
+                    calibration=_batches(calibration, args.batch),
+                    onnx_path=Path(tmp) / f"{backend}.onnx",
+                )
+                fn = disease_backends.SplitClassifier(trunk, model.head)
+                probs = _predict(fn, images, args.batch)
+            except Exception as exc:
+                print(f"{backend:<14} skipped: {type(exc).__name__}: {exc}")
+                continue
+            agreement = float((probs.argmax(1) == reference.argmax(1)).float().mean())
+            max_diff = float((probs - reference).abs().max())
+            p50, p99, ips = _speed(fn, images, args.batch, args.iterations)
+            failed |= agreement < args.min_agreement
+            print(f"{backend:<14} {agreement * 100:10.1f}% {max_diff:9.4f} {p50:8.2f} {p99:8.2f} {ips:8.1f}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+Firebase bridge latency: a new httpx client per call vs the shared pooled client.
+
+Starts a local stand-in for the Realtime Database (uvicorn in a child process, serving a
+`plants.json` tree of --plants entries) and fires GETs at it at several concurrency levels,
+once with a fresh `httpx.AsyncClient` per request (what services/env.py used to do) and once
+through `env.open_client()`. With --tls the stand-in serves HTTPS on a throwaway self-signed
+certificate (needs the openssl CLI), which adds the per-connection TLS handshake that real
+Firebase traffic pays.
+
+Usage (from backend/):
+    python scripts/bench_firebase_client.py [--tls] [--plants 200] [--requests 400] [--concurrency 1,16,64]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def _stand_in(plants: int):
+    tree = {
+        f"plant-{i:05d}": {"planting_date": "2025-01-01", "height_mm": 40 + i % 30, "cultivar": "Phalaenopsis", "updated_at": "2025-10-01T00:00:00"}
+        for i in range(plants)
+    }
+    body = json.dumps(tree).encode()
+
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        status, payload = (200, body) if scope["path"] == "/plants.json" else (200, b"null")
+        await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": payload})
+
+    return app
+
+
+def _serve(port: int, plants: int, certfile: str, keyfile: str) -> None:
+    import uvicorn
+
+    uvicorn.run(
+        _stand_in(plants),
+        host="127.0.0.1",
+        port=port,
+        log_level="warning",
+        ssl_certfile=certfile or None,
+        ssl_keyfile=keyfile or None,
+        backlog=4096,
+    )
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _self_signed(directory: Path):
+    cert, key = directory / "cert.pem", directory / "key.pem"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=localhost",
+         "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1", "-keyout", str(key), "-out", str(cert)],
+        check=True,
+        capture_output=True,
+    )
+    return str(cert), str(key)
+
+
+def _wait_ready(url: str, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1).raise_for_status()
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f"stand-in server did not come up at {url}")
+
+
+async def _run(fetch, requests: int, concurrency: int):
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with gate:
+            start = time.perf_counter()
+            await fetch()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    return np.percentile(latencies, 50), np.percentile(latencies, 99), requests / elapsed
+
+
+async def _bench(url: str, args) -> None:
+    from app.services import env
+
+    async def per_call():
+        async with httpx.AsyncClient(timeout=10) as client:
+            (await client.get(url)).raise_for_status()
+
+    shared = env.open_client()
+
+    async def pooled():
+        (await shared.get(url)).raise_for_status()
+
+    print(f"{'client':<10} {'concurrency':>11} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+    try:
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            for label, fetch in (("per-call", per_call), ("shared", pooled)):
+                await fetch()  # warm: the shared client opens its first connection here
+                p50, p99, rate = await _run(fetch, args.requests, concurrency)
+                print(f"{label:<10} {concurrency:>11} {p50:8.2f} {p99:8.2f} {rate:8.0f}")
+    finally:
+        await env.close_client()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tls", action="store_true", help="serve HTTPS with a self-signed certificate")
+    parser.add_argument("--plants", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", default="1,16,64")
+    parser.add_argument("--serve", nargs=4, metavar=("PORT", "PLANTS", "CERT", "KEY"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        port, plants, cert, key = args.serve
+        _serve(int(port), int(plants), cert, key)
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = _self_signed(Path(tmp)) if args.tls else ("", "")
+        if args.tls:
+            os.environ["SSL_CERT_FILE"] = cert  # both clients trust the throwaway certificate
+        port = _free_port()
+        scheme = "https" if args.tls else "http"
+        os.environ["FIREBASE_DB_URL"] = f"{scheme}://localhost:{port}"
+        server = subprocess.Popen([sys.executable, __file__, "--serve", str(port), str(args.plants), cert, key])
+        try:
+            url = f"{scheme}://localhost:{port}/plants.json"
+            _wait_ready(url)
+            print(f"stand-in: {url}, {args.plants} plants, {args.requests} requests per run")
+            asyncio.run(_bench(url, args))
+        finally:
+            server.terminate()
+            server.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Parity check and latency benchmark: decision grid vs the live growth RandomForest.
+
+Usage (from backend/):
+    python scripts/bench_growth_grid.py [--points 200000] [--repeat 200]
+
+Exits non-zero if any probed point differs between the grid and the forest.
+"""
+import argparse
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import growth, growth_grid  # noqa: E402
+
+
+def _probe_points(grid: growth_grid.DecisionGrid, n_random: int, rng: np.random.Generator) -> np.ndarray:
+    """Random points plus every split threshold and its float32 neighbours on both features."""
+    ages = rng.integers(-30, 400, size=n_random).astype(float)
+    scale = 10.0 ** rng.integers(0, 4, size=n_random)
+    heights = np.round(rng.uniform(-5, 120, size=n_random) * scale) / scale
+    points = [np.stack([ages, heights], axis=1)]
+
+    for f, edges in enumerate(grid.edges):
+        e32 = edges.astype(np.float32)
+        near = np.concatenate([e32, np.nextafter(e32, np.float32(-np.inf)), np.nextafter(e32, np.float32(np.inf)), edges])
+        other = rng.choice(points[0][:, 1 - f], size=len(near))
+        block = np.empty((len(near), 2))
+        block[:, f] = near
+        block[:, 1 - f] = other
+        points.append(block)
+    return np.concatenate(points)
+
+
+def _time(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--points", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    model, _ = growth.load_model()
+    start = time.perf_counter()
+    grid = growth.build_grid(save=False)
+    compile_s = time.perf_counter() - start
+
+    forest = model.predict_proba
+
+    X = _probe_points(grid, args.points, np.random.default_rng(0))
+    mismatched = int((grid.predict_proba(X) != forest(X)).any(axis=1).sum())
+    print(f"compiled {grid.proba.shape[:-1]} cells in {compile_s * 1000:.1f} ms")
+    print(f"parity: {len(X)} points, {mismatched} mismatches")
+
+    one = X[:1]
+    batch = X[:10_000]
+    print(f"single row  forest {_time(lambda: forest(one), args.repeat) * 1e3:8.3f} ms   grid {_time(lambda: grid.predict_proba(one), args.repeat) * 1e3:8.3f} ms")
+    reps = max(args.repeat // 20, 1)
+    print(f"10k rows    forest {_time(lambda: forest(batch), reps) * 1e3:8.3f} ms   grid {_time(lambda: grid.predict_proba(batch), reps) * 1e3:8.3f} ms")
+    return 1 if mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+Import cost of app.main per ENABLED_ROUTERS setting, measured with `python -X importtime`.
+
+Each configuration runs in a fresh interpreter (best of --repeat) and lists the heavy
+dependencies it ended up importing plus the costliest third-party packages. The "eager" row
+imports every service module up front the way app/services/__init__.py used to.
+
+Usage (from backend/):
+    python scripts/bench_import_time.py [--repeat 3] [--top 5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+HEAVY = ("torch", "torchvision", "pandas", "sklearn", "joblib", "httpx")
+
+CONFIGS = [
+    ("eager (all services)", "health,growth,disease,env,admin", "import app.services.growth, app.services.disease, app.services.env, app.main"),
+    ("all routers", "health,growth,disease,env,admin", "import app.main"),
+    ("growth only", "health,growth", "import app.main"),
+    ("disease only", "health,disease", "import app.main"),
+    ("env only", "health,env", "import app.main"),
+]
+
+
+def _measure(routers: str, code: str):
+    env = {**os.environ, "ENABLED_ROUTERS": routers}
+    probe = f"{code}; import sys; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = 0.0
+    packages = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        ms = int(cumulative) / 1000  # µs -> ms
+        if not name.startswith("  "):  # nested imports are indented under their importer
+            total += ms
+        package = name.strip().split(".")[0]
+        if package != "app":
+            packages[package] = max(packages.get(package, 0.0), ms)
+    return total, packages, proc.stdout.strip()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    for label, routers, code in CONFIGS:
+        runs = [_measure(routers, code) for _ in range(args.repeat)]
+        total, packages, heavy = min(runs, key=lambda run: run[0])
+        biggest = sorted(packages.items(), key=lambda item: -item[1])[: args.top]
+        print(f"{label:<22} {total:8.1f} ms   heavy: {heavy or '-'}")
+        print("    " + ", ".join(f"{name} {ms:.0f} ms" for name, ms in biggest))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Throughput and output parity: fast leaf preprocessing vs the reference transforms.Compose.
+
+The reference is the original path: full decode, convert("RGB"), Resize((224, 224)),
+ToTensor, Normalize. The fast path (app.services.leaf_image) decodes JPEGs at reduced DCT
+scale, so tensors are close but not bit-identical; parity is reported as the pixel error
+and, when weights are available, as top-1 agreement of the disease model.
+
+Usage (from backend/):
+    python scripts/bench_leaf_preprocess.py [--images DIR] [--count 12] [--size 4000x3000]
+
+Without --images, synthetic leaf-like JPEGs of --size are generated. Exits non-zero when the
+mean absolute difference exceeds --max-mean-diff (in normalized units).
+"""
+import argparse
+import io
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import torch
+from PIL import Image, ImageFilter
+from torchvision import transforms
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import leaf_image  # noqa: E402
+
+REFERENCE = transforms.Compose(
+    [
+        transforms.Resize((224, 224)),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
+    ]
+)
+
+
+def _reference(data: bytes) -> torch.Tensor:
+    return REFERENCE(Image.open(io.BytesIO(data)).convert("RGB"))
+
+
+def _synthetic_jpegs(count: int, size, rng: np.random.Generator):
+    """Textured green images with blotches, so JPEG and resampling behave like real photos."""
+    width, height = size
+    small = (width // 16, height // 16)
+    images = []
+    for _ in range(count):
+        base = rng.uniform(0, 1, size=(small[1], small[0], 3)) * [90, 160, 70] + [20, 50, 10]
+        img = Image.fromarray(base.astype(np.uint8)).resize(size, Image.BICUBIC)
+        noise = Image.fromarray(rng.integers(0, 40, size=(height, width, 3), dtype=np.uint8))
+        img = Image.blend(img, noise, 0.15).filter(ImageFilter.GaussianBlur(2))
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=90)
+        images.append(buf.getvalue())
+    return images
+
+
+def _throughput(fn, images, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for data in images:
+            fn(data)
+    return repeat * len(images) / (time.perf_counter() - start)
+
+
+def _top1_agreement(ref: torch.Tensor, fast: torch.Tensor):
+    try:
+        from app.services import disease
+
+        model, _, device = disease.get_model()
+    except FileNotFoundError:
+        return None
+    with torch.no_grad():
+        a = model(ref.to(device)).argmax(1)
+        b = model(fast.to(device)).argmax(1)
+    return float((a == b).float().mean())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--images", type=Path, help="directory of real images (jpg/png) to use instead")
+    parser.add_argument("--count", type=int, default=12)
+    parser.add_argument("--size", default="4000x3000", help="synthetic image size, WxH")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-mean-diff", type=float, default=0.05)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    if args.images:
+        paths = sorted(p for p in args.images.iterdir() if p.suffix.lower() in {".jpg", ".jpeg", ".png"})
+        images = [p.read_bytes() for p in paths[: args.count]]
+    else:
+        size = tuple(int(v) for v in args.size.lower().split("x"))
+        images = _synthetic_jpegs(args.count, size, np.random.default_rng(0))
+    if not images:
+        print("no images")
+        return 1
+
+    ref = torch.stack([_reference(d) for d in images])
+    fast = torch.stack([leaf_image.preprocess(d) for d in images])
+    diff = (ref - fast).abs()
+    mean_diff = float(diff.mean())
+    width, height = Image.open(io.BytesIO(images[0])).size
+    print(f"{len(images)} images, first {width}x{height}")
+    print(f"parity: mean |diff| {mean_diff:.4f}   p99 |diff| {float(np.percentile(diff.numpy(), 99)):.4f}   max |diff| {float(diff.max()):.4f}")
+    agreement = _top1_agreement(ref, fast)
+    if agreement is not None:
+        print(f"parity: disease model top-1 agreement {agreement * 100:.1f}%")
+
+    reference_ips = _throughput(_reference, images, args.repeat)
+    fast_ips = _throughput(leaf_image.preprocess, images, args.repeat)
+    print(f"reference {reference_ips:8.1f} img/s   fast {fast_ips:8.1f} img/s   ({fast_ips / reference_ips:.1f}x)")
+    return 1 if mean_diff > args.max_mean_diff else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Bulk plant writes: one PUT per plant vs multi-path PATCHes of the database root.
+
+Starts the Firebase stand-in with --delay-ms of simulated round trip, then writes --plants
+plants once with env.write_plant in a loop (what a gateway sync did through
+PUT /env/plants/{id}) and once with env.write_plants. Prints wall time and requests sent,
+checks the stored tree matches, and checks that PUT /env/plants:bulk and
+POST /env/plants:bulk-delete answer per item: an invalid key and a repeated id fail on
+their own while the rest are applied.
+
+Usage (from backend/):
+    python scripts/bench_plants_bulk.py [--plants 500] [--delay-ms 30] [--chunk 500] [--concurrency 4]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("ENABLED_ROUTERS", "env")
+
+import firebase_stand_in  # noqa: E402
+
+from app.core.config import get_settings  # noqa: E402
+from app.services import env  # noqa: E402
+
+failures = []
+
+
+def _check(ok: bool, message: str) -> None:
+    print(f"  {'ok  ' if ok else 'FAIL'} {message}")
+    if not ok:
+        failures.append(message)
+
+
+def _items(count: int, tag: str):
+    return [
+        {"id": f"gw-{tag}-{i:05d}", "height_mm": float(i % 90), "cultivar": "Vanda", "updated_at": "2025-10-21T00:00:00"}
+        for i in range(count)
+    ]
+
+
+async def _timed(url: str, call):
+    async with httpx.AsyncClient() as stats:
+        await stats.delete(f"{url}/_stats")
+        start = time.perf_counter()
+        result = await call()
+        elapsed = time.perf_counter() - start
+        return result, elapsed, (await stats.get(f"{url}/_stats")).json()["requests"]
+
+
+async def _run(url: str, args) -> None:
+    env.open_client()
+    raw = httpx.AsyncClient(base_url=url)
+    try:
+        one_by_one = _items(args.plants, "put")
+
+        async def sequential():
+            for item in one_by_one:
+                await env.write_plant(item)
+
+        _, seq_s, seq_requests = await _timed(url, sequential)
+        print(f"{'PUT per plant':<16} {seq_s * 1000:9.0f} ms {seq_requests:6d} requests")
+
+        bulk = _items(args.plants, "bulk")
+        (errors, patches), bulk_s, bulk_requests = await _timed(url, lambda: env.write_plants(bulk))
+        print(f"{'bulk PATCH':<16} {bulk_s * 1000:9.0f} ms {bulk_requests:6d} requests ({seq_s / bulk_s:.0f}x faster)")
+        _check(not any(errors) and patches == bulk_requests, f"{len(bulk)} plants written in {patches} PATCH request(s)")
+
+        stored = (await raw.get("/plants.json")).json()
+        _check(
+            all(stored.get(item["id"], {}).get("height_mm") == item["height_mm"] for item in bulk + one_by_one),
+            "stored plants match both ways of writing",
+        )
+
+        ids = [item["id"] for item in bulk]
+        (errors, patches), took, _ = await _timed(url, lambda: env.delete_plants(ids))
+        stored = (await raw.get("/plants.json")).json()
+        _check(not any(errors) and not any(plant_id in stored for plant_id in ids), f"{len(ids)} plants deleted in {patches} PATCH request(s), {took * 1000:.0f} ms")
+
+        print("endpoints (per-item results):")
+        from app.main import app
+
+        api = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api")
+        prefix = get_settings().api_prefix.rstrip("/")
+        body = {"items": [{"id": "gw-a", "height_mm": 1.0}, {"id": "bad.key", "height_mm": 2.0}, {"id": "gw-a", "height_mm": 3.0}, {"id": "gw-b"}]}
+        result = (await api.put(f"{prefix}/env/plants:bulk", json=body)).json()
+        statuses = [r["status"] for r in result["results"]]
+        stored = (await raw.get("/plants.json")).json()
+        _check(
+            statuses == ["written", "failed", "failed", "written"] and result["succeeded"] == 2 and result["requests"] == 1,
+            f"PUT /env/plants:bulk: {statuses}, {result['requests']} request",
+        )
+        _check(stored["gw-a"]["height_mm"] == 1.0 and "updated_at" in stored["gw-b"], "first of a repeated id kept, updated_at filled in")
+        result = (await api.post(f"{prefix}/env/plants:bulk-delete", json={"ids": ["gw-a", "gw-b", "never-existed"]})).json()
+        stored = (await raw.get("/plants.json")).json()
+        _check(
+            [r["status"] for r in result["results"]] == ["deleted"] * 3 and "gw-a" not in stored and "gw-b" not in stored,
+            f"POST /env/plants:bulk-delete: {result['succeeded']} deleted",
+        )
+        await api.aclose()
+    finally:
+        await raw.aclose()
+        await env.close_client()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--plants", type=int, default=500)
+    parser.add_argument("--delay-ms", type=float, default=30.0, help="simulated round trip to Firebase")
+    parser.add_argument("--chunk", type=int, default=500, help="FIREBASE_BULK_CHUNK")
+    parser.add_argument("--concurrency", type=int, default=4, help="FIREBASE_BULK_CONCURRENCY")
+    args = parser.parse_args()
+
+    with firebase_stand_in.running(plants=100, extra_bytes=16, delay_ms=args.delay_ms) as url:
+        os.environ.update(FIREBASE_DB_URL=url, FIREBASE_BULK_CHUNK=str(args.chunk), FIREBASE_BULK_CONCURRENCY=str(args.concurrency))
+        get_settings.cache_clear()
+        print(f"{args.plants} plants, {args.delay_ms:.0f} ms round trip, chunks of {args.chunk}, {args.concurrency} in flight")
+        asyncio.run(_run(url, args))
+    print("all checks passed" if not failures else f"{len(failures)} check(s) failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Latency and recall of /disease/similar's feature index on a synthetic collection.
+
+Builds an index of --rows clustered random 1280-d vectors in a temporary directory (the size
+of MobileNetV3-large's penultimate layer), then times top-k queries with the brute-force scan
+and, after partitioning, with the IVF index at several nprobe values. Recall is the share of
+the brute-force top-k that the IVF search also returns.
+
+Usage (from backend/):
+    python scripts/bench_similar_index.py [--rows 1000000] [--queries 50] [--k 10] [--nprobe 4,8,16]
+"""
+import argparse
+import hashlib
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.embedding_index import EmbeddingIndex, Entry  # noqa: E402
+
+DIM = 1280
+CLUSTERS = 500
+
+
+def _fill(index: EmbeddingIndex, rows: int, rng: np.random.Generator, chunk: int = 50000) -> np.ndarray:
+    centers = rng.normal(size=(CLUSTERS, DIM)).astype(np.float32)
+    for start in range(0, rows, chunk):
+        n = min(chunk, rows - start)
+        vectors = centers[rng.integers(0, CLUSTERS, n)] + rng.normal(scale=0.6, size=(n, DIM)).astype(np.float32)
+        entries = [
+            Entry(hashlib.sha256(str(start + i).encode()).hexdigest(), None, 0, 1.0, vector) for i, vector in enumerate(vectors)
+        ]
+        index.append_many(entries)
+    return centers
+
+
+def _time(index: EmbeddingIndex, queries: np.ndarray, k: int, nprobe: int):
+    latencies, results, scanned = [], [], 0
+    for query in queries:
+        start = time.perf_counter()
+        rows, _, n = index.search(query, k, nprobe=nprobe)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(set(rows.tolist()))
+        scanned += n
+    return np.percentile(latencies, 50), np.percentile(latencies, 99), scanned / len(queries), results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", default="4,8,16")
+    parser.add_argument("--lists", type=int, help="IVF partitions (default: sqrt of --rows)")
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = EmbeddingIndex(tmp)
+        start = time.perf_counter()
+        centers = _fill(index, args.rows, rng)
+        print(f"{len(index)} rows, {index.vectors_path.stat().st_size / 2**20:.0f} MiB float16, filled in {time.perf_counter() - start:.1f} s")
+        queries = centers[rng.integers(0, CLUSTERS, args.queries)] + rng.normal(scale=0.6, size=(args.queries, DIM)).astype(np.float32)
+        print(f"torch threads {torch.get_num_threads()}, top-{args.k} of {args.queries} queries")
+        print(f"{'search':<16} {'p50 ms':>8} {'p99 ms':>8} {'rows/query':>11} {'recall':>7}")
+
+        p50, p99, scanned, exact = _time(index, queries, args.k, nprobe=0)
+        print(f"{'brute force':<16} {p50:8.2f} {p99:8.2f} {scanned:11.0f} {1:7.3f}")
+
+        start = time.perf_counter()
+        partitions = index.build_partitions(lists=args.lists)
+        print(f"(IVF: {len(partitions.centroids)} partitions built in {time.perf_counter() - start:.1f} s)")
+        for nprobe in (int(n) for n in args.nprobe.split(",")):
+            p50, p99, scanned, found = _time(index, queries, args.k, nprobe=nprobe)
+            recall = np.mean([len(a & b) / max(len(a), 1) for a, b in zip(exact, found)])
+            print(f"{f'ivf nprobe={nprobe}':<16} {p50:8.2f} {p99:8.2f} {scanned:11.0f} {recall:7.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Per-worker memory with and without MODEL_MMAP, the way `uvicorn --workers N` runs.
+
+Starts N worker processes that each load the growth forest and the disease model and run
+one inference, then reads RSS/PSS/private memory from /proc/<pid>/smaps_rollup while all
+workers are alive. PSS splits shared pages between the processes mapping them, so it is the
+number that drops when the model pages are shared. Linux only.
+
+Usage (from backend/):
+    python scripts/bench_worker_memory.py [--workers 4]
+
+Without DISEASE_WEIGHTS_PATH a randomly initialised checkpoint is written to a temp dir.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _worker(env, load_models, ready, done):
+    os.environ.update(env)
+    sys.path.insert(0, str(BACKEND_DIR))
+    import warnings
+
+    warnings.simplefilter("ignore")
+    from app.services import disease, growth
+
+    if load_models:
+        growth.classify_growth("2025-01-01", "2025-03-01", 12.0, include_model=True)
+        disease.warm_up()
+    ready.put(os.getpid())
+    done.wait()
+
+
+def _smaps_kb(pid: int):
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as fh:
+        for line in fh:
+            parts = line.split()
+            if len(parts) >= 3 and parts[-1] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    private = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return fields.get("Rss", 0), fields.get("Pss", 0), private
+
+
+def _run(label: str, env, workers: int, load_models: bool = True):
+    ctx = mp.get_context("spawn")
+    ready, done = ctx.Queue(), ctx.Event()
+    procs = [ctx.Process(target=_worker, args=(env, load_models, ready, done)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    pids = [ready.get(timeout=300) for _ in procs]
+    rows = [_smaps_kb(pid) for pid in pids]
+    done.set()
+    for p in procs:
+        p.join()
+    rss, pss, private = (sum(col) / len(rows) / 1024 for col in zip(*rows))
+    print(f"{label:<22} RSS {rss:8.1f} MiB   PSS {pss:8.1f} MiB   private {private:8.1f} MiB   (mean per worker)")
+    return pss
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    env = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        if not os.environ.get("DISEASE_WEIGHTS_PATH"):
+            sys.path.insert(0, str(BACKEND_DIR))
+            import torch
+
+            from app.services import disease
+
+            weights = Path(tmp) / "plant_village.pth"
+            torch.save(disease._build_model(len(disease.PLANT_VILLAGE_LABELS)).state_dict(), weights)
+            env["DISEASE_WEIGHTS_PATH"] = str(weights)
+
+        sys.path.insert(0, str(BACKEND_DIR))
+        from app.services import growth
+
+        growth.export_packed_forest()
+
+        print(f"{args.workers} workers")
+        base = _run("imports only", {**env, "MODEL_MMAP": "false"}, args.workers, load_models=False)
+        before = _run("private (default)", {**env, "MODEL_MMAP": "false"}, args.workers)
+        after = _run("MODEL_MMAP=true", {**env, "MODEL_MMAP": "true"}, args.workers)
+        print(f"model PSS per worker: {before - base:.1f} MiB -> {after - base:.1f} MiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Check the streaming mirror of /plants (FIREBASE_STREAM=true) against the local stand-in.
+
+Starts the stand-in with a 1 s keep-alive and follows /plants with env.start_mirror(), then
+checks that:
+- the first snapshot matches a plain GET of the tree;
+- PUT, multi-path PATCH and DELETE writes made directly against the stand-in (not through
+  the API) reach the mirror;
+- a write through env.write_plant is readable at once;
+- after the stand-in drops the stream, a write made while disconnected arrives with the resync;
+- a stalled stream makes the mirror stale, reads fall back to REST, and the mirror reconnects.
+It prints read latencies from the mirror next to the REST download they replace, and how long
+the stand-in's writes took to reach the mirror.
+
+Usage (from backend/):
+    python scripts/check_plants_mirror.py [--plants 5000] [--extra-bytes 256] [--reads 2000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ["FIREBASE_PLANTS_TTL_S"] = "0"
+os.environ["FIREBASE_STREAM_STALE_S"] = "3"
+
+import firebase_stand_in  # noqa: E402
+
+from app.core import metrics  # noqa: E402
+from app.core.config import get_settings  # noqa: E402
+from app.services import env  # noqa: E402
+
+failures = []
+
+
+def _check(ok: bool, message: str) -> None:
+    print(f"  {'ok  ' if ok else 'FAIL'} {message}")
+    if not ok:
+        failures.append(message)
+
+
+def _live() -> bool:
+    return bool(metrics.snapshot()["env.mirror_live"])
+
+
+async def _until(condition, timeout: float = 10.0) -> float:
+    """Seconds until `condition()` holds, polled every millisecond; inf on timeout."""
+    start = time.perf_counter()
+    while not condition():
+        if time.perf_counter() - start > timeout:
+            return float("inf")
+        await asyncio.sleep(0.001)
+    return time.perf_counter() - start
+
+
+async def _after(write, condition) -> float:
+    """Seconds from sending `write` until `condition()` holds."""
+    start = time.perf_counter()
+    await write
+    return time.perf_counter() - start + await _until(condition)
+
+
+async def _latency_us(call, reads: int):
+    times = []
+    for _ in range(reads):
+        start = time.perf_counter()
+        await call()
+        times.append((time.perf_counter() - start) * 1e6)
+    return np.percentile(times, 50), np.percentile(times, 99)
+
+
+def _height(plant_id: str):
+    plant = env._mirror.plants.get(plant_id)
+    return plant.height_mm if plant is not None else None
+
+
+async def _run(url: str, args) -> None:
+    env.open_client()
+    raw = httpx.AsyncClient(base_url=url)
+    try:
+        await env.stop_mirror()
+        p50, p99 = await _latency_us(env.list_plants, max(args.reads // 100, 5))
+        print(f"REST list_plants (no mirror): p50 {p50 / 1000:.1f} ms, p99 {p99 / 1000:.1f} ms")
+
+        env.start_mirror()
+        synced = await _until(_live)
+        _check(synced < 10, f"first snapshot in {synced * 1000:.0f} ms")
+        expected = (await raw.get("/plants.json")).json()
+        mirrored = {p.id: p for p in await env.list_plants()}
+        _check(set(mirrored) == set(expected) and mirrored["plant-000007"].height_mm == expected["plant-000007"]["height_mm"], f"snapshot has the {len(mirrored)} plants of the tree")
+
+        reads_before = metrics.counter("env.plants_mirror_reads").snapshot()
+        p50, p99 = await _latency_us(env.list_plants, args.reads)
+        _check(metrics.counter("env.plants_mirror_reads").snapshot() - reads_before == args.reads, f"mirror list_plants: p50 {p50:.0f} us, p99 {p99:.0f} us")
+        p50, p99 = await _latency_us(lambda: env.query_plants(limit=100, cursor="plant-001000"), args.reads)
+        print(f"  mirror query_plants(limit=100): p50 {p50:.0f} us, p99 {p99:.0f} us")
+        p50, p99 = await _latency_us(lambda: env.query_plants(cultivar="Vanda", limit=100), args.reads // 10)
+        print(f"  mirror query_plants(cultivar, limit=100): p50 {p50:.0f} us, p99 {p99:.0f} us")
+
+        print("writes made directly against the stand-in (time from sending the write):")
+        took = await _after(raw.put("/plants/plant-new-1.json", json={"height_mm": 11.5, "cultivar": "Vanda"}), lambda: _height("plant-new-1") == 11.5)
+        _check(took < 2, f"PUT of a new plant reached the mirror in {took * 1000:.1f} ms")
+        took = await _after(raw.put("/plants/plant-000001/height_mm.json", json=77.0), lambda: _height("plant-000001") == 77.0)
+        _check(took < 2, f"PUT of one child reached the mirror in {took * 1000:.1f} ms")
+        took = await _after(
+            raw.patch("/.json", json={"plants/plant-000002/height_mm": 66.0, "plants/plant-000003": None}),
+            lambda: _height("plant-000002") == 66.0 and "plant-000003" not in env._mirror.plants,
+        )
+        _check(took < 2, f"multi-path PATCH from the root (update + delete) reached the mirror in {took * 1000:.1f} ms")
+        took = await _after(raw.patch("/plants/plant-000004.json", json={"height_mm": 55.0}), lambda: _height("plant-000004") == 55.0)
+        _check(took < 2, f"PATCH of one plant reached the mirror in {took * 1000:.1f} ms")
+        took = await _after(raw.delete("/plants/plant-new-1.json"), lambda: "plant-new-1" not in env._mirror.plants)
+        _check(took < 2, f"DELETE reached the mirror in {took * 1000:.1f} ms")
+        page, next_cursor = await env.query_plants(limit=3, cursor="plant-000001")
+        _check([p.id for p in page] == ["plant-000002", "plant-000004", "plant-000005"] and next_cursor == "plant-000005", f"mirror page after the writes: {[p.id for p in page]}")
+
+        await env.write_plant({"id": "plant-local", "height_mm": 9.0, "updated_at": "2025-10-20T00:00:00"})
+        _check(any(p.id == "plant-local" for p in await env.list_plants()), "env.write_plant is readable from the mirror at once")
+
+        print("reconnect and resync:")
+        reconnects = metrics.counter("env.mirror_reconnects").snapshot()
+        await raw.delete("/_streams")
+        dropped = await _until(lambda: not env._mirror.synced, timeout=5)
+        await raw.put("/plants/plant-missed.json", json={"height_mm": 33.0})
+        took = await _until(lambda: _live() and _height("plant-missed") == 33.0)
+        _check(dropped < 5 and took < 10, f"stream dropped; the write made meanwhile arrived with the resync {took * 1000:.0f} ms later")
+        _check(metrics.counter("env.mirror_reconnects").snapshot() == reconnects + 1, "one reconnect counted")
+
+        print("staleness:")
+        await raw.post("/_streams/stall")
+        stale = await _until(lambda: not _live(), timeout=10)
+        age = metrics.snapshot()["env.mirror_age_s"]
+        misses = metrics.counter("env.plants_cache_misses").snapshot()
+        await env.list_plants()
+        fell_back = metrics.counter("env.plants_cache_misses").snapshot() - misses
+        _check(stale < 10 and fell_back == 1, f"silent stream marked stale after {stale:.1f} s (age {age:.1f} s); reads fell back to REST")
+        took = await _until(_live, timeout=15)
+        _check(took < 15, f"reconnected and live again {took:.1f} s later")
+    finally:
+        await raw.aclose()
+        await env.close_client()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--plants", type=int, default=5000)
+    parser.add_argument("--extra-bytes", type=int, default=256)
+    parser.add_argument("--reads", type=int, default=2000)
+    args = parser.parse_args()
+
+    with firebase_stand_in.running(plants=args.plants, extra_bytes=args.extra_bytes, keepalive=1.0) as url:
+        os.environ["FIREBASE_DB_URL"] = url
+        get_settings.cache_clear()
+        asyncio.run(_run(url, args))
+    print("all checks passed" if not failures else f"{len(failures)} check(s) failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
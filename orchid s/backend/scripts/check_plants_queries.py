@@ -0,0 +1,147 @@
+"""
+Check that /env/plants queries are pushed down to Firebase, against the local stand-in.
+
+For each query it prints the response bytes the stand-in sent, and it fails (exit 1) if:
+- a first page's bytes are not proportional to its size;
+- walking every page with the cursor misses or repeats a plant;
+- a filter's or projection's results differ from filtering the full tree locally;
+- a filter without an index rule does not fall back to the full tree.
+The plants cache is disabled (FIREBASE_PLANTS_TTL_S=0) so every query reaches the stand-in.
+
+Usage (from backend/):
+    python scripts/check_plants_queries.py [--plants 5000] [--extra-bytes 512]
+"""
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ["FIREBASE_PLANTS_TTL_S"] = "0"
+
+import firebase_stand_in  # noqa: E402
+
+from app.core import metrics  # noqa: E402
+from app.core.config import get_settings  # noqa: E402
+from app.services import env  # noqa: E402
+
+failures = []
+
+
+def _check(ok: bool, message: str) -> None:
+    print(f"  {'ok  ' if ok else 'FAIL'} {message}")
+    if not ok:
+        failures.append(message)
+
+
+def _matches_all(plant, cultivar: str, low: str, high: str) -> bool:
+    return plant.cultivar == cultivar and plant.updated_at is not None and low <= plant.updated_at <= high
+
+
+async def _measured(url: str, call):
+    async with httpx.AsyncClient() as stats:
+        await stats.delete(f"{url}/_stats")
+        result = await call()
+        sent = (await stats.get(f"{url}/_stats")).json()
+    return result, sent["bytes_sent"], sent["requests"]
+
+
+async def _run(url: str, args) -> None:
+    env.open_client()
+    try:
+        everything, full_bytes, _ = await _measured(url, env.list_plants)
+        per_plant = full_bytes / len(everything)
+        print(f"full tree: {len(everything)} plants, {full_bytes} bytes ({per_plant:.0f} per plant)")
+
+        print("first pages (orderBy $key + limitToFirst):")
+        for size in (10, 100, 1000):
+            (page, cursor), sent, _ = await _measured(url, lambda: env.query_plants(limit=size))
+            expected = (size + 1) * per_plant  # one look-ahead row tells whether there is a next page
+            _check(len(page) == size and cursor == page[-1].id, f"limit={size}: {len(page)} plants, next cursor {cursor}")
+            _check(0.8 * expected <= sent <= 1.2 * expected, f"limit={size}: {sent} bytes, {sent / full_bytes:.2%} of the full tree")
+
+        seen, cursor, pages, walked = [], None, 0, 0
+        while True:
+            (page, cursor), sent, _ = await _measured(url, lambda: env.query_plants(limit=500, cursor=cursor))
+            seen += [p.id for p in page]
+            pages, walked = pages + 1, walked + sent
+            if cursor is None:
+                break
+        ids = sorted(p.id for p in everything)
+        _check(sorted(seen) == ids and len(seen) == len(set(seen)), f"cursor walk: {pages} pages, {len(seen)} plants, {walked} bytes")
+
+        cultivar = firebase_stand_in.CULTIVARS[0]
+        (found, _), sent, _ = await _measured(url, lambda: env.query_plants(cultivar=cultivar))
+        expected = sorted(p.id for p in everything if p.cultivar == cultivar)
+        _check([p.id for p in found] == expected, f"cultivar={cultivar}: {len(found)} plants, {sent} bytes ({sent / full_bytes:.0%})")
+
+        low, high = "2025-10-05", "2025-10-08T23:59:59"
+        (found, _), sent, _ = await _measured(url, lambda: env.query_plants(updated_from=low, updated_to=high))
+        expected = sorted(p.id for p in everything if p.updated_at and low <= p.updated_at <= high)
+        _check([p.id for p in found] == expected, f"updated_at in [{low}, {high}]: {len(found)} plants, {sent} bytes ({sent / full_bytes:.0%})")
+
+        (found, _), sent, _ = await _measured(url, lambda: env.query_plants(cultivar=cultivar, updated_from=low, updated_to=high, limit=20))
+        both = [p for p in expected if next(q for q in everything if q.id == p).cultivar == cultivar][:20]
+        _check([p.id for p in found] == both, f"cultivar + updated_at, limit=20: {len(found)} plants, {sent} bytes")
+
+        async with httpx.AsyncClient(base_url=url) as raw:  # legacy records, stored under alias names
+            await raw.patch("/plants.json", json={"legacy-1": {"variety": cultivar, "timestamp": "2025-10-06T00:00:00"}, "legacy-2": {"variety": cultivar, "recorded_at": "2025-10-07T00:00:00"}})
+        (pushed, _), sent, _ = await _measured(url, lambda: env.query_plants(cultivar=cultivar, updated_from=low, updated_to=high))
+        everything = await env.list_plants()  # TTL 0: a fresh download, filtered in memory below
+        expected = sorted(p.id for p in everything if _matches_all(p, cultivar, low, high))
+        _check([p.id for p in pushed] == expected and {"legacy-1", "legacy-2"} <= set(expected), f"alias fields (variety, timestamp, recorded_at): {len(pushed)} plants, same as in memory")
+        async with httpx.AsyncClient(base_url=url) as raw:
+            await raw.patch("/plants.json", json={"legacy-1": None, "legacy-2": None})
+        everything = await env.list_plants()
+
+        (found, cursor), sent, _ = await _measured(url, lambda: env.query_plants(cursor=ids[10]))
+        _check(
+            [p.id for p in found] == ids[11:] and cursor is None and all(p.height_mm is not None for p in found),
+            f"cursor without limit: {len(found)} full records after {ids[10]}, {sent} bytes",
+        )
+
+        (found, _), sent, _ = await _measured(url, lambda: env.query_plants(fields=["id"]))
+        _check(sorted(p.id for p in found) == ids, f"ids only (shallow=true): {sent} bytes ({sent / full_bytes:.0%})")
+
+        (found, _), _, _ = await _measured(url, lambda: env.query_plants(limit=5, fields=["height_mm"]))
+        shown = [p.model_dump(exclude_unset=True) for p in found]
+        _check(all(set(p) == {"id", "height_mm"} for p in shown), f"fields=height_mm: {shown[0]}")
+    finally:
+        await env.close_client()
+
+
+async def _run_without_indexes(url: str) -> None:
+    env.open_client()
+    try:
+        before = metrics.counter("env.plants_query_fallbacks").snapshot()
+        cultivar = firebase_stand_in.CULTIVARS[1]
+        found, _ = await env.query_plants(cultivar=cultivar)
+        fell_back = metrics.counter("env.plants_query_fallbacks").snapshot() - before
+        _check(fell_back == 1 and all(p.cultivar == cultivar for p in found), f"no .indexOn rule: fell back to the full tree ({len(found)} plants)")
+    finally:
+        await env.close_client()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--plants", type=int, default=5000)
+    parser.add_argument("--extra-bytes", type=int, default=512)
+    args = parser.parse_args()
+
+    with firebase_stand_in.running(plants=args.plants, extra_bytes=args.extra_bytes) as url:
+        os.environ["FIREBASE_DB_URL"] = url
+        get_settings.cache_clear()
+        asyncio.run(_run(url, args))
+    with firebase_stand_in.running(plants=200, extra_bytes=16, indexes="") as url:
+        os.environ["FIREBASE_DB_URL"] = url
+        get_settings.cache_clear()
+        asyncio.run(_run_without_indexes(url))
+    print("all checks passed" if not failures else f"{len(failures)} check(s) failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Distill the PlantVillage mobilenet_v3_large into a mobilenet_v3_small first-stage model.
+
+The student learns the teacher's softened class probabilities (no labels needed) over a
+folder of leaf images. 10% of the images are held out; for several confidence thresholds the
+script reports how many images the student would answer alone and how often it agrees with
+the teacher on those, to pick DISEASE_CASCADE_THRESHOLD.
+
+Usage (from backend/):
+    python scripts/distill_cascade_model.py --images LEAF_DIR [--out models/plant_village_small.pth]
+        [--epochs 5] [--pretrained]
+
+Then serve it with DISEASE_CASCADE_WEIGHTS_PATH=models/plant_village_small.pth.
+"""
+import argparse
+import os
+import random
+import sys
+from pathlib import Path
+
+os.environ["DISEASE_BACKEND"] = "eager"  # the teacher must be the float model
+
+import torch  # noqa: E402
+import torch.nn.functional as F  # noqa: E402
+from torchvision import models  # noqa: E402
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services import disease, leaf_image  # noqa: E402
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png"}
+THRESHOLDS = (0.5, 0.6, 0.7, 0.8, 0.9, 0.95)
+
+
+class _Images(torch.utils.data.Dataset):
+    def __init__(self, paths, augment: bool):
+        self.paths = paths
+        self.augment = augment
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, i):
+        tensor = leaf_image.preprocess(self.paths[i])
+        if self.augment and random.random() < 0.5:
+            tensor = tensor.flip(-1)
+        return tensor
+
+
+def _student(pretrained: bool) -> torch.nn.Module:
+    if not pretrained:
+        return disease._build_model(len(disease.PLANT_VILLAGE_LABELS), arch="small")
+    model = models.mobilenet_v3_small(weights="DEFAULT")
+    model.classifier[3] = torch.nn.Linear(model.classifier[3].in_features, len(disease.PLANT_VILLAGE_LABELS))
+    return model
+
+
+def _report(student, teacher, loader) -> None:
+    student.eval()
+    confidence, agree = [], []
+    with torch.no_grad():
+        for batch in loader:
+            probs = F.softmax(student(batch), dim=1)
+            c, i = probs.max(dim=1)
+            confidence.append(c)
+            agree.append(i == teacher(batch).argmax(dim=1))
+    confidence, agree = torch.cat(confidence), torch.cat(agree)
+    print(f"held-out {len(agree)} images, overall agreement with teacher {agree.float().mean() * 100:.1f}%")
+    for threshold in THRESHOLDS:
+        answered = confidence >= threshold
+        share = answered.float().mean() * 100
+        agreement = agree[answered].float().mean() * 100 if answered.any() else float("nan")
+        print(f"  threshold {threshold:.2f}: first stage answers {share:5.1f}%, agreement there {agreement:5.1f}%")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--images", type=Path, required=True)
+    parser.add_argument("--out", type=Path, default=BACKEND_DIR / "models" / "plant_village_small.pth")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--temperature", type=float, default=4.0)
+    parser.add_argument("--pretrained", action="store_true", help="start from ImageNet weights (downloads them)")
+    args = parser.parse_args()
+
+    paths = sorted(p for p in args.images.rglob("*") if p.suffix.lower() in IMAGE_SUFFIXES)
+    if len(paths) < 10:
+        print(f"need at least 10 images under {args.images}, found {len(paths)}")
+        return 1
+    random.Random(0).shuffle(paths)
+    split = max(len(paths) // 10, 1)
+    train = torch.utils.data.DataLoader(_Images(paths[split:], augment=True), batch_size=args.batch, shuffle=True)
+    held_out = torch.utils.data.DataLoader(_Images(paths[:split], augment=False), batch_size=args.batch)
+
+    teacher, _, _ = disease.get_model()
+    student = _student(args.pretrained)
+    optimizer = torch.optim.AdamW(student.parameters(), lr=args.lr)
+    scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(optimizer, T_max=args.epochs * len(train))
+    t = args.temperature
+
+    for epoch in range(args.epochs):
+        student.train()
+        total = 0.0
+        for batch in train:
+            with torch.no_grad():
+                soft_targets = F.softmax(teacher(batch) / t, dim=1)
+            loss = F.kl_div(F.log_softmax(student(batch) / t, dim=1), soft_targets, reduction="batchmean") * t * t
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            scheduler.step()
+            total += loss.item() * len(batch)
+        print(f"epoch {epoch + 1}/{args.epochs}  distillation loss {total / len(train.dataset):.4f}")
+
+    _report(student, teacher, held_out)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    torch.save(student.state_dict(), args.out)
+    print(f"saved {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,355 @@
+"""
+Local stand-in for the Firebase Realtime Database REST API, for the env bridge's check scripts.
+
+Serves an in-memory JSON tree over `/<path>.json` with the parts of the REST API the bridge
+uses: GET with `shallow`, `orderBy` ("$key" or a child), `startAt` / `endAt` / `equalTo`,
+`limitToFirst` / `limitToLast`, `X-Firebase-ETag` and `If-None-Match`; PUT, PATCH and DELETE.
+Ordering by a child that is not listed in --index fails with Firebase's "Index not defined"
+400, as it does without an `.indexOn` rule. Responses count their body bytes in
+`GET /_stats` (reset with `DELETE /_stats`).
+
+A GET with `Accept: text/event-stream` streams the location like Firebase does: a `put` of the
+whole node at "/", then `put` / `patch` events for every write below it and a `keep-alive`
+every --keepalive seconds. `DELETE /_streams` closes the open streams; `POST /_streams/stall`
+silences them without closing, as a dead connection would. --delay-ms holds every request
+that long before answering, to stand in for the round trip to a real database.
+
+Usage (from backend/):
+    python scripts/firebase_stand_in.py --port 9000 --plants 5000 [--extra-bytes 512] [--index cultivar,variety,...] [--keepalive 30] [--delay-ms 0]
+
+Check scripts start it in a child process with `running(...)`.
+"""
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import parse_qs
+
+CULTIVARS = ("Phalaenopsis", "Dendrobium", "Cattleya", "Oncidium", "Vanda")
+# The child names the env bridge filters on, legacy aliases included.
+INDEXES = "cultivar,variety,updated_at,timestamp,recorded_at"
+
+
+def make_plants(count: int, extra_bytes: int, seed: int = 0) -> Dict[str, object]:
+    rng = random.Random(seed)
+    return {
+        f"plant-{i:06d}": {
+            "planting_date": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}",
+            "height_mm": round(rng.uniform(5, 120), 1),
+            "cultivar": CULTIVARS[i % len(CULTIVARS)],
+            "updated_at": f"2025-10-{1 + rng.randrange(28):02d}T{rng.randrange(24):02d}:00:00",
+            "notes": "x" * extra_bytes,
+        }
+        for i in range(count)
+    }
+
+
+def _key_order(key: str):
+    try:
+        number = int(key)
+    except ValueError:
+        return (1, 0, key)
+    return (0, number, "") if str(number) == key and -(2**31) <= number < 2**31 else (1, 0, key)
+
+
+def _value_order(value):
+    """Firebase child order: missing/null, false, true, numbers, strings, objects."""
+    if value is None:
+        return (0, 0)
+    if value is False or value is True:
+        return (1, int(value))
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, str):
+        return (3, value)
+    return (4, 0)
+
+
+class _Stream:
+    def __init__(self, parts: List[str]):
+        self.parts = parts
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.stalled = False
+
+
+def _relative(parts: List[str]) -> str:
+    return "/" + "/".join(parts)
+
+
+class Database:
+    def __init__(self, tree: Dict[str, object], indexes: List[str]):
+        self.tree = tree
+        self.indexes = set(indexes)
+        self.bytes_sent = 0
+        self.requests = 0
+        self.streams: List[_Stream] = []
+
+    def _node(self, parts: List[str]):
+        node = self.tree
+        for part in parts:
+            if not isinstance(node, dict) or part not in node:
+                return None
+            node = node[part]
+        return node
+
+    def _set(self, parts: List[str], value) -> None:
+        if not parts:
+            self.tree = value if isinstance(value, dict) else {}
+            return
+        node = self.tree
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+            if not isinstance(node, dict):
+                return
+        if value is None:
+            node.pop(parts[-1], None)
+        else:
+            node[parts[-1]] = value
+
+    def put(self, parts: List[str], value) -> None:
+        self._set(parts, value)
+        for stream in self.streams:
+            self._notify_put(stream, parts, value)
+
+    def patch(self, parts: List[str], updates: Dict[str, object]) -> None:
+        for relative, value in updates.items():
+            self._set(parts + [p for p in relative.split("/") if p], value)
+        for stream in self.streams:
+            depth = len(stream.parts)
+            if parts[:depth] == stream.parts:
+                stream.queue.put_nowait(("patch", _relative(parts[depth:]), updates))
+            else:  # the write starts above the stream: each update it reaches is a put
+                for relative, value in updates.items():
+                    self._notify_put(stream, parts + [p for p in relative.split("/") if p], value)
+
+    def _notify_put(self, stream: _Stream, parts: List[str], value) -> None:
+        depth = len(stream.parts)
+        if parts[:depth] == stream.parts:
+            stream.queue.put_nowait(("put", _relative(parts[depth:]), value))
+        elif stream.parts[: len(parts)] == parts:
+            stream.queue.put_nowait(("put", "/", self._node(stream.parts)))
+
+    def query(self, parts: List[str], params: Dict[str, str]):
+        node = self._node(parts)
+        if "shallow" in params:
+            if len(params) > 1:
+                raise ValueError("Mixing 'shallow' with other query parameters is not supported")
+            return {k: (v if not isinstance(v, dict) else True) for k, v in node.items()} if isinstance(node, dict) else node
+        if "orderBy" not in params or not isinstance(node, dict):
+            return node
+        order_by = json.loads(params["orderBy"])
+        if order_by == "$key":
+            rank = _key_order
+            items = sorted(node.items(), key=lambda kv: _key_order(kv[0]))
+        else:
+            if order_by not in self.indexes:
+                raise LookupError(f'Index not defined, add ".indexOn": "{order_by}", for path "/{"/".join(parts)}", to the rules')
+            rank = _value_order
+            items = sorted(node.items(), key=lambda kv: (_value_order((kv[1] or {}).get(order_by)), _key_order(kv[0])))
+
+        def value(kv):
+            return kv[0] if order_by == "$key" else (kv[1] or {}).get(order_by)
+
+        if "equalTo" in params:
+            target = rank(json.loads(params["equalTo"]))
+            items = [kv for kv in items if rank(value(kv)) == target]
+        if "startAt" in params:
+            start = rank(json.loads(params["startAt"]))
+            items = [kv for kv in items if rank(value(kv)) >= start]
+        if "endAt" in params:
+            end = rank(json.loads(params["endAt"]))
+            items = [kv for kv in items if rank(value(kv)) <= end]
+        if "limitToFirst" in params:
+            items = items[: int(params["limitToFirst"])]
+        if "limitToLast" in params:
+            items = items[-int(params["limitToLast"]) :]
+        return dict(items)
+
+
+def app_for(db: Database, keepalive: float = 30.0, delay: float = 0.0):
+    async def read_body(receive) -> bytes:
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                return body
+
+    async def respond(send, status: int, payload: bytes, headers=()):
+        db.bytes_sent += len(payload)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-type", b"application/json"), *headers],
+            }
+        )
+        await send({"type": "http.response.body", "body": payload})
+
+    async def emit(send, event: str, data) -> None:
+        chunk = f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+        db.bytes_sent += len(chunk)
+        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+    async def disconnected(receive) -> None:
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    async def stream(receive, send, parts: List[str]) -> None:
+        watcher = _Stream(parts)
+        db.streams.append(watcher)
+        gone = asyncio.ensure_future(disconnected(receive))
+        try:
+            await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/event-stream")]})
+            await emit(send, "put", {"path": "/", "data": db._node(parts)})
+            while True:
+                get = asyncio.ensure_future(watcher.queue.get())
+                done, _ = await asyncio.wait({get, gone}, timeout=keepalive, return_when=asyncio.FIRST_COMPLETED)
+                if gone in done:
+                    get.cancel()
+                    return
+                if get not in done:
+                    get.cancel()
+                    if not watcher.stalled:
+                        await emit(send, "keep-alive", None)
+                    continue
+                message = get.result()
+                if message is None:  # DELETE /_streams
+                    break
+                event, path, data = message
+                if not watcher.stalled:
+                    await emit(send, event, {"path": path, "data": data})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            gone.cancel()
+            db.streams.remove(watcher)
+
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        method, path = scope["method"], scope["path"]
+        if path.startswith("/_streams"):
+            for watcher in db.streams:
+                if path.endswith("/stall"):
+                    watcher.stalled = True
+                else:
+                    watcher.queue.put_nowait(None)
+            await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+            await send({"type": "http.response.body", "body": json.dumps({"streams": len(db.streams)}).encode()})
+            return
+        if path == "/_stats":
+            if method == "DELETE":
+                db.bytes_sent = db.requests = 0
+            stats = json.dumps({"bytes_sent": db.bytes_sent, "requests": db.requests}).encode()
+            await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+            await send({"type": "http.response.body", "body": stats})
+            return
+        db.requests += 1
+        if delay:
+            await asyncio.sleep(delay)
+        parts = [p for p in path[: -len(".json")].split("/") if p] if path.endswith(".json") else None
+        if parts is None:
+            await respond(send, 404, b'{"error": "not found"}')
+            return
+        headers = {k.decode().lower(): v.decode() for k, v in scope["headers"]}
+        params = {k: v[-1] for k, v in parse_qs(scope["query_string"].decode()).items()}
+        body = await read_body(receive)
+
+        if method == "GET" and headers.get("accept") == "text/event-stream":
+            await stream(receive, send, parts)
+        elif method == "GET":
+            try:
+                result = db.query(parts, params)
+            except (LookupError, ValueError) as exc:
+                await respond(send, 400, json.dumps({"error": str(exc)}).encode())
+                return
+            payload = json.dumps(result).encode()
+            extra = []
+            if headers.get("x-firebase-etag") == "true":
+                etag = hashlib.sha1(payload).hexdigest()
+                extra.append((b"etag", etag.encode()))
+                if headers.get("if-none-match") == etag:
+                    await respond(send, 304, b"", extra)
+                    return
+            await respond(send, 200, payload, extra)
+        elif method == "PUT":
+            value = json.loads(body or b"null")
+            db.put(parts, value)
+            await respond(send, 200, json.dumps(value).encode())
+        elif method == "PATCH":
+            updates = json.loads(body or b"{}")
+            db.patch(parts, updates)
+            await respond(send, 200, json.dumps(updates).encode())
+        elif method == "DELETE":
+            db.put(parts, None)
+            await respond(send, 200, b"null")
+        else:
+            await respond(send, 405, b'{"error": "method not allowed"}')
+
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def running(
+    plants: int = 1000, extra_bytes: int = 256, indexes: str = INDEXES, keepalive: float = 30.0, delay_ms: float = 0.0
+) -> Iterator[str]:
+    """Run the stand-in in a child process; yields its base URL."""
+    import httpx
+
+    port = free_port()
+    args = [sys.executable, __file__, "--port", str(port), "--plants", str(plants), "--extra-bytes", str(extra_bytes), "--index", indexes]
+    args += ["--keepalive", str(keepalive), "--delay-ms", str(delay_ms)]
+    server = subprocess.Popen(args)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 15
+        while True:
+            try:
+                httpx.get(f"{url}/_stats", timeout=1).raise_for_status()
+                break
+            except httpx.HTTPError:
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise RuntimeError("Firebase stand-in did not start")
+                time.sleep(0.1)
+        yield url
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=5)
+        except subprocess.TimeoutExpired:  # uvicorn waits for open streams to finish
+            server.kill()
+            server.wait()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--plants", type=int, default=1000)
+    parser.add_argument("--extra-bytes", type=int, default=256, help="size of each plant's free-form notes")
+    parser.add_argument("--index", default=INDEXES, help="children with an .indexOn rule")
+    parser.add_argument("--keepalive", type=float, default=30.0, help="seconds between keep-alive events on a stream")
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="added to every request, like a network round trip")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    db = Database({"plants": make_plants(args.plants, args.extra_bytes)}, [i for i in args.index.split(",") if i])
+    uvicorn.run(app_for(db, keepalive=args.keepalive, delay=args.delay_ms / 1000), host="127.0.0.1", port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())